@@ -7,13 +7,40 @@
 """
 
 import argparse
-import shutil
+import functools
+import io
+import os
 import subprocess
 import sys
 import tempfile
 import defusedxml.minidom
+import defusedxml.sax
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from xml.sax.handler import ContentHandler, property_lexical_handler
+
+try:
+    from soffice_pool import SofficeError, SofficeTimeout, get_pool
+except ImportError:
+    from .soffice_pool import SofficeError, SofficeTimeout, get_pool
+
+# unpack.py写出的部件清单文件名后缀
+MANIFEST_SUFFIX = ".unpack-manifest.json"
+
+# 已经压缩过的媒体格式，直接存储而不再次压缩
+STORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff", ".wdp", ".jxr",
+    ".mp4", ".m4v", ".mov", ".wmv", ".avi", ".mp3", ".m4a", ".wma",
+    ".zip", ".docx", ".pptx", ".xlsx", ".odttf",
+}
+
+# XML部件少于此数量时串行处理，避免进程池的启动开销
+PARALLEL_THRESHOLD = 8
+
+# soffice验证超时：基础秒数加上每MB文件大小的秒数
+VALIDATE_TIMEOUT_BASE = 10
+VALIDATE_TIMEOUT_PER_MB = 5
 
 
 def main():
@@ -21,11 +48,19 @@ def main():
     parser.add_argument("input_directory", help="已解压的Office文档目录")
     parser.add_argument("output_file", help="输出Office文件(.docx/.pptx/.xlsx)")
     parser.add_argument("--force", action="store_true", help="跳过验证")
+    parser.add_argument(
+        "--legacy-condense",
+        action="store_true",
+        help="使用旧的minidom压缩路径(用于逐字节比较)",
+    )
     args = parser.parse_args()
 
     try:
         success = pack_document(
-            args.input_directory, args.output_file, validate=not args.force
+            args.input_directory,
+            args.output_file,
+            validate=not args.force,
+            legacy_condense=args.legacy_condense,
         )
 
         # 如果跳过验证，显示警告
@@ -42,13 +77,20 @@ def main():
         sys.exit(f"错误: {e}")
 
 
-def pack_document(input_dir, output_file, validate=False):
+def pack_document(
+    input_dir, output_file, validate=False, jobs=None, legacy_condense=False
+):
     """将目录打包为Office文件(.docx/.pptx/.xlsx)。
 
+    直接从源目录流式写入zip：XML部件在内存中压缩格式后写入，
+    媒体部件按原样写入，不会复制整个目录树。
+
     参数:
         input_dir: 已解压的Office文档目录路径
         output_file: 输出Office文件路径
         validate: 如果为True，使用soffice验证(默认: False)
+        jobs: 并行压缩XML部件的进程数(默认: CPU核心数，1表示串行)
+        legacy_condense: 如果为True，使用旧的minidom压缩路径(默认: False)
 
     返回:
         bool: 成功返回True，验证失败返回False
@@ -61,34 +103,69 @@ def pack_document(input_dir, output_file, validate=False):
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
 
-    # 在临时目录中工作，避免修改原始文件
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # 处理XML文件以移除格式化空白
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
-
-        # 将最终Office文件创建为zip存档
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # 如果请求验证
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # 删除损坏的文件
-                return False
+    # 跳过unpack.py的部件清单（旧版本解包到"."时会把它写进目录内）
+    parts = [
+        f
+        for f in input_dir.rglob("*")
+        if f.is_file() and not f.name.endswith(MANIFEST_SUFFIX)
+    ]
+    xml_parts = [f for f in parts if f.suffix in (".xml", ".rels")]
+
+    # 将最终Office文件创建为zip存档
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
+        # 处理XML文件以移除格式化空白(结果按部件顺序返回)
+        condensed = _condense_parts(xml_parts, jobs, legacy_condense)
+
+        for f in parts:
+            info = zipfile.ZipInfo.from_file(f, f.relative_to(input_dir))
+            if f.suffix in (".xml", ".rels"):
+                info.compress_type = zipfile.ZIP_DEFLATED
+                zf.writestr(info, next(condensed))
+            else:
+                if f.suffix.lower() in STORED_EXTENSIONS:
+                    compress_type = zipfile.ZIP_STORED
+                else:
+                    compress_type = zipfile.ZIP_DEFLATED
+                zf.write(f, info.filename, compress_type=compress_type)
+
+    # 如果请求验证
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # 删除损坏的文件
+            return False
 
     return True
 
 
-def validate_document(doc_path):
-    """通过使用soffice转换为HTML来验证文档。"""
+def _condense_parts(xml_parts, jobs=None, legacy=False):
+    """压缩多个XML部件，按输入顺序逐个生成压缩后的字节内容。"""
+    condense = functools.partial(condense_xml_bytes, legacy=legacy)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(xml_parts) < PARALLEL_THRESHOLD:
+        for f in xml_parts:
+            yield condense(f)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(condense, xml_parts, chunksize=4)
+
+
+def validate_document(doc_path, timeout=None):
+    """通过使用soffice转换为HTML来验证文档。
+
+    如果有正在运行的soffice工作进程池(见soffice_pool.py)，则使用预热实例，
+    否则启动一次性的soffice进程。
+
+    参数:
+        doc_path: 要验证的Office文件路径
+        timeout: 转换超时秒数(默认: 按文件大小计算，至少10秒)
+    """
+    doc_path = Path(doc_path)
+    if timeout is None:
+        size_mb = doc_path.stat().st_size / (1024 * 1024)
+        timeout = VALIDATE_TIMEOUT_BASE + VALIDATE_TIMEOUT_PER_MB * size_mb
+
     # 根据文件扩展名确定正确的过滤器
     match doc_path.suffix.lower():
         case ".docx":
@@ -99,6 +176,21 @@ def validate_document(doc_path):
             filter_name = "html:HTML (StarCalc)"
 
     with tempfile.TemporaryDirectory() as temp_dir:
+        pool = get_pool()
+        if pool is not None:
+            try:
+                pool.convert(doc_path, temp_dir, filter_name, timeout=timeout)
+            except SofficeTimeout:
+                print("验证错误: 转换过程超时", file=sys.stderr)
+                return False
+            except SofficeError as e:
+                print(f"验证错误: {e}", file=sys.stderr)
+                return False
+            if not (Path(temp_dir) / f"{doc_path.stem}.html").exists():
+                print("验证错误: 文档验证失败", file=sys.stderr)
+                return False
+            return True
+
         try:
             result = subprocess.run(
                 [
@@ -111,7 +203,7 @@ def validate_document(doc_path):
                     str(doc_path),
                 ],
                 capture_output=True,
-                timeout=10,
+                timeout=timeout,
                 text=True,
             )
             if not (Path(temp_dir) / f"{doc_path.stem}.html").exists():
@@ -130,8 +222,35 @@ def validate_document(doc_path):
             return False
 
 
-def condense_xml(xml_file):
-    """去除不必要的空白和注释。"""
+def condense_xml(xml_file, legacy=False):
+    """去除不必要的空白和注释，原地写回文件。"""
+    condensed = condense_xml_bytes(xml_file, legacy=legacy)
+    with open(xml_file, "wb") as f:
+        f.write(condensed)
+
+
+def condense_xml_bytes(xml_file, legacy=False):
+    """去除不必要的空白和注释，返回压缩后的XML字节内容。
+
+    默认使用流式SAX解析，内存占用与文件大小无关；
+    legacy=True时使用旧的minidom实现，两者输出逐字节相同。
+    """
+    if legacy:
+        return _condense_xml_minidom(xml_file)
+
+    out = io.BytesIO()
+    handler = _CondenseHandler(out)
+    parser = defusedxml.sax.make_parser()
+    parser.setContentHandler(handler)
+    parser.setProperty(property_lexical_handler, handler)
+    with open(xml_file, "rb") as f:
+        parser.parse(f)
+    handler.flush()
+    return out.getvalue()
+
+
+def _condense_xml_minidom(xml_file):
+    """旧的minidom实现：加载整个DOM树后移除空白和注释。"""
     with open(xml_file, "r", encoding="utf-8") as f:
         dom = defusedxml.minidom.parse(f)
 
@@ -150,9 +269,130 @@ def condense_xml(xml_file):
             ) or child.nodeType == child.COMMENT_NODE:
                 element.removeChild(child)
 
-    # 写回压缩后的XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+    return dom.toxml(encoding="UTF-8")
+
+
+def _escape(data):
+    """按minidom.toxml的规则转义文本和属性值。"""
+    return (
+        data.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+class _CondenseHandler(ContentHandler):
+    """边解析边输出压缩后XML的SAX处理器。
+
+    输出与minidom的toxml()一致：命名空间声明排在普通属性之前，
+    没有子节点的元素写成自闭合标签，*:t元素内的文本和注释原样保留。
+    """
+
+    FLUSH_SIZE = 1 << 16
+
+    def __init__(self, out):
+        super().__init__()
+        self._out = out
+        self._chunks = ['<?xml version="1.0" encoding="UTF-8"?>']
+        self._size = 0
+        self._stack = []  # 打开的元素名称
+        self._text = []  # 尚未输出的字符数据
+        self._start_open = False  # 当前开始标签是否还未写出">"
+        self._cdata = None  # CDATA段内收集的字符数据
+
+    def _write(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self.FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """将缓冲的输出写入目标流。"""
+        if self._chunks:
+            self._out.write("".join(self._chunks).encode("utf-8"))
+            self._chunks = []
+            self._size = 0
+
+    def _close_start_tag(self):
+        if self._start_open:
+            self._write(">")
+            self._start_open = False
+
+    def _keeps_formatting(self):
+        # 与旧实现一致：仅保留*:t元素的直接子节点
+        return bool(self._stack) and self._stack[-1].endswith(":t")
+
+    def _flush_text(self):
+        if not self._text:
+            return
+        text = "".join(self._text)
+        self._text = []
+        # 文档元素之外的字符数据不属于任何节点
+        if not self._stack:
+            return
+        if self._keeps_formatting() or text.strip() != "":
+            self._close_start_tag()
+            self._write(_escape(text))
+
+    def startElement(self, name, attrs):
+        self._flush_text()
+        self._close_start_tag()
+        names = attrs.getNames()
+        # minidom将命名空间声明放在其他属性之前
+        ordered = [n for n in names if n == "xmlns" or n.startswith("xmlns:")]
+        ordered += [n for n in names if not (n == "xmlns" or n.startswith("xmlns:"))]
+        self._write(
+            "<" + name + "".join(f' {n}="{_escape(attrs[n])}"' for n in ordered)
+        )
+        self._start_open = True
+        self._stack.append(name)
+
+    def endElement(self, name):
+        self._flush_text()
+        self._stack.pop()
+        if self._start_open:
+            self._write("/>")
+            self._start_open = False
+        else:
+            self._write(f"</{name}>")
+
+    def characters(self, content):
+        if self._cdata is not None:
+            self._cdata.append(content)
+        else:
+            self._text.append(content)
+
+    def ignorableWhitespace(self, whitespace):
+        self.characters(whitespace)
+
+    def processingInstruction(self, target, data):
+        self._flush_text()
+        self._close_start_tag()
+        self._write(f"<?{target} {data}?>")
+
+    # LexicalHandler回调
+
+    def comment(self, content):
+        self._flush_text()
+        if not self._stack or self._keeps_formatting():
+            self._close_start_tag()
+            self._write(f"<!--{content}-->")
+
+    def startCDATA(self):
+        self._flush_text()
+        self._cdata = []
+
+    def endCDATA(self):
+        self._close_start_tag()
+        self._write(f"<![CDATA[{''.join(self._cdata)}]]>")
+        self._cdata = None
+
+    def startDTD(self, name, public_id, system_id):
+        pass
+
+    def endDTD(self):
+        pass
 
 
 if __name__ == "__main__":
@@ -3,21 +3,36 @@
 用于针对XSD模式和修订记录验证Office文档XML文件的命令行工具。
 
 用法:
-    python validate.py <目录> --original <原始文件>
+    python validate.py <目录或Office文件> --original <原始文件> [--jobs N] [--no-cache]
+
+既可以验证已解压的目录，也可以直接验证打包后的Office文件：部件从zip中流式读取，
+不解压、不写入任何文件（此时不使用结果缓存）。
+
+逐部件检查的结果缓存在目录旁边的 .<目录名>.ooxml-validate-cache 中，
+再次验证同一目录时只重新检查内容发生变化的部件。
 """
 
 import argparse
 import sys
+import zipfile
 from pathlib import Path
 
-from validation import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+from validation import (
+    DOCXSchemaValidator,
+    PPTXSchemaValidator,
+    RedliningValidator,
+    XLSXSchemaValidator,
+)
+from validation.base import BaseSchemaValidator, OriginalPackage
+from validation.cache import ValidationCache
+from validation.package import open_source
 
 
 def main():
     parser = argparse.ArgumentParser(description="验证Office文档XML文件")
     parser.add_argument(
         "unpacked_dir",
-        help="已解压的Office文档目录路径",
+        help="已解压的Office文档目录或Office文件(.docx/.pptx/.xlsx)路径",
     )
     parser.add_argument(
         "--original",
@@ -30,13 +45,27 @@ def main():
         action="store_true",
         help="启用详细输出",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="并行检查部件的进程数(默认: 1，0表示CPU核心数)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不读取也不保存验证结果缓存",
+    )
     args = parser.parse_args()
 
     # 验证路径
     unpacked_dir = Path(args.unpacked_dir)
     original_file = Path(args.original)
     file_extension = original_file.suffix.lower()
-    assert unpacked_dir.is_dir(), f"错误: {unpacked_dir} 不是一个目录"
+    assert unpacked_dir.is_dir() or zipfile.is_zipfile(unpacked_dir), (
+        f"错误: {unpacked_dir} 不是目录或Office文件"
+    )
     assert original_file.is_file(), f"错误: {original_file} 不是一个文件"
     assert file_extension in [".docx", ".pptx", ".xlsx"], (
         f"错误: {original_file} 必须是 .docx, .pptx 或 .xlsx 文件"
@@ -48,16 +77,44 @@ def main():
             validators = [DOCXSchemaValidator, RedliningValidator]
         case ".pptx":
             validators = [PPTXSchemaValidator]
+        case ".xlsx":
+            validators = [XLSXSchemaValidator]
         case _:
             print(f"错误: 不支持文件类型 {file_extension} 的验证")
             sys.exit(1)
 
-    # 执行验证器
+    # 执行验证器（共享文档部件来源、原始文档的只读视图和结果缓存，两个文件都只打开一次）
     success = True
-    for V in validators:
-        validator = V(unpacked_dir, original_file, verbose=args.verbose)
-        if not validator.validate():
-            success = False
+    # 直接验证Office文件时不写缓存文件
+    cache = (
+        None
+        if args.no_cache or not unpacked_dir.is_dir()
+        else ValidationCache(unpacked_dir, original_file)
+    )
+    with (
+        open_source(unpacked_dir) as source,
+        OriginalPackage(original_file) as original,
+    ):
+        for V in validators:
+            # 修订记录验证只涉及document.xml，只有模式验证器并行检查部件
+            if not issubclass(V, BaseSchemaValidator):
+                validator = V(source, original, verbose=args.verbose, cache=cache)
+                if not validator.validate():
+                    success = False
+                continue
+
+            with V(
+                source,
+                original,
+                verbose=args.verbose,
+                cache=cache,
+                jobs=args.jobs or None,
+            ) as validator:
+                if not validator.validate():
+                    success = False
+
+    if cache is not None:
+        cache.save()
 
     if success:
         print("所有验证已通过!")
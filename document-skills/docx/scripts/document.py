@@ -22,11 +22,17 @@
     doc["word/document.xml"].revert_insertion(ins_node)  # 拒绝插入
     doc["word/document.xml"].revert_deletion(del_node)  # 拒绝删除
 
+    # 批量接受或拒绝修订记录（直接定稿，可按作者、日期、段落过滤）
+    doc["word/document.xml"].accept_changes(author="李四")
+    doc["word/document.xml"].reject_changes(since="2024-01-01")
+
     # 保存
     doc.save()
 """
 
+import hashlib
 import html
+import os
 import random
 import shutil
 import tempfile
@@ -34,10 +40,10 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 from defusedxml import minidom
-from ooxml.scripts.pack import pack_document
 from ooxml.scripts.validation.docx import DOCXSchemaValidator
 from ooxml.scripts.validation.redlining import RedliningValidator
 
+from .track_changes import resolve_changes
 from .utilities import XMLEditor
 
 # 模板文件路径
@@ -71,8 +77,60 @@ class DocxXMLEditor(XMLEditor):
         self.rsid = rsid
         self.author = author
         self.initials = initials
+        # 事务内缓存的时间戳和下一个变更ID（见batch()）
+        self._batch_timestamp = None
+        self._next_change_id = None
+
+    def batch(self):
+        """在一个事务中执行多次编辑。
+
+        除了命名空间声明之外，事务内还会：
+        - 对所有新元素使用同一个时间戳
+        - 只扫描一次现有的w:ins/w:del，之后在本地递增变更ID
+
+        事务内不要通过其他方式（例如直接操作DOM）添加带w:id的修订记录。
+
+        示例:
+            editor = doc["word/document.xml"]
+            with editor.batch():
+                for node in nodes:
+                    editor.suggest_deletion(node)
+        """
+        return super().batch()
+
+    def _begin_batch(self):
+        super()._begin_batch()
+        self._batch_timestamp = _utc_timestamp()
+        self._next_change_id = None
+
+    def _end_batch(self):
+        super()._end_batch()
+        self._batch_timestamp = None
+        self._next_change_id = None
 
     def _get_next_change_id(self):
+        """获取下一个可用的变更ID。
+
+        事务外每次都扫描所有修订记录元素；事务内只扫描一次，之后在本地递增。
+        """
+        if self._batch_depth:
+            if self._next_change_id is None:
+                self._next_change_id = self._scan_next_change_id()
+            change_id = self._next_change_id
+            self._next_change_id += 1
+            return change_id
+        return self._scan_next_change_id()
+
+    def _reserve_change_id(self, change_id):
+        """事务内遇到已有的w:id时，确保之后分配的ID不与之冲突。"""
+        if self._next_change_id is None:
+            return
+        try:
+            self._next_change_id = max(self._next_change_id, int(change_id) + 1)
+        except ValueError:
+            pass
+
+    def _scan_next_change_id(self):
         """通过检查所有修订记录元素获取下一个可用的变更ID。"""
         max_id = -1
         for tag in ("w:ins", "w:del"):
@@ -88,30 +146,26 @@ class DocxXMLEditor(XMLEditor):
 
     def _ensure_w16du_namespace(self):
         """确保在根元素上声明w16du命名空间。"""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w16du"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w16du",
-                "http://schemas.microsoft.com/office/word/2023/wordml/word16du",
-            )
+        self._ensure_namespace(
+            "w16du", "http://schemas.microsoft.com/office/word/2023/wordml/word16du"
+        )
 
     def _ensure_w16cex_namespace(self):
         """确保在根元素上声明w16cex命名空间。"""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w16cex"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w16cex",
-                "http://schemas.microsoft.com/office/word/2018/wordml/cex",
-            )
+        self._ensure_namespace(
+            "w16cex", "http://schemas.microsoft.com/office/word/2018/wordml/cex"
+        )
 
     def _ensure_w14_namespace(self):
         """确保在根元素上声明w14命名空间。"""
+        self._ensure_namespace("w14", "http://schemas.microsoft.com/office/word/2010/wordml")
+
+    def _ensure_namespace(self, prefix, uri):
+        """确保在根元素上声明命名空间，并使缓存的命名空间声明失效。"""
         root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w14"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w14",
-                "http://schemas.microsoft.com/office/word/2010/wordml",
-            )
+        if not root.hasAttribute(f"xmlns:{prefix}"):  # type: ignore
+            root.setAttribute(f"xmlns:{prefix}", uri)  # type: ignore
+            self._ns_decl = None
 
     def _inject_attributes_to_nodes(self, nodes):
         """将RSID、作者和日期属性注入到适用的DOM节点中。
@@ -127,9 +181,7 @@ class DocxXMLEditor(XMLEditor):
         参数:
             nodes: 要处理的DOM节点列表
         """
-        from datetime import datetime, timezone
-
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        timestamp = self._batch_timestamp or _utc_timestamp()
 
         def is_inside_deletion(elem):
             """检查元素是否在w:del元素内部。"""
@@ -168,6 +220,8 @@ class DocxXMLEditor(XMLEditor):
             # 如果不存在，自动分配w:id
             if not elem.hasAttribute("w:id"):
                 elem.setAttribute("w:id", str(self._get_next_change_id()))
+            else:
+                self._reserve_change_id(elem.getAttribute("w:id"))
             if not elem.hasAttribute("w:author"):
                 elem.setAttribute("w:author", self.author)
             if not elem.hasAttribute("w:date"):
@@ -204,38 +258,25 @@ class DocxXMLEditor(XMLEditor):
                     if not elem.hasAttribute("xml:space"):
                         elem.setAttribute("xml:space", "preserve")
 
+        handlers = {
+            "w:p": add_rsid_to_p,
+            "w:r": add_rsid_to_r,
+            "w:t": add_xml_space_to_t,
+            "w:ins": add_tracked_change_attrs,
+            "w:del": add_tracked_change_attrs,
+            "w:comment": add_comment_attrs,
+            "w16cex:commentExtensible": add_comment_extensible_date,
+        }
+
+        # 一次遍历处理节点本身及其所有后代
         for node in nodes:
-            if node.nodeType != node.ELEMENT_NODE:
-                continue
+            for elem in self._iter_elements(node):
+                handler = handlers.get(elem.tagName)
+                if handler is not None:
+                    handler(elem)
 
-            # 处理节点本身
-            if node.tagName == "w:p":
-                add_rsid_to_p(node)
-            elif node.tagName == "w:r":
-                add_rsid_to_r(node)
-            elif node.tagName == "w:t":
-                add_xml_space_to_t(node)
-            elif node.tagName in ("w:ins", "w:del"):
-                add_tracked_change_attrs(node)
-            elif node.tagName == "w:comment":
-                add_comment_attrs(node)
-            elif node.tagName == "w16cex:commentExtensible":
-                add_comment_extensible_date(node)
-
-            # 处理后代（getElementsByTagName不返回元素本身）
-            for elem in node.getElementsByTagName("w:p"):
-                add_rsid_to_p(elem)
-            for elem in node.getElementsByTagName("w:r"):
-                add_rsid_to_r(elem)
-            for elem in node.getElementsByTagName("w:t"):
-                add_xml_space_to_t(elem)
-            for tag in ("w:ins", "w:del"):
-                for elem in node.getElementsByTagName(tag):
-                    add_tracked_change_attrs(elem)
-            for elem in node.getElementsByTagName("w:comment"):
-                add_comment_attrs(elem)
-            for elem in node.getElementsByTagName("w16cex:commentExtensible"):
-                add_comment_extensible_date(elem)
+        # 注入的属性会改变属性索引的键，重新索引这些节点
+        self.reindex(nodes)
 
     def replace_node(self, elem, new_content):
         """替换节点并自动注入属性。"""
@@ -429,6 +470,61 @@ class DocxXMLEditor(XMLEditor):
         else:
             return [elem]
 
+    def accept_changes(self, author=None, since=None, until=None, paragraphs=None):
+        """接受修订记录：保留插入的内容，移除删除的内容，并移除修订标记。
+
+        与revert_*不同，这里直接定稿修订，不会生成新的修订记录。所有匹配的修订
+        在对整个部件的一遍处理中完成（见track_changes.resolve_changes），
+        适合批量清理大量修订。处理前会先保存编辑器，处理后从文件重新加载，
+        之前获取的节点不再有效。
+
+        参数:
+            author: 只处理该作者（或作者集合）的修订
+            since: 只处理此时间（含）之后的修订，datetime或ISO 8601字符串
+            until: 只处理此时间（含）之前的修订，datetime或ISO 8601字符串
+            paragraphs: 只处理这些段落（从0开始的序号）中的修订，例如range(10, 20)
+
+        返回:
+            int: 处理的修订数量
+
+        示例:
+            # 接受所有修订
+            doc["word/document.xml"].accept_changes()
+
+            # 接受某位作者在2024年之后的修订
+            doc["word/document.xml"].accept_changes(author="张三", since="2024-01-01")
+        """
+        return self._resolve_changes(True, author, since, until, paragraphs)
+
+    def reject_changes(self, author=None, since=None, until=None, paragraphs=None):
+        """拒绝修订记录：移除插入的内容，恢复删除的内容，并移除修订标记。
+
+        参数与accept_changes相同。要以修订记录的形式拒绝其他作者的更改，
+        请使用revert_insertion/revert_deletion。
+
+        返回:
+            int: 处理的修订数量
+
+        示例:
+            # 拒绝前50个段落中某位作者的修订
+            doc["word/document.xml"].reject_changes(author="张三", paragraphs=range(50))
+        """
+        return self._resolve_changes(False, author, since, until, paragraphs)
+
+    def _resolve_changes(self, accept, author, since, until, paragraphs):
+        self.save()
+        count = resolve_changes(
+            self.xml_path,
+            accept,
+            author=author,
+            since=since,
+            until=until,
+            paragraphs=paragraphs,
+        )
+        if count:
+            self.reload()
+        return count
+
     @staticmethod
     def suggest_paragraph(xml_content: str) -> str:
         """转换段落XML以添加用于插入的修订记录包装。
@@ -586,6 +682,9 @@ class DocxXMLEditor(XMLEditor):
             # 向删除包装器注入属性
             self._inject_attributes_to_nodes([del_wrapper])
 
+            # w:pPr中的删除标记不在包装器内，重新索引整个段落
+            self.reindex([elem])
+
             return elem
 
         else:
@@ -603,6 +702,61 @@ def _generate_hex_id() -> str:
     return f"{random.randint(1, 0x7FFFFFFE):08X}"
 
 
+# 编辑器会写入的部件类型；在工作目录和基准中总是复制，不与原始目录共享文件
+EDITABLE_SUFFIXES = {".xml", ".rels"}
+
+
+def _mirror_tree(src, dst):
+    """镜像目录树：XML部件复制，媒体等二进制部件以硬链接共享（不支持时回退为复制）。"""
+    shutil.copytree(src, dst, copy_function=_link_or_copy)
+
+
+def _link_or_copy(src, dst):
+    if Path(src).suffix.lower() not in EDITABLE_SUFFIXES:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _replace_file(src, dst):
+    """复制文件并原子地替换目标，不会修改与目标共享（硬链接）的其他文件。"""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = dst.with_name(f".{dst.name}.tmp")
+    shutil.copy2(src, temp_path)
+    os.replace(temp_path, dst)
+
+
+def _file_hash(path) -> str:
+    """计算文件内容的SHA-256哈希。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tree_hashes(root):
+    """返回目录中每个文件的相对路径 → (大小, 修改时间, SHA-256)。"""
+    hashes = {}
+    for path in root.rglob("*"):
+        if path.is_file():
+            stat = path.stat()
+            hashes[path.relative_to(root)] = (
+                stat.st_size,
+                stat.st_mtime_ns,
+                _file_hash(path),
+            )
+    return hashes
+
+
+def _utc_timestamp() -> str:
+    """生成用于w:date等属性的UTC时间戳。"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 def _generate_rsid() -> str:
     """生成随机8字符十六进制RSID（修订保存ID）。"""
     return "".join(random.choices("0123456789ABCDEF", k=8))
@@ -635,14 +789,21 @@ class Document:
         if not self.original_path.exists() or not self.original_path.is_dir():
             raise ValueError(f"Directory not found: {unpacked_dir}")
 
-        # 创建临时目录，包含解压内容和基准的子目录
+        # 记录原始部件的(大小, 修改时间, SHA-256)，作为判断部件是否修改的基准
+        self._baseline_hashes = _tree_hashes(self.original_path)
+
+        # 创建临时目录，包含工作目录和供验证器比较的基准目录。
+        # XML部件在两者中各复制一份，原地写入也不会影响原始目录或基准；
+        # 编辑器不会修改的媒体等大文件以硬链接共享，不会复制
         self.temp_dir = tempfile.mkdtemp(prefix="docx_")
         self.unpacked_path = Path(self.temp_dir) / "unpacked"
-        shutil.copytree(self.original_path, self.unpacked_path)
+        self.baseline_path = Path(self.temp_dir) / "original"
+        _mirror_tree(self.original_path, self.baseline_path)
+        _mirror_tree(self.original_path, self.unpacked_path)
 
-        # 将原始目录打包为临时.docx用于验证基准（在解压目录外）
-        self.original_docx = Path(self.temp_dir) / "original.docx"
-        pack_document(self.original_path, self.original_docx, validate=False)
+        # 增量验证：逐部件检查结果的缓存，以及上次验证时各文件的状态
+        self._validation_cache = {}
+        self._validated_stats = {}
 
         self.word_path = self.unpacked_path / "word"
 
@@ -838,28 +999,64 @@ class Document:
         """
         根据XSD模式和修订记录规则验证文档。
 
+        验证前会将编辑器中的修改写入工作目录。只有自上次验证以来发生变化的部件
+        会被重新检查，其余部件使用缓存的结果，因此可以在每次编辑后调用。
+
         异常:
             ValueError: 如果验证失败。
         """
-        # 使用当前状态创建验证器
+        # 将编辑器中的修改写入工作目录（内容未变化的编辑器不会重写文件）
+        for editor in self._editors.values():
+            editor.save()
+
+        stats = self._workspace_stats()
+        dirty_parts = {
+            path for path, stat in stats.items()
+            if self._validated_stats.get(path) != stat
+        }
+
+        # 使用当前状态创建验证器（基准直接使用原始部件目录）
         schema_validator = DOCXSchemaValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path,
+            self.baseline_path,
+            verbose=False,
+            dirty_parts=dirty_parts,
+            cache=self._validation_cache,
         )
         redlining_validator = RedliningValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path,
+            self.baseline_path,
+            verbose=False,
+            cache=self._validation_cache,
+            author=self.author,
         )
 
-        # 运行验证
-        if not schema_validator.validate():
+        # 运行验证（结果按部件内容哈希缓存，无论成功与否都记录本次的文件状态）
+        schema_valid = schema_validator.validate()
+        redlining_valid = schema_valid and redlining_validator.validate()
+        self._validated_stats = stats
+
+        if not schema_valid:
             raise ValueError("Schema validation failed")
-        if not redlining_validator.validate():
+        if not redlining_valid:
             raise ValueError("Redlining validation failed")
 
+    def _workspace_stats(self):
+        """返回工作目录中每个文件的(inode, 大小, 修改时间)，用于找出变化的部件。"""
+        stats = {}
+        for path in self.unpacked_path.rglob("*"):
+            if path.is_file():
+                stat = path.stat()
+                relative_path = path.relative_to(self.unpacked_path).as_posix()
+                stats[relative_path] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        return stats
+
     def save(self, destination=None, validate=True) -> None:
         """
         将所有修改的XML文件保存到磁盘并复制到目标目录。
 
         这会持久化通过add_comment()和reply_to_comment()所做的所有更改。
+        保存回原始目录时只写入内容发生变化的部件。
 
         参数:
             destination: 保存的可选路径。如果为None，保存回原始目录。
@@ -880,7 +1077,41 @@ class Document:
 
         # 将内容从临时目录复制到目标目录（或原始目录）
         target_path = Path(destination) if destination else self.original_path
-        shutil.copytree(self.unpacked_path, target_path, dirs_exist_ok=True)
+        if target_path.resolve() != self.original_path.resolve():
+            shutil.copytree(self.unpacked_path, target_path, dirs_exist_ok=True)
+            return
+
+        # 原始目录中已有未修改的部件，只写入修改过的部件
+        for relative_path in self.dirty_parts():
+            _replace_file(
+                self.unpacked_path / relative_path, target_path / relative_path
+            )
+
+    def dirty_parts(self):
+        """
+        返回与原始文档相比内容发生变化（或新增）的部件。
+
+        只检查已写入磁盘的内容；编辑器中尚未保存的修改在save()时才会写入。
+        部件与初始化时记录的原始部件比较：大小和修改时间都未变化时视为未修改，
+        否则比较内容哈希（原地覆盖共享的媒体文件也会被发现）。
+
+        返回:
+            list[Path]: 相对于已解压目录的部件路径
+        """
+        dirty = []
+        for path in sorted(self.unpacked_path.rglob("*")):
+            if not path.is_file():
+                continue
+            relative_path = path.relative_to(self.unpacked_path)
+            baseline = self._baseline_hashes.get(relative_path)
+            stat = path.stat()
+            if baseline is None or stat.st_size != baseline[0]:
+                dirty.append(relative_path)
+            elif stat.st_mtime_ns == baseline[1]:
+                continue
+            elif _file_hash(path) != baseline[2]:
+                dirty.append(relative_path)
+        return dirty
 
     # ==================== Private: Initialization ====================
 
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+流式读取Word文档中的修订记录和注释。
+
+基于lxml iterparse逐个元素读取word/document.xml、comments.xml和commentsExtended.xml，
+处理完的段落立即释放，内存占用与文档大小无关，适合批量审计大量红线文档。
+输入既可以是.docx文件，也可以是已解压的目录。
+
+使用方法：
+    from scripts.review_reader import iter_revisions, iter_comments
+
+    for revision in iter_revisions("contract.docx"):
+        print(revision["type"], revision["author"], revision["text"])
+
+    for comment in iter_comments("contract.docx"):
+        print(comment["id"], comment["parent_id"], comment["text"])
+
+命令行（每行输出一条JSON记录）：
+    python scripts/review_reader.py contract.docx [更多文件...] > review.jsonl
+    python scripts/review_reader.py unpacked/ --kind comments
+"""
+
+import argparse
+import json
+import sys
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import lxml.etree
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W14 = "{http://schemas.microsoft.com/office/word/2010/wordml}"
+W15 = "{http://schemas.microsoft.com/office/word/2012/wordml}"
+
+DOCUMENT_PART = "word/document.xml"
+COMMENTS_PART = "word/comments.xml"
+COMMENTS_EXTENDED_PART = "word/commentsExtended.xml"
+
+# 修订元素到记录类型的映射
+REVISION_TYPES = {
+    f"{W}ins": "insertion",
+    f"{W}del": "deletion",
+    f"{W}moveFrom": "move_from",
+    f"{W}moveTo": "move_to",
+}
+
+# 修订元素不直接包含内容、而是标记其父级属性所属对象时的目标
+MARKER_TARGETS = {
+    f"{W}rPr": "paragraph_mark",
+    f"{W}trPr": "table_row",
+}
+
+# 运行中的特殊字符元素
+RUN_CHARACTERS = {f"{W}tab": "\t", f"{W}br": "\n", f"{W}cr": "\n"}
+
+
+def iter_revisions(source, part=DOCUMENT_PART):
+    """逐条返回部件中的修订记录（插入、删除和移动）。
+
+    参数:
+        source: .docx文件或已解压的目录
+        part: 要读取的部件（默认: word/document.xml）
+
+    返回:
+        生成器，每条记录是一个字典：
+        - type: "insertion"、"deletion"、"move_from"或"move_to"
+        - id, author, date: 修订元素上的w:id、w:author和w:date
+        - text: 修订包含的文本（删除的文本来自w:delText）
+        - target: "content"，或段落标记/表格行修订的"paragraph_mark"/"table_row"
+        - paragraph: 修订所在段落在部件中的序号（从0开始，包括表格中的段落）
+        - part: 部件名称
+    """
+    tags = [
+        *REVISION_TYPES,
+        *RUN_CHARACTERS,
+        f"{W}p",
+        f"{W}tbl",
+        f"{W}t",
+        f"{W}delText",
+    ]
+    with _open_part(source, part) as stream:
+        if stream is None:
+            return
+
+        paragraph = -1
+        # 当前打开的修订（嵌套时外层在前），文本会追加到所有打开的修订中
+        open_revisions = []
+        for event, elem in _iterparse(stream, ("start", "end"), tags):
+            tag = elem.tag
+            if event == "start":
+                if tag == f"{W}p":
+                    paragraph += 1
+                elif tag in REVISION_TYPES:
+                    parent = elem.getparent()
+                    target = MARKER_TARGETS.get(
+                        parent.tag if parent is not None else None, "content"
+                    )
+                    open_revisions.append({
+                        "type": REVISION_TYPES[tag],
+                        "id": _decimal(elem.get(f"{W}id")),
+                        "author": elem.get(f"{W}author"),
+                        "date": elem.get(f"{W}date"),
+                        "text": [],
+                        "target": target,
+                        # 表格行属性位于行内第一个段落之前
+                        "paragraph": paragraph + 1 if target == "table_row" else paragraph,
+                        "part": part,
+                    })
+                continue
+
+            if tag in REVISION_TYPES:
+                record = open_revisions.pop()
+                record["text"] = "".join(record["text"])
+                yield record
+            elif tag in (f"{W}t", f"{W}delText"):
+                if open_revisions and elem.text:
+                    for record in open_revisions:
+                        record["text"].append(elem.text)
+            elif tag in RUN_CHARACTERS:
+                # w:tab也用于段落属性中的制表位，只统计运行中的字符
+                parent = elem.getparent()
+                if open_revisions and parent is not None and parent.tag == f"{W}r":
+                    for record in open_revisions:
+                        record["text"].append(RUN_CHARACTERS[tag])
+            elif not open_revisions:
+                # 段落和表格处理完毕，释放已读取的部分
+                _release(elem)
+
+
+def iter_comments(source):
+    """逐条返回注释，包括回复关系和解决状态。
+
+    参数:
+        source: .docx文件或已解压的目录
+
+    返回:
+        生成器，每条记录是一个字典：
+        - type: "comment"
+        - id, author, initials, date: w:comment上的属性
+        - text: 注释文本（多个段落以换行分隔）
+        - para_id: 注释最后一个段落的w14:paraId（commentsExtended.xml中的键）
+        - parent_id: 所回复注释的id，顶层注释为None
+        - resolved: 注释是否已标记为完成
+    """
+    extended = _read_comments_extended(source)
+
+    # 只为被回复的注释记录 paraId → id，先单独扫描一遍以支持任意顺序
+    parent_para_ids = {parent for parent, _ in extended.values() if parent}
+    para_to_id = {}
+    if parent_para_ids:
+        for comment_id, para_id, _ in _iter_comment_elements(source, with_records=False):
+            if para_id in parent_para_ids:
+                para_to_id[para_id] = comment_id
+
+    for comment_id, para_id, record in _iter_comment_elements(source):
+        parent_para_id, done = extended.get(para_id, (None, False))
+        record["parent_id"] = para_to_id.get(parent_para_id)
+        record["resolved"] = done
+        yield record
+
+
+def iter_review_records(source, kinds=("revisions", "comments")):
+    """依次返回修订记录和注释记录。
+
+    参数:
+        source: .docx文件或已解压的目录
+        kinds: 要读取的记录种类，"revisions"和/或"comments"
+    """
+    if "revisions" in kinds:
+        yield from iter_revisions(source)
+    if "comments" in kinds:
+        yield from iter_comments(source)
+
+
+def _iter_comment_elements(source, with_records=True):
+    """逐个读取comments.xml中的w:comment，返回(id, para_id, 记录)。"""
+    with _open_part(source, COMMENTS_PART) as stream:
+        if stream is None:
+            return
+
+        for _, elem in _iterparse(stream, ("end",), [f"{W}comment"]):
+            paragraphs = list(elem.iter(f"{W}p"))
+            para_id = paragraphs[-1].get(f"{W14}paraId") if paragraphs else None
+            comment_id = _decimal(elem.get(f"{W}id"))
+
+            record = None
+            if with_records:
+                record = {
+                    "type": "comment",
+                    "id": comment_id,
+                    "author": elem.get(f"{W}author"),
+                    "initials": elem.get(f"{W}initials"),
+                    "date": elem.get(f"{W}date"),
+                    "text": "\n".join(
+                        "".join(t.text or "" for t in p.iter(f"{W}t"))
+                        for p in paragraphs
+                    ),
+                    "para_id": para_id,
+                }
+
+            _release(elem)
+            yield comment_id, para_id, record
+
+
+def _read_comments_extended(source):
+    """读取commentsExtended.xml，返回 paraId → (父级paraId, 是否完成)。"""
+    extended = {}
+    with _open_part(source, COMMENTS_EXTENDED_PART) as stream:
+        if stream is None:
+            return extended
+
+        for _, elem in _iterparse(stream, ("end",), [f"{W15}commentEx"]):
+            para_id = elem.get(f"{W15}paraId")
+            if para_id:
+                extended[para_id] = (
+                    elem.get(f"{W15}paraIdParent"),
+                    elem.get(f"{W15}done") in ("1", "true"),
+                )
+            _release(elem)
+    return extended
+
+
+@contextmanager
+def _open_part(source, part):
+    """打开.docx文件或解压目录中的部件，部件不存在时返回None。"""
+    source = Path(source)
+    if source.is_dir():
+        path = source / part
+        if not path.is_file():
+            yield None
+            return
+        with open(path, "rb") as stream:
+            yield stream
+        return
+
+    with zipfile.ZipFile(source) as zf:
+        try:
+            info = zf.getinfo(part)
+        except KeyError:
+            yield None
+            return
+        with zf.open(info) as stream:
+            yield stream
+
+
+def _iterparse(stream, events, tags):
+    return lxml.etree.iterparse(
+        stream, events=events, tag=tags, resolve_entities=False, no_network=True
+    )
+
+
+def _release(elem):
+    """清空已处理的元素并删除其之前的兄弟节点，使内存占用保持恒定。"""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _decimal(value):
+    """将ST_DecimalNumber属性转换为整数，无法转换时原样返回。"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="以JSONL格式输出Word文档中的修订记录和注释"
+    )
+    parser.add_argument(
+        "sources",
+        nargs="+",
+        help=".docx文件或已解压的目录",
+    )
+    parser.add_argument(
+        "--kind",
+        choices=["all", "revisions", "comments"],
+        default="all",
+        help="要输出的记录种类（默认: all）",
+    )
+    args = parser.parse_args()
+
+    kinds = ("revisions", "comments") if args.kind == "all" else (args.kind,)
+    success = True
+    for source in args.sources:
+        try:
+            for record in iter_review_records(source, kinds):
+                line = json.dumps({"file": source, **record}, ensure_ascii=False)
+                sys.stdout.write(line + "\n")
+        except (OSError, zipfile.BadZipFile, lxml.etree.XMLSyntaxError) as e:
+            print(f"错误: {source}: {e}", file=sys.stderr)
+            success = False
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
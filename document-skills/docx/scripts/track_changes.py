@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+批量接受或拒绝修订记录。
+
+与revert_insertion/revert_deletion（以新的修订记录表示拒绝）不同，这里直接定稿修订：
+接受插入/拒绝删除时保留内容并移除修订标记，接受删除/拒绝插入时移除内容。
+整个部件用lxml解析一次，按文档顺序在一遍中处理所有匹配的修订，然后一次写回。
+
+支持的修订：
+- w:ins、w:del、w:moveFrom、w:moveTo（包括段落标记和表格行上的标记）
+- w:rPrChange、w:pPrChange、w:sectPrChange、w:tblPrChange、w:tblGridChange、
+  w:trPrChange、w:tcPrChange（属性修订，拒绝时恢复原有属性）
+- w:cellIns、w:cellDel（表格单元格的插入和删除）
+- w:numberingChange（只能接受：原有编号只以显示文本保存，无法恢复）
+
+不支持的修订（w:cellMerge，以及拒绝w:numberingChange）匹配时抛出ValueError，
+此时不修改文件。
+
+使用方法：
+    from scripts.track_changes import resolve_changes
+
+    # 接受所有修订
+    resolve_changes("unpacked/word/document.xml", accept=True)
+
+    # 拒绝某位作者在某日期之后、前100个段落中的修订
+    resolve_changes(
+        "unpacked/word/document.xml",
+        accept=False,
+        author="张三",
+        since="2024-01-01",
+        paragraphs=range(100),
+    )
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import lxml.etree
+
+from .review_reader import MARKER_TARGETS, REVISION_TYPES, W
+from .utilities import _write_replacing
+
+# 保留内容时需要将删除文本转换回普通文本
+DELETED_TEXT_TAGS = {f"{W}delText": f"{W}t", f"{W}delInstrText": f"{W}instrText"}
+
+# 格式修订元素 → (保存原有属性的子元素, 拒绝时保留在属性开头的元素, 保留在属性末尾的元素)
+FORMATTING_CHANGES = {
+    f"{W}rPrChange": (f"{W}rPr", set(REVISION_TYPES), set()),
+    f"{W}pPrChange": (f"{W}pPr", set(), {f"{W}rPr", f"{W}sectPr"}),
+    f"{W}sectPrChange": (
+        f"{W}sectPr",
+        {f"{W}headerReference", f"{W}footerReference"},
+        set(),
+    ),
+    f"{W}tblPrChange": (f"{W}tblPr", set(), set()),
+    f"{W}tblGridChange": (f"{W}tblGrid", set(), set()),
+    f"{W}trPrChange": (f"{W}trPr", set(), set(REVISION_TYPES)),
+    f"{W}tcPrChange": (
+        f"{W}tcPr",
+        set(),
+        {f"{W}cellIns", f"{W}cellDel", f"{W}cellMerge"},
+    ),
+}
+
+# 单元格修订元素（位于w:tcPr中）
+CELL_CHANGES = {f"{W}cellIns": "insertion", f"{W}cellDel": "deletion"}
+
+# 编号修订只以显示文本保存原有编号，只能接受
+NUMBERING_CHANGE = f"{W}numberingChange"
+
+# 无法定稿的修订（垂直合并修订需要同时调整相邻行的单元格）
+UNSUPPORTED_CHANGES = {f"{W}cellMerge"}
+
+# 位于表格、行或单元格内第一个段落之前的属性
+TABLE_PROPERTIES = {f"{W}tblPr", f"{W}tblGrid", f"{W}trPr", f"{W}tcPr"}
+
+# 必须以段落结尾的块级容器
+BLOCK_CONTAINERS = {
+    f"{W}body",
+    f"{W}tc",
+    f"{W}hdr",
+    f"{W}ftr",
+    f"{W}footnote",
+    f"{W}endnote",
+    f"{W}comment",
+    f"{W}txbxContent",
+}
+
+# 移动范围标记（起始标记带作者和日期，结束标记通过w:id对应）
+MOVE_RANGE_ENDS = {
+    f"{W}moveFromRangeStart": f"{W}moveFromRangeEnd",
+    f"{W}moveToRangeStart": f"{W}moveToRangeEnd",
+}
+
+# 移除修订内容时保留的范围标记，避免留下不成对的书签和注释范围
+RANGE_MARKUP = {
+    f"{W}bookmarkStart",
+    f"{W}bookmarkEnd",
+    f"{W}commentRangeStart",
+    f"{W}commentRangeEnd",
+}
+
+
+def resolve_changes(
+    xml_path, accept, author=None, since=None, until=None, paragraphs=None
+):
+    """接受或拒绝XML部件中的修订记录，并写回文件。
+
+    参数:
+        xml_path: 部件文件路径（例如word/document.xml）
+        accept: True接受修订，False拒绝修订
+        author: 只处理该作者（或作者集合）的修订
+        since: 只处理此时间（含）之后的修订，datetime或ISO 8601字符串
+        until: 只处理此时间（含）之前的修订，datetime或ISO 8601字符串
+        paragraphs: 只处理这些段落中的修订（段落序号从0开始，包括表格中的段落），
+                    例如range(10, 20)
+
+    返回:
+        int: 处理的修订数量（未处理任何修订时不写文件）
+
+    异常:
+        ValueError: 如果since或until不是有效的日期，或匹配到不支持的修订
+    """
+    parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+    tree = lxml.etree.parse(str(xml_path), parser)
+    root = tree.getroot()
+
+    authors = {author} if isinstance(author, str) else author
+    since = _parse_date(since)
+    until = _parse_date(until)
+
+    def matches(elem, paragraph):
+        if authors is not None and elem.get(f"{W}author") not in authors:
+            return False
+        if since is not None or until is not None:
+            try:
+                date = _parse_date(elem.get(f"{W}date"))
+            except ValueError:
+                return False
+            if date is None:
+                return False
+            if since is not None and date < since:
+                return False
+            if until is not None and date > until:
+                return False
+        return paragraphs is None or paragraph in paragraphs
+
+    # 按文档顺序收集修订及其所在段落（与review_reader的段落序号一致）
+    changes = []
+    paragraph = -1
+    for elem in root.iter(
+        f"{W}p",
+        *REVISION_TYPES,
+        *FORMATTING_CHANGES,
+        *CELL_CHANGES,
+        NUMBERING_CHANGE,
+        *UNSUPPORTED_CHANGES,
+        *MOVE_RANGE_ENDS,
+    ):
+        if elem.tag == f"{W}p":
+            paragraph += 1
+            continue
+        parent = elem.getparent()
+        # 表格、行和单元格属性位于其中第一个段落之前
+        if parent is not None and parent.tag in TABLE_PROPERTIES:
+            index = paragraph + 1
+        else:
+            index = paragraph
+        if matches(elem, index):
+            changes.append(elem)
+
+    # 在修改文档之前检查，避免只处理了一部分修订
+    for elem in changes:
+        if elem.tag in UNSUPPORTED_CHANGES or (
+            elem.tag == NUMBERING_CHANGE and not accept
+        ):
+            name = lxml.etree.QName(elem).localname
+            raise ValueError(
+                f"不支持{'接受' if accept else '拒绝'}w:{name}修订"
+                f"（w:id={elem.get(f'{W}id')}）"
+            )
+
+    count = 0
+    removed_ranges = set()
+    for elem in changes:
+        # 所在子树已被先前的操作移除（例如被拒绝的插入中嵌套的删除）
+        if not _is_attached(elem, root):
+            continue
+
+        if elem.tag in MOVE_RANGE_ENDS:
+            removed_ranges.add((MOVE_RANGE_ENDS[elem.tag], elem.get(f"{W}id")))
+            _remove(elem)
+        elif elem.tag in FORMATTING_CHANGES:
+            _resolve_formatting(elem, accept)
+        elif elem.tag in CELL_CHANGES:
+            _resolve_cell(elem, accept)
+        elif elem.tag == NUMBERING_CHANGE:
+            _remove(elem)
+        else:
+            _resolve_revision(elem, accept)
+        count += 1
+
+    if removed_ranges:
+        for elem in list(root.iter(*MOVE_RANGE_ENDS.values())):
+            if (elem.tag, elem.get(f"{W}id")) in removed_ranges:
+                _remove(elem)
+
+    if count:
+        content = lxml.etree.tostring(
+            tree,
+            xml_declaration=True,
+            encoding=tree.docinfo.encoding or "UTF-8",
+            standalone=tree.docinfo.standalone,
+        )
+        _write_replacing(Path(xml_path), content)
+    return count
+
+
+def _resolve_revision(elem, accept):
+    """处理单个w:ins/w:del/w:moveFrom/w:moveTo。"""
+    inserted = REVISION_TYPES[elem.tag] in ("insertion", "move_to")
+    keep = inserted == accept
+    parent = elem.getparent()
+    target = MARKER_TARGETS.get(parent.tag)
+
+    if target == "paragraph_mark":
+        paragraph = parent.getparent().getparent()
+        if keep:
+            _remove(elem)
+            paragraph.attrib.pop(f"{W}rsidDel", None)
+        else:
+            # 段落标记被移除：段落内容并入下一个段落
+            _merge_with_next(paragraph, elem)
+    elif target == "table_row":
+        if keep:
+            _remove(elem)
+        else:
+            _remove_row(parent.getparent())
+    elif keep:
+        if not inserted:
+            _restore_deleted_content(elem)
+        _unwrap(elem)
+    else:
+        _drop(elem)
+
+
+def _resolve_formatting(elem, accept):
+    """处理格式修订（w:rPrChange、w:tcPrChange等）：接受时移除，拒绝时恢复原有属性。"""
+    properties = elem.getparent()
+    if not accept:
+        old_tag, leading, trailing = FORMATTING_CHANGES[elem.tag]
+        # 例如段落标记的w:rPr中，修订标记位于属性之前；w:trPr中则位于属性之后
+        for child in list(properties):
+            if child is not elem and child.tag not in leading | trailing:
+                _remove(child)
+
+        position = sum(1 for child in properties if child.tag in leading)
+        old = elem.find(old_tag)
+        if old is not None:
+            properties[position:position] = list(old)
+    _remove(elem)
+
+
+def _resolve_cell(elem, accept):
+    """处理w:cellIns/w:cellDel：保留单元格时移除标记，否则移除整个单元格。"""
+    if (elem.tag == f"{W}cellIns") == accept:
+        _remove(elem)
+        return
+    cell = elem.getparent().getparent()
+    row = next(cell.iterancestors(f"{W}tr"))
+    _remove(cell)
+    if row.find(f".//{W}tc") is None:
+        _remove_row(row)
+
+
+def _remove_row(row):
+    """移除表格行；表格不再有行时移除整个表格，并确保容器仍以段落结尾。"""
+    table = next(row.iterancestors(f"{W}tbl"))
+    _remove(row)
+    if table.find(f".//{W}tr") is not None:
+        return
+    container = table.getparent()
+    _remove(table)
+    if container.tag in BLOCK_CONTAINERS:
+        _ensure_final_paragraph(container)
+
+
+def _ensure_final_paragraph(container):
+    """单元格和正文等容器必须以段落结尾（w:body的w:sectPr之前），缺少时添加空段落。"""
+    blocks = [
+        child
+        for child in container
+        if isinstance(child.tag, str) and child.tag not in (f"{W}tcPr", f"{W}sectPr")
+    ]
+    if blocks and blocks[-1].tag == f"{W}p":
+        return
+    paragraph = lxml.etree.SubElement(container, f"{W}p")
+    section = container.find(f"{W}sectPr")
+    if section is not None:
+        section.addprevious(paragraph)
+
+
+def _restore_deleted_content(elem):
+    """将删除内容恢复为普通内容：w:delText → w:t，w:rsidDel → w:rsidR。"""
+    for child in elem.iter(f"{W}r", *DELETED_TEXT_TAGS):
+        if child.tag in DELETED_TEXT_TAGS:
+            child.tag = DELETED_TEXT_TAGS[child.tag]
+            continue
+        rsid = child.attrib.pop(f"{W}rsidDel", None)
+        if rsid is not None and child.get(f"{W}rsidR") is None:
+            child.set(f"{W}rsidR", rsid)
+
+
+def _merge_with_next(paragraph, marker):
+    """将段落内容移到下一个段落开头并删除该段落；没有后续段落时只移除标记。"""
+    following = paragraph.getnext()
+    while following is not None and not isinstance(following.tag, str):
+        following = following.getnext()
+    if following is None or following.tag != f"{W}p":
+        _remove(marker)
+        return
+
+    content = [child for child in paragraph if child.tag != f"{W}pPr"]
+    position = 1 if len(following) and following[0].tag == f"{W}pPr" else 0
+    following[position:position] = content
+    _remove(paragraph)
+
+
+def _unwrap(elem):
+    """用元素的子节点替换元素本身。"""
+    children = list(elem)
+    if not children:
+        _remove(elem)
+        return
+    children[-1].tail = elem.tail
+    parent = elem.getparent()
+    index = parent.index(elem)
+    parent[index : index + 1] = children
+
+
+def _drop(elem):
+    """移除修订及其内容，但保留其中的书签和注释范围标记。"""
+    for child in list(elem):
+        if child.tag not in RANGE_MARKUP:
+            elem.remove(child)
+    _unwrap(elem)
+
+
+def _remove(elem):
+    """移除元素，同时保留其尾部文本。"""
+    parent = elem.getparent()
+    if elem.tail:
+        previous = elem.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + elem.tail
+        else:
+            parent.text = (parent.text or "") + elem.tail
+    parent.remove(elem)
+
+
+def _is_attached(elem, root):
+    while elem is not None:
+        if elem is root:
+            return True
+        elem = elem.getparent()
+    return False
+
+
+def _parse_date(value):
+    """将datetime或ISO 8601字符串转换为带时区的datetime（无时区时视为UTC）。
+
+    异常:
+        ValueError: 如果字符串不是有效的ISO 8601日期
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
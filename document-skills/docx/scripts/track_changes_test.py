@@ -0,0 +1,456 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import lxml.etree
+
+from scripts.document import DocxXMLEditor
+from scripts.track_changes import resolve_changes
+
+NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# 修订属性的简写
+A = 'w:author="甲" w:date="2024-01-01T00:00:00Z"'
+B = 'w:author="乙" w:date="2024-06-01T00:00:00Z"'
+
+
+# 目前此测试不会在CI中自动运行；它仅用于文档说明和手动检查。
+class TestResolveChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "document.xml"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_body(self, body):
+        """用于写入只包含给定正文的document.xml的辅助方法"""
+        self.path.write_text(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<w:document xmlns:w="{NAMESPACE}"><w:body>{body}</w:body></w:document>',
+            encoding="utf-8",
+        )
+
+    def resolve(self, body, accept, **filters):
+        """写入正文、处理修订，并返回(处理数量, 处理后的正文)"""
+        self.write_body(body)
+        count = resolve_changes(self.path, accept, **filters)
+        return count, self.read_body()
+
+    def read_body(self):
+        root = lxml.etree.parse(str(self.path)).getroot()
+        return "".join(
+            lxml.etree.tostring(child, encoding="unicode")
+            .replace(f' xmlns:w="{NAMESPACE}"', "")
+            for child in root[0]
+        )
+
+    def assertResolved(self, body, accept, expected, count=None, **filters):
+        actual_count, actual = self.resolve(body, accept, **filters)
+        self.assertEqual(actual, expected)
+        if count is not None:
+            self.assertEqual(actual_count, count)
+
+    # 插入和删除
+
+    def test_insertion_and_deletion(self):
+        """测试接受和拒绝内容中的插入与删除"""
+        body = (
+            f'<w:p><w:ins w:id="1" {A}><w:r><w:t>新</w:t></w:r></w:ins>'
+            f'<w:del w:id="2" {A}><w:r w:rsidDel="00AB"><w:delText>旧</w:delText></w:r></w:del></w:p>'
+        )
+        self.assertResolved(body, True, "<w:p><w:r><w:t>新</w:t></w:r></w:p>", count=2)
+        self.assertResolved(
+            body, False, '<w:p><w:r w:rsidR="00AB"><w:t>旧</w:t></w:r></w:p>', count=2
+        )
+
+    def test_nested_deletion_in_insertion(self):
+        """测试插入中嵌套删除：拒绝插入时嵌套的删除随之移除"""
+        body = (
+            f'<w:p><w:ins w:id="1" {A}><w:r><w:t>甲</w:t></w:r>'
+            f'<w:del w:id="2" {B}><w:r><w:delText>乙</w:delText></w:r></w:del></w:ins></w:p>'
+        )
+        self.assertResolved(body, True, "<w:p><w:r><w:t>甲</w:t></w:r></w:p>", count=2)
+        self.assertResolved(body, False, "<w:p/>", count=1)
+        # 只拒绝内层的删除：删除的文本恢复到插入中
+        self.assertResolved(
+            body,
+            False,
+            f'<w:p><w:ins w:id="1" {A}><w:r><w:t>甲</w:t></w:r>'
+            "<w:r><w:t>乙</w:t></w:r></w:ins></w:p>",
+            count=1,
+            author="乙",
+        )
+
+    def test_dropped_content_keeps_range_markup(self):
+        """测试移除内容时保留书签和注释范围标记"""
+        body = (
+            f'<w:p><w:ins w:id="1" {A}><w:bookmarkStart w:id="0" w:name="b"/>'
+            '<w:r><w:t>文本</w:t></w:r><w:commentRangeEnd w:id="5"/></w:ins>'
+            f'<w:del w:id="2" {A}><w:commentRangeStart w:id="6"/>'
+            '<w:r><w:delText>旧</w:delText></w:r><w:bookmarkEnd w:id="0"/></w:del></w:p>'
+        )
+        self.assertResolved(
+            body,
+            False,
+            '<w:p><w:bookmarkStart w:id="0" w:name="b"/><w:commentRangeEnd w:id="5"/>'
+            '<w:commentRangeStart w:id="6"/><w:r><w:t>旧</w:t></w:r>'
+            '<w:bookmarkEnd w:id="0"/></w:p>',
+        )
+        self.assertResolved(
+            body,
+            True,
+            '<w:p><w:bookmarkStart w:id="0" w:name="b"/><w:r><w:t>文本</w:t></w:r>'
+            '<w:commentRangeEnd w:id="5"/><w:commentRangeStart w:id="6"/>'
+            '<w:bookmarkEnd w:id="0"/></w:p>',
+        )
+
+    # 段落标记
+
+    def test_paragraph_mark_insertion(self):
+        """测试拒绝插入的段落标记时段落并入下一个段落"""
+        body = (
+            f'<w:p><w:pPr><w:rPr><w:ins w:id="1" {A}/></w:rPr></w:pPr>'
+            "<w:r><w:t>一</w:t></w:r></w:p>"
+            '<w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:t>二</w:t></w:r></w:p>'
+        )
+        self.assertResolved(
+            body,
+            True,
+            "<w:p><w:pPr><w:rPr/></w:pPr><w:r><w:t>一</w:t></w:r></w:p>"
+            '<w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:t>二</w:t></w:r></w:p>',
+        )
+        self.assertResolved(
+            body,
+            False,
+            '<w:p><w:pPr><w:jc w:val="center"/></w:pPr>'
+            "<w:r><w:t>一</w:t></w:r><w:r><w:t>二</w:t></w:r></w:p>",
+        )
+
+    def test_paragraph_mark_deletion(self):
+        """测试接受删除的段落标记时合并段落，拒绝时保留段落"""
+        body = (
+            f'<w:p w:rsidDel="00AB"><w:pPr><w:rPr><w:del w:id="1" {A}/></w:rPr></w:pPr>'
+            "<w:r><w:t>一</w:t></w:r></w:p><w:p><w:r><w:t>二</w:t></w:r></w:p>"
+        )
+        self.assertResolved(
+            body, True, "<w:p><w:r><w:t>一</w:t></w:r><w:r><w:t>二</w:t></w:r></w:p>"
+        )
+        self.assertResolved(
+            body,
+            False,
+            "<w:p><w:pPr><w:rPr/></w:pPr><w:r><w:t>一</w:t></w:r></w:p>"
+            "<w:p><w:r><w:t>二</w:t></w:r></w:p>",
+        )
+
+    # 表格
+
+    def row(self, text, row_properties=""):
+        return f"<w:tr>{row_properties}<w:tc><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:tc></w:tr>"
+
+    def test_table_row(self):
+        """测试接受和拒绝表格行的插入"""
+        inserted = self.row("二", f'<w:trPr><w:ins w:id="1" {A}/></w:trPr>')
+        body = f"<w:tbl>{self.row('一')}{inserted}</w:tbl><w:p/>"
+        self.assertResolved(
+            body,
+            True,
+            f"<w:tbl>{self.row('一')}{self.row('二', '<w:trPr/>')}</w:tbl><w:p/>",
+        )
+        self.assertResolved(body, False, f"<w:tbl>{self.row('一')}</w:tbl><w:p/>")
+
+    def test_last_table_row_removes_table(self):
+        """测试移除最后一行时移除整个表格，并保证正文以段落结尾"""
+        deleted = self.row("一", f'<w:trPr><w:del w:id="1" {A}/></w:trPr>')
+        kept = f"<w:tbl>{self.row('一')}</w:tbl>"
+        body = f"{kept}<w:tbl><w:tblPr/>{deleted}</w:tbl><w:sectPr/>"
+        self.assertResolved(body, True, f"{kept}<w:p/><w:sectPr/>")
+        self.assertResolved(
+            body,
+            False,
+            f"{kept}<w:tbl><w:tblPr/>{self.row('一', '<w:trPr/>')}</w:tbl><w:sectPr/>",
+        )
+
+    def test_last_table_row_in_cell(self):
+        """测试单元格中的嵌套表格被移除后单元格仍包含段落"""
+        inserted = self.row("内", f'<w:trPr><w:ins w:id="1" {A}/></w:trPr>')
+        body = f"<w:tbl><w:tr><w:tc><w:tcPr/><w:tbl>{inserted}</w:tbl></w:tc></w:tr></w:tbl><w:p/>"
+        self.assertResolved(
+            body, False, "<w:tbl><w:tr><w:tc><w:tcPr/><w:p/></w:tc></w:tr></w:tbl><w:p/>"
+        )
+
+    def test_cell_insertion_and_deletion(self):
+        """测试单元格的插入和删除"""
+        cell = '<w:tc><w:tcPr><w:tcW w:w="100" w:type="dxa"/>{}</w:tcPr><w:p/></w:tc>'
+        body = (
+            "<w:tbl><w:tr>"
+            + cell.format("")
+            + cell.format(f'<w:cellIns w:id="1" {A}/>')
+            + cell.format(f'<w:cellDel w:id="2" {A}/>')
+            + "</w:tr></w:tbl><w:p/>"
+        )
+        self.assertResolved(
+            body, True, "<w:tbl><w:tr>" + cell.format("") * 2 + "</w:tr></w:tbl><w:p/>", count=2
+        )
+        self.assertResolved(
+            body, False, "<w:tbl><w:tr>" + cell.format("") * 2 + "</w:tr></w:tbl><w:p/>", count=2
+        )
+
+    def test_rejecting_only_cell_removes_table(self):
+        """测试移除行中唯一的单元格时移除行和表格"""
+        body = (
+            f'<w:tbl><w:tr><w:tc><w:tcPr><w:cellIns w:id="1" {A}/></w:tcPr><w:p/></w:tc></w:tr></w:tbl>'
+            "<w:sectPr/>"
+        )
+        self.assertResolved(body, False, "<w:p/><w:sectPr/>")
+
+    # 移动
+
+    def test_move(self):
+        """测试接受和拒绝移动（包括移动范围标记）"""
+        body = (
+            f'<w:p><w:moveFromRangeStart w:id="1" w:name="m" {A}/>'
+            f'<w:moveFrom w:id="2" {A}><w:r><w:delText>移动</w:delText></w:r></w:moveFrom>'
+            '<w:moveFromRangeEnd w:id="1"/></w:p>'
+            f'<w:p><w:moveToRangeStart w:id="3" w:name="m" {A}/>'
+            f'<w:moveTo w:id="4" {A}><w:r><w:t>移动</w:t></w:r></w:moveTo>'
+            '<w:moveToRangeEnd w:id="3"/></w:p>'
+        )
+        self.assertResolved(
+            body, True, "<w:p/><w:p><w:r><w:t>移动</w:t></w:r></w:p>", count=4
+        )
+        self.assertResolved(
+            body, False, "<w:p><w:r><w:t>移动</w:t></w:r></w:p><w:p/>", count=4
+        )
+
+    # 属性修订
+
+    def test_run_properties_change(self):
+        """测试w:rPrChange：接受时移除，拒绝时恢复原有属性"""
+        body = (
+            f'<w:p><w:r><w:rPr><w:b/><w:rPrChange w:id="1" {A}><w:rPr><w:i/></w:rPr>'
+            "</w:rPrChange></w:rPr><w:t>文本</w:t></w:r></w:p>"
+        )
+        self.assertResolved(
+            body, True, "<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>文本</w:t></w:r></w:p>"
+        )
+        self.assertResolved(
+            body, False, "<w:p><w:r><w:rPr><w:i/></w:rPr><w:t>文本</w:t></w:r></w:p>"
+        )
+
+    def test_paragraph_mark_properties_change(self):
+        """测试段落标记w:rPr中的w:rPrChange：拒绝时保留修订标记"""
+        body = (
+            f'<w:p><w:pPr><w:rPr><w:ins w:id="1" {A}/><w:b/><w:rPrChange w:id="2" {B}>'
+            "<w:rPr><w:i/></w:rPr></w:rPrChange></w:rPr></w:pPr></w:p><w:p/>"
+        )
+        self.assertResolved(
+            body,
+            False,
+            f'<w:p><w:pPr><w:rPr><w:ins w:id="1" {A}/><w:i/></w:rPr></w:pPr></w:p><w:p/>',
+            author="乙",
+        )
+
+    def test_paragraph_properties_change(self):
+        """测试w:pPrChange：拒绝时保留w:rPr和w:sectPr"""
+        body = (
+            '<w:p><w:pPr><w:jc w:val="center"/>'
+            f'<w:rPr><w:b/></w:rPr><w:sectPr/><w:pPrChange w:id="1" {A}>'
+            '<w:pPr><w:ind w:left="720"/></w:pPr></w:pPrChange></w:pPr></w:p>'
+        )
+        self.assertResolved(
+            body,
+            True,
+            '<w:p><w:pPr><w:jc w:val="center"/><w:rPr><w:b/></w:rPr><w:sectPr/></w:pPr></w:p>',
+        )
+        self.assertResolved(
+            body,
+            False,
+            '<w:p><w:pPr><w:ind w:left="720"/><w:rPr><w:b/></w:rPr><w:sectPr/></w:pPr></w:p>',
+        )
+
+    def test_table_properties_changes(self):
+        """测试表格、表格网格、行和单元格的属性修订"""
+        body = (
+            '<w:tbl><w:tblPr><w:jc w:val="center"/>'
+            f'<w:tblPrChange w:id="1" {A}><w:tblPr><w:jc w:val="left"/></w:tblPr></w:tblPrChange>'
+            '</w:tblPr><w:tblGrid><w:gridCol w:w="200"/>'
+            '<w:tblGridChange w:id="2"><w:tblGrid><w:gridCol w:w="100"/></w:tblGrid></w:tblGridChange>'
+            f'</w:tblGrid><w:tr><w:trPr><w:cantSplit/><w:ins w:id="3" {A}/>'
+            f'<w:trPrChange w:id="4" {A}><w:trPr><w:tblHeader/></w:trPr></w:trPrChange></w:trPr>'
+            f'<w:tc><w:tcPr><w:tcW w:w="200" w:type="dxa"/><w:cellIns w:id="5" {A}/>'
+            f'<w:tcPrChange w:id="6" {A}><w:tcPr><w:tcW w:w="100" w:type="dxa"/></w:tcPr>'
+            "</w:tcPrChange></w:tcPr><w:p/></w:tc></w:tr></w:tbl><w:p/>"
+        )
+        self.assertResolved(
+            body,
+            True,
+            '<w:tbl><w:tblPr><w:jc w:val="center"/></w:tblPr>'
+            '<w:tblGrid><w:gridCol w:w="200"/></w:tblGrid>'
+            "<w:tr><w:trPr><w:cantSplit/></w:trPr>"
+            '<w:tc><w:tcPr><w:tcW w:w="200" w:type="dxa"/></w:tcPr><w:p/></w:tc></w:tr></w:tbl><w:p/>',
+            count=6,
+        )
+        # 只拒绝属性修订（tblGridChange没有作者），行和单元格的插入标记保留在属性之后
+        self.assertResolved(
+            body.replace(f'<w:ins w:id="3" {A}/>', f'<w:ins w:id="3" {B}/>').replace(
+                f'<w:cellIns w:id="5" {A}/>', f'<w:cellIns w:id="5" {B}/>'
+            ),
+            False,
+            '<w:tbl><w:tblPr><w:jc w:val="left"/></w:tblPr>'
+            '<w:tblGrid><w:gridCol w:w="200"/><w:tblGridChange w:id="2"><w:tblGrid>'
+            '<w:gridCol w:w="100"/></w:tblGrid></w:tblGridChange></w:tblGrid>'
+            f'<w:tr><w:trPr><w:tblHeader/><w:ins w:id="3" {B}/></w:trPr>'
+            f'<w:tc><w:tcPr><w:tcW w:w="100" w:type="dxa"/><w:cellIns w:id="5" {B}/></w:tcPr>'
+            "<w:p/></w:tc></w:tr></w:tbl><w:p/>",
+            count=3,
+            author="甲",
+        )
+
+    def test_table_grid_change(self):
+        """测试w:tblGridChange：拒绝时恢复原有网格"""
+        body = (
+            '<w:tbl><w:tblGrid><w:gridCol w:w="200"/><w:tblGridChange w:id="1">'
+            '<w:tblGrid><w:gridCol w:w="100"/></w:tblGrid></w:tblGridChange></w:tblGrid>'
+            f"{self.row('一')}</w:tbl><w:p/>"
+        )
+        self.assertResolved(
+            body,
+            False,
+            f'<w:tbl><w:tblGrid><w:gridCol w:w="100"/></w:tblGrid>{self.row("一")}</w:tbl><w:p/>',
+        )
+
+    def test_section_properties_change(self):
+        """测试w:sectPrChange：拒绝时保留页眉页脚引用"""
+        body = (
+            '<w:p/><w:sectPr><w:headerReference w:type="default" w:id="rId1"/>'
+            '<w:pgSz w:w="11906" w:h="16838"/>'
+            f'<w:sectPrChange w:id="1" {A}><w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+            "</w:sectPr></w:sectPrChange></w:sectPr>"
+        )
+        self.assertResolved(
+            body,
+            True,
+            '<w:p/><w:sectPr><w:headerReference w:type="default" w:id="rId1"/>'
+            '<w:pgSz w:w="11906" w:h="16838"/></w:sectPr>',
+        )
+        self.assertResolved(
+            body,
+            False,
+            '<w:p/><w:sectPr><w:headerReference w:type="default" w:id="rId1"/>'
+            '<w:pgSz w:w="12240" w:h="15840"/></w:sectPr>',
+        )
+
+    # 不支持的修订
+
+    def test_numbering_change(self):
+        """测试w:numberingChange只能接受，拒绝时抛出异常且不修改文件"""
+        body = (
+            '<w:p><w:pPr><w:numPr><w:ilvl w:val="0"/><w:numId w:val="1"/>'
+            f'<w:numberingChange w:id="1" {A} w:original="%1."/></w:numPr></w:pPr></w:p>'
+        )
+        self.assertResolved(
+            body,
+            True,
+            '<w:p><w:pPr><w:numPr><w:ilvl w:val="0"/><w:numId w:val="1"/></w:numPr></w:pPr></w:p>',
+        )
+
+        self.write_body(f'<w:p><w:ins w:id="2" {A}/></w:p>' + body)
+        before = self.path.read_bytes()
+        with self.assertRaises(ValueError):
+            resolve_changes(self.path, False)
+        self.assertEqual(self.path.read_bytes(), before)
+        # 不匹配过滤条件时不影响其他修订
+        self.assertEqual(resolve_changes(self.path, False, paragraphs=[0]), 1)
+
+    def test_cell_merge_raises(self):
+        """测试匹配到w:cellMerge时抛出异常"""
+        body = (
+            f'<w:tbl><w:tr><w:tc><w:tcPr><w:cellMerge w:id="1" {A} w:vMerge="cont"/>'
+            "</w:tcPr><w:p/></w:tc></w:tr></w:tbl><w:p/>"
+        )
+        self.write_body(body)
+        for accept in (True, False):
+            with self.assertRaises(ValueError):
+                resolve_changes(self.path, accept)
+
+    # 过滤条件
+
+    def filtered_body(self):
+        return (
+            f'<w:p><w:ins w:id="1" {A}><w:r><w:t>一</w:t></w:r></w:ins></w:p>'
+            f'<w:p><w:ins w:id="2" {B}><w:r><w:t>二</w:t></w:r></w:ins></w:p>'
+            f'<w:tbl><w:tr><w:trPr><w:ins w:id="3" {B}/></w:trPr>'
+            "<w:tc><w:p><w:r><w:t>三</w:t></w:r></w:p></w:tc></w:tr></w:tbl><w:p/>"
+        )
+
+    def test_author_filter(self):
+        """测试只处理指定作者的修订"""
+        count, body = self.resolve(self.filtered_body(), False, author="甲")
+        self.assertEqual(count, 1)
+        self.assertTrue(body.startswith("<w:p/><w:p><w:ins"))
+
+        count, _ = self.resolve(self.filtered_body(), False, author={"甲", "乙"})
+        self.assertEqual(count, 3)
+
+    def test_date_filter(self):
+        """测试按日期范围（含边界）过滤，并接受datetime和无时区的字符串"""
+        count, body = self.resolve(self.filtered_body(), False, since="2024-06-01")
+        self.assertEqual(count, 2)
+        self.assertEqual(body, f'<w:p><w:ins w:id="1" {A}><w:r><w:t>一</w:t></w:r></w:ins></w:p><w:p/><w:p/>')
+
+        count, _ = self.resolve(self.filtered_body(), False, until="2024-01-01T00:00:00Z")
+        self.assertEqual(count, 1)
+
+        with self.assertRaises(ValueError):
+            self.resolve(self.filtered_body(), False, since="不是日期")
+
+    def test_paragraph_filter(self):
+        """测试按段落序号过滤；表格行属性属于行内第一个段落"""
+        count, body = self.resolve(self.filtered_body(), True, paragraphs=[2])
+        self.assertEqual(count, 1)
+        self.assertIn("<w:trPr/>", body)
+        self.assertIn(f'<w:ins w:id="2" {B}>', body)
+
+        count, body = self.resolve(self.filtered_body(), True, paragraphs=range(0, 2))
+        self.assertEqual(count, 2)
+        self.assertIn(f'<w:ins w:id="3" {B}/>', body)
+
+    def test_no_changes_leaves_file_untouched(self):
+        """测试没有匹配的修订时不写文件"""
+        self.write_body("<w:p/>")
+        before = self.path.stat().st_mtime_ns
+        self.assertEqual(resolve_changes(self.path, True, author="甲"), 0)
+        self.assertEqual(self.path.stat().st_mtime_ns, before)
+
+
+class TestDocxXMLEditorResolveChanges(unittest.TestCase):
+
+    def test_accept_and_reject_reload_editor(self):
+        """测试编辑器先保存未写入的修改，处理修订后重新加载"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "document.xml"
+            path.write_text(
+                f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{NAMESPACE}">'
+                f'<w:body><w:p><w:ins w:id="1" {A}><w:r><w:t>一</w:t></w:r></w:ins>'
+                f'<w:del w:id="2" {B}><w:r><w:delText>二</w:delText></w:r></w:del></w:p>'
+                "</w:body></w:document>",
+                encoding="utf-8",
+            )
+            editor = DocxXMLEditor(path, rsid="00AB")
+            run = editor.get_node(tag="w:r", contains="一")
+            run.setAttribute("w:rsidR", "00CD")
+
+            self.assertEqual(editor.reject_changes(author="乙"), 1)
+            self.assertEqual(len(editor.dom.getElementsByTagName("w:del")), 0)
+            self.assertEqual(editor.accept_changes(), 1)
+            self.assertEqual(len(editor.dom.getElementsByTagName("w:ins")), 0)
+
+            text = path.read_text(encoding="utf-8")
+            self.assertIn('w:rsidR="00CD"', text)
+            self.assertIn("<w:t>二</w:t>", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
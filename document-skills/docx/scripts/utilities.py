@@ -27,14 +27,36 @@
 
     # 保存更改
     editor.save()
+
+批量编辑时使用事务，命名空间声明等只计算一次：
+
+    with editor.batch():
+        for node in nodes:
+            editor.insert_after(node, "<w:r><w:t>more</w:t></w:r>")
+
+节点查找使用延迟构建的索引（标签 → 元素、(标签, 属性, 值) → 元素、行号 → 元素），
+并在replace_node/insert_*/append_to时增量更新，因此大量查找的脚本编辑不会反复扫描整个文档。
+直接修改DOM后请调用reindex()。
+
+LxmlXMLEditor提供相同的API，但使用lxml作为后端，在大文档上速度更快、内存占用更少：
+
+    editor = LxmlXMLEditor("document.xml")
+    elem = editor.get_node(tag="w:p", contains="specific text")  # 返回lxml元素
 """
 
+import hashlib
 import html
+import os
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Union
 
 import defusedxml.minidom
 import defusedxml.sax
+import lxml.etree
+
+# 预定义的xml前缀（无需在根元素上声明）
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
 
 
 class XMLEditor:
@@ -68,6 +90,14 @@ class XMLEditor:
             header = f.read(200).decode("utf-8", errors="ignore")
         self.encoding = "ascii" if 'encoding="ascii"' in header else "utf-8"
 
+        self._parse()
+        self._index = _NodeIndex(self)
+        self._batch_depth = 0
+        self._ns_decl = None
+        # 上次保存内容的哈希，用于跳过未变化的写入
+        self._saved_digest = None
+
+    def _parse(self):
         parser = _create_line_tracking_parser()
         self.dom = defusedxml.minidom.parse(str(self.xml_path), parser)
 
@@ -106,12 +136,25 @@ class XMLEditor:
             elem = editor.get_node(tag="w:t", contains="&#8220;协议")  # 实体表示法
             elem = editor.get_node(tag="w:t", contains="\u201c协议")   # Unicode字符
         """
+        # 规范化搜索字符串：将HTML实体转换为Unicode字符
+        # 这允许同时搜索"&#8220;Rowan"和"Rowan"
+        normalized_contains = html.unescape(contains) if contains is not None else None
+        tag_key = self._resolve_name(tag)
+        attr_keys = (
+            {self._resolve_name(name): value for name, value in attrs.items()}
+            if attrs is not None
+            else None
+        )
+
         matches = []
-        for elem in self.dom.getElementsByTagName(tag):
+        for elem in self._index.candidates(tag_key, attr_keys, line_number):
+            # 索引可能包含已被移除或已修改的元素，逐一重新校验
+            if not self._is_attached(elem) or self._element_tag(elem) != tag_key:
+                continue
+
             # 检查行号过滤器
             if line_number is not None:
-                parse_pos = getattr(elem, "parse_position", (None,))
-                elem_line = parse_pos[0]
+                elem_line = self._element_line(elem)
 
                 # 处理单行号和行范围
                 if isinstance(line_number, range):
@@ -122,20 +165,16 @@ class XMLEditor:
                         continue
 
             # 检查属性过滤器
-            if attrs is not None:
+            if attr_keys is not None:
                 if not all(
-                    elem.getAttribute(attr_name) == attr_value
-                    for attr_name, attr_value in attrs.items()
+                    self._element_attr(elem, attr_name) == attr_value
+                    for attr_name, attr_value in attr_keys.items()
                 ):
                     continue
 
             # 检查文本内容过滤器
-            if contains is not None:
-                elem_text = self._get_element_text(elem)
-                # 规范化搜索字符串：将HTML实体转换为Unicode字符
-                # 这允许同时搜索"&#8220;Rowan"和"Rowan"
-                normalized_contains = html.unescape(contains)
-                if normalized_contains not in elem_text:
+            if normalized_contains is not None:
+                if normalized_contains not in self._get_element_text(elem):
                     continue
 
             # 如果所有适用的过滤器都通过，则匹配成功
@@ -200,6 +239,119 @@ class XMLEditor:
                 text_parts.append(self._get_element_text(node))
         return "".join(text_parts)
 
+    @contextmanager
+    def batch(self):
+        """
+        在一个事务中执行多次编辑。
+
+        事务内根元素的命名空间声明只计算一次并缓存，供每次片段解析复用。
+        子类可以扩展_begin_batch/_end_batch来缓存更多状态。事务可以嵌套，
+        只有最外层的事务生效。
+
+        示例：
+            with editor.batch():
+                for node in nodes:
+                    editor.insert_after(node, "<w:r><w:t>文本</w:t></w:r>")
+        """
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self._begin_batch()
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._end_batch()
+
+    def _begin_batch(self):
+        self._ns_decl = None
+
+    def _end_batch(self):
+        self._ns_decl = None
+
+    def _namespace_declarations(self):
+        """返回根元素的命名空间声明字符串（事务中缓存）。"""
+        if self._ns_decl is not None:
+            return self._ns_decl
+
+        root_elem = self.dom.documentElement
+        namespaces = []
+        if root_elem and root_elem.attributes:
+            for i in range(root_elem.attributes.length):
+                attr = root_elem.attributes.item(i)
+                if attr.name.startswith("xmlns"):  # type: ignore
+                    namespaces.append(f'{attr.name}="{attr.value}"')  # type: ignore
+
+        ns_decl = " ".join(namespaces)
+        if self._batch_depth:
+            self._ns_decl = ns_decl
+        return ns_decl
+
+    def reindex(self, nodes=None):
+        """
+        更新节点索引。
+
+        通过replace_node/insert_*/append_to所做的修改会自动更新索引；
+        直接操作DOM（例如setAttribute或appendChild）后需调用此方法。
+
+        参数：
+            nodes: 已修改的节点列表（会重新索引其整个子树）。
+                   为None时丢弃全部索引，在下次查找时重新构建。
+        """
+        if nodes is None:
+            self._index = _NodeIndex(self)
+        else:
+            self._index.add(nodes)
+
+    def reload(self):
+        """
+        从文件重新解析XML，丢弃内存中未保存的修改。
+
+        用于在文件被其他工具整体改写之后同步编辑器。之前获取的节点不再属于文档，
+        行号也对应新的文件内容。
+        """
+        self._parse()
+        self._index = _NodeIndex(self)
+        self._ns_decl = None
+        self._saved_digest = None
+
+    def _resolve_name(self, name):
+        """将查询中的标签或属性名转换为元素上使用的形式。"""
+        return name
+
+    def _iter_elements(self, node):
+        """按文档顺序返回节点本身及其所有后代元素。"""
+        if node.nodeType != node.ELEMENT_NODE:
+            return
+        stack = [node]
+        while stack:
+            elem = stack.pop()
+            yield elem
+            stack.extend(
+                child
+                for child in reversed(elem.childNodes)
+                if child.nodeType == child.ELEMENT_NODE
+            )
+
+    def _root_element(self):
+        return self.dom.documentElement
+
+    def _element_tag(self, elem):
+        return elem.tagName
+
+    def _element_attr(self, elem, name):
+        return elem.getAttribute(name)
+
+    def _element_line(self, elem):
+        return getattr(elem, "parse_position", (None,))[0]
+
+    def _is_attached(self, elem):
+        """检查元素是否仍在文档树中。"""
+        node = elem
+        while node.parentNode is not None:
+            node = node.parentNode
+        return node is self.dom
+
     def replace_node(self, elem, new_content):
         """
         用新的XML内容替换DOM元素。
@@ -219,6 +371,8 @@ class XMLEditor:
         for node in nodes:
             parent.insertBefore(node, elem)
         parent.removeChild(elem)
+        self._index.discard([elem])
+        self._index.add(nodes)
         return nodes
 
     def insert_after(self, elem, xml_content):
@@ -243,6 +397,7 @@ class XMLEditor:
                 parent.insertBefore(node, next_sibling)
             else:
                 parent.appendChild(node)
+        self._index.add(nodes)
         return nodes
 
     def insert_before(self, elem, xml_content):
@@ -263,6 +418,7 @@ class XMLEditor:
         nodes = self._parse_fragment(xml_content)
         for node in nodes:
             parent.insertBefore(node, elem)
+        self._index.add(nodes)
         return nodes
 
     def append_to(self, elem, xml_content):
@@ -282,13 +438,17 @@ class XMLEditor:
         nodes = self._parse_fragment(xml_content)
         for node in nodes:
             elem.appendChild(node)
+        self._index.add(nodes)
         return nodes
 
     def get_next_rid(self):
         """获取关系文件的下一个可用rId。"""
         max_id = 0
-        for rel_elem in self.dom.getElementsByTagName("Relationship"):
-            rel_id = rel_elem.getAttribute("Id")
+        tag_key = self._resolve_name("Relationship")
+        for rel_elem in self._index.by_tag(tag_key):
+            if not self._is_attached(rel_elem):
+                continue
+            rel_id = self._element_attr(rel_elem, "Id")
             if rel_id.startswith("rId"):
                 try:
                     max_id = max(max_id, int(rel_id[3:]))
@@ -301,10 +461,18 @@ class XMLEditor:
         将编辑后的XML保存回文件。
 
         序列化DOM树并将其写回原始文件路径，
-        保留原始编码（ascii或utf-8）。
+        保留原始编码（ascii或utf-8）。文件以替换方式写入，
+        不会修改与之共享（硬链接）的其他文件；内容自上次保存以来未变化时不重写。
         """
         content = self.dom.toxml(encoding=self.encoding)
-        self.xml_path.write_bytes(content)
+        self._write(content)
+
+    def _write(self, content):
+        digest = hashlib.sha256(content).digest()
+        if digest == self._saved_digest and self.xml_path.exists():
+            return
+        _write_replacing(self.xml_path, content)
+        self._saved_digest = digest
 
     def _parse_fragment(self, xml_content):
         """
@@ -320,15 +488,7 @@ class XMLEditor:
             AssertionError: 如果片段不包含任何元素节点
         """
         # 从根文档元素提取命名空间声明
-        root_elem = self.dom.documentElement
-        namespaces = []
-        if root_elem and root_elem.attributes:
-            for i in range(root_elem.attributes.length):
-                attr = root_elem.attributes.item(i)
-                if attr.name.startswith("xmlns"):  # type: ignore
-                    namespaces.append(f'{attr.name}="{attr.value}"')  # type: ignore
-
-        ns_decl = " ".join(namespaces)
+        ns_decl = self._namespace_declarations()
         wrapper = f"<root {ns_decl}>{xml_content}</root>"
         fragment_doc = defusedxml.minidom.parseString(wrapper)
         nodes = [
@@ -340,6 +500,317 @@ class XMLEditor:
         return nodes
 
 
+class LxmlXMLEditor(XMLEditor):
+    """
+    使用lxml作为后端的XMLEditor。
+
+    API与XMLEditor相同（标签和属性仍使用"w:r"、"w:id"这样的前缀名称），
+    但返回lxml元素。行号来自lxml的sourceline，适合在大文档上进行大量查找和编辑。
+
+    属性：
+        xml_path: 正在编辑的XML文件路径
+        encoding: 检测到的XML文件编码（'ascii'或'utf-8'）
+        dom: 解析后的lxml.etree._ElementTree
+    """
+
+    def _parse(self):
+        parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+        self.dom = lxml.etree.parse(str(self.xml_path), parser)
+        self._root = self.dom.getroot()
+
+    def _resolve_name(self, name):
+        """将前缀名称（如"w:r"）转换为lxml使用的Clark表示法（如"{ns}r"）。"""
+        prefix, sep, local = name.rpartition(":")
+        if not sep:
+            # 无前缀的标签属于默认命名空间（如.rels中的Relationship），属性则不属于任何命名空间
+            return name
+        if prefix == "xml":
+            return f"{{{XML_NAMESPACE}}}{local}"
+        namespace = self._root.nsmap.get(prefix)
+        if namespace is None:
+            return name
+        return f"{{{namespace}}}{local}"
+
+    def _iter_elements(self, node):
+        if not isinstance(node.tag, str):
+            return
+        yield from node.iter(lxml.etree.Element)
+
+    def _root_element(self):
+        return self._root
+
+    def _element_tag(self, elem):
+        # 默认命名空间中的元素按本地名称匹配，与minidom的tagName一致
+        qname = lxml.etree.QName(elem)
+        if qname.namespace is not None and qname.namespace == self._root.nsmap.get(None):
+            return qname.localname
+        return elem.tag
+
+    def _element_attr(self, elem, name):
+        return elem.get(name, "")
+
+    def _element_line(self, elem):
+        return elem.sourceline
+
+    def _is_attached(self, elem):
+        return elem.getroottree().getroot() is self._root
+
+    def _get_element_text(self, elem):
+        """
+        递归提取元素中的所有文本内容，跳过仅包含空白字符的文本。
+
+        参数：
+            elem: 要提取文本的lxml元素
+
+        返回：
+            str: 元素内所有非空白文本的连接文本
+        """
+        return "".join(
+            text
+            for text in elem.xpath("descendant::text()")
+            if text.strip()
+        )
+
+    def replace_node(self, elem, new_content):
+        """
+        用新的XML内容替换元素。
+
+        参数：
+            elem: 要替换的lxml元素
+            new_content: 包含用于替换节点的XML的字符串
+
+        返回：
+            List[lxml.etree._Element]: 所有插入的元素
+        """
+        nodes = self._parse_fragment(new_content)
+        for node in nodes:
+            elem.addprevious(node)
+        self._remove(elem)
+        self._index.discard([elem])
+        self._index.add(nodes)
+        return nodes
+
+    def insert_after(self, elem, xml_content):
+        """
+        在元素后插入XML内容。
+
+        参数：
+            elem: 要在其后插入的lxml元素
+            xml_content: 包含要插入的XML的字符串
+
+        返回：
+            List[lxml.etree._Element]: 所有插入的元素
+        """
+        nodes = self._parse_fragment(xml_content)
+        anchor = elem
+        for node in nodes:
+            # 新元素紧跟在锚点之后，锚点原有的尾部文本移到最后一个新元素之后
+            node.tail, anchor.tail = anchor.tail, node.tail
+            anchor.addnext(node)
+            anchor = node
+        self._index.add(nodes)
+        return nodes
+
+    def insert_before(self, elem, xml_content):
+        """
+        在元素前插入XML内容。
+
+        参数：
+            elem: 要在其前插入的lxml元素
+            xml_content: 包含要插入的XML的字符串
+
+        返回：
+            List[lxml.etree._Element]: 所有插入的元素
+        """
+        nodes = self._parse_fragment(xml_content)
+        for node in nodes:
+            elem.addprevious(node)
+        self._index.add(nodes)
+        return nodes
+
+    def append_to(self, elem, xml_content):
+        """
+        将XML内容作为元素的子节点追加。
+
+        参数：
+            elem: 要追加到的lxml元素
+            xml_content: 包含要追加的XML的字符串
+
+        返回：
+            List[lxml.etree._Element]: 所有插入的元素
+        """
+        nodes = self._parse_fragment(xml_content)
+        for node in nodes:
+            elem.append(node)
+        self._index.add(nodes)
+        return nodes
+
+    def save(self):
+        """
+        将编辑后的XML保存回文件，保留原始编码和standalone声明。
+        """
+        content = lxml.etree.tostring(
+            self.dom,
+            xml_declaration=True,
+            encoding=self.encoding,
+            standalone=self.dom.docinfo.standalone,
+        )
+        self._write(content)
+
+    def _parse_fragment(self, xml_content):
+        """
+        在根元素的命名空间上下文中解析XML片段。
+
+        参数：
+            xml_content: 包含XML片段的字符串
+
+        返回：
+            lxml元素列表（各元素的尾部文本保持不变）
+
+        异常：
+            AssertionError: 如果片段不包含任何元素节点
+        """
+        ns_decl = self._namespace_declarations()
+        wrapper = f"<root {ns_decl}>{xml_content}</root>"
+        parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+        fragment = lxml.etree.fromstring(wrapper.encode("utf-8"), parser)
+        nodes = list(fragment)
+        assert any(isinstance(n.tag, str) for n in nodes), "片段必须包含至少一个元素"
+        return nodes
+
+    def _namespace_declarations(self):
+        if self._ns_decl is not None:
+            return self._ns_decl
+
+        namespaces = []
+        for prefix, uri in self._root.nsmap.items():
+            name = f"xmlns:{prefix}" if prefix else "xmlns"
+            namespaces.append(f'{name}="{html.escape(uri)}"')
+
+        ns_decl = " ".join(namespaces)
+        if self._batch_depth:
+            self._ns_decl = ns_decl
+        return ns_decl
+
+    def _remove(self, elem):
+        """移除元素，同时保留其尾部文本。"""
+        parent = elem.getparent()
+        if elem.tail:
+            previous = elem.getprevious()
+            if previous is not None:
+                previous.tail = (previous.tail or "") + elem.tail
+            else:
+                parent.text = (parent.text or "") + elem.tail
+        parent.remove(elem)
+
+
+class _NodeIndex:
+    """
+    XMLEditor使用的延迟构建的节点索引。
+
+    - 标签 → 元素：第一次查找时遍历一次文档构建
+    - (标签, 属性, 值) → 元素：第一次按该属性查找时从标签索引构建
+    - 行号 → 元素：第一次按行号查找时构建
+
+    插入的节点通过add()增量加入；被替换的节点通过discard()移除。
+    索引只用于缩小候选范围，查找时仍会逐一校验候选元素，
+    因此残留的旧条目不会产生错误匹配。
+    """
+
+    def __init__(self, editor):
+        self.editor = editor
+        self._tags = None  # 标签 -> {元素: None}（保持插入顺序的集合）
+        self._attrs = {}  # 标签 -> {属性名: {属性值: {元素: None}}}
+        self._lines = None  # 行号 -> {元素: None}
+
+    def by_tag(self, tag):
+        """返回指定标签的所有候选元素。"""
+        if self._tags is None:
+            self._build()
+        return list(self._tags.get(tag, ()))
+
+    def by_attr(self, tag, name, value):
+        """返回指定标签上属性等于给定值的候选元素。"""
+        if self._tags is None:
+            self._build()
+        by_name = self._attrs.setdefault(tag, {})
+        if name not in by_name:
+            buckets = {}
+            for elem in self._tags.get(tag, ()):
+                value_key = self.editor._element_attr(elem, name)
+                buckets.setdefault(value_key, {})[elem] = None
+            by_name[name] = buckets
+        return list(by_name[name].get(value, ()))
+
+    def by_line(self, line):
+        """返回从指定行开始的所有候选元素。"""
+        if self._lines is None:
+            self._build()
+        return list(self._lines.get(line, ()))
+
+    def candidates(self, tag, attrs=None, line_number=None):
+        """根据过滤条件返回最小的候选元素集合。"""
+        if attrs:
+            return min(
+                (self.by_attr(tag, name, value) for name, value in attrs.items()),
+                key=len,
+            )
+        if isinstance(line_number, int):
+            return self.by_line(line_number)
+        if isinstance(line_number, range) and len(line_number) < len(
+            self.by_tag(tag)
+        ):
+            return [elem for line in line_number for elem in self.by_line(line)]
+        return self.by_tag(tag)
+
+    def add(self, nodes):
+        """将节点及其后代加入已构建的索引（重复加入是安全的）。"""
+        if self._tags is None:
+            return
+        for node in nodes:
+            for elem in self.editor._iter_elements(node):
+                self._insert(elem)
+
+    def discard(self, nodes):
+        """从索引中移除节点及其后代。"""
+        if self._tags is None:
+            return
+        for node in nodes:
+            for elem in self.editor._iter_elements(node):
+                tag = self.editor._element_tag(elem)
+                self._tags.get(tag, {}).pop(elem, None)
+                for name, buckets in self._attrs.get(tag, {}).items():
+                    value = self.editor._element_attr(elem, name)
+                    buckets.get(value, {}).pop(elem, None)
+                line = self.editor._element_line(elem)
+                if line is not None:
+                    self._lines.get(line, {}).pop(elem, None)
+
+    def _build(self):
+        self._tags = {}
+        self._lines = {}
+        root = self.editor._root_element()
+        for elem in self.editor._iter_elements(root):
+            self._insert(elem)
+
+    def _insert(self, elem):
+        tag = self.editor._element_tag(elem)
+        self._tags.setdefault(tag, {})[elem] = None
+        for name, buckets in self._attrs.get(tag, {}).items():
+            value = self.editor._element_attr(elem, name)
+            buckets.setdefault(value, {})[elem] = None
+        line = self.editor._element_line(elem)
+        if line is not None:
+            self._lines.setdefault(line, {})[elem] = None
+
+
+def _write_replacing(path, content):
+    """先写入同目录下的临时文件，再原子地替换目标文件。"""
+    temp_path = path.with_name(f".{path.name}.tmp")
+    temp_path.write_bytes(content)
+    os.replace(temp_path, path)
+
+
 def _create_line_tracking_parser():
     """
     创建一个跟踪每个元素行号和列号的SAX解析器。
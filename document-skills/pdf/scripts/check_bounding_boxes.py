@@ -13,36 +13,60 @@ class RectAndField:
     field: dict
 
 
+def rects_intersect(r1, r2):
+    disjoint_horizontal = r1[0] >= r2[2] or r1[2] <= r2[0]
+    disjoint_vertical = r1[1] >= r2[3] or r1[3] <= r2[1]
+    return not (disjoint_horizontal or disjoint_vertical)
+
+
+# 返回所有相交的矩形对(i, j)，i < j，按(i, j)排序。矩形为[x0, y0, x1, y1]。
+# 按左边界扫描：每个矩形只与水平方向上仍可能与它相交的矩形比较，而不是与所有矩形比较。
+def find_intersecting_pairs(rects) -> list[tuple[int, int]]:
+    pairs = []
+    active = []
+    for k in sorted(range(len(rects)), key=lambda index: rects[index][0]):
+        # 右边界不超过当前左边界的矩形不会再与后面的矩形相交
+        active = [a for a in active if rects[a][2] > rects[k][0]]
+        for a in active:
+            if rects_intersect(rects[a], rects[k]):
+                pairs.append((min(a, k), max(a, k)))
+        active.append(k)
+    pairs.sort()
+    return pairs
+
+
 # 返回打印到stdout以便Claude读取的消息列表。
 def get_bounding_box_messages(fields_json_stream) -> list[str]:
     messages = []
     fields = json.load(fields_json_stream)
     messages.append(f"已读取 {len(fields['form_fields'])} 个字段")
 
-    def rects_intersect(r1, r2):
-        disjoint_horizontal = r1[0] >= r2[2] or r1[2] <= r2[0]
-        disjoint_vertical = r1[1] >= r2[3] or r1[3] <= r2[1]
-        return not (disjoint_horizontal or disjoint_vertical)
-
     rects_and_fields = []
     for f in fields["form_fields"]:
         rects_and_fields.append(RectAndField(f["label_bounding_box"], "label", f))
         rects_and_fields.append(RectAndField(f["entry_bounding_box"], "entry", f))
 
+    # 只有同一页上的边界框才可能相交
+    pages = {}
+    for i, r in enumerate(rects_and_fields):
+        pages.setdefault(r.field["page_number"], []).append(i)
+    intersections = {}
+    for indexes in pages.values():
+        for a, b in find_intersecting_pairs([rects_and_fields[i].rect for i in indexes]):
+            intersections.setdefault(indexes[a], []).append(indexes[b])
+
     has_error = False
     for i, ri in enumerate(rects_and_fields):
-        # 这是O(N^2)复杂度；如果成为问题，我们可以优化。
-        for j in range(i + 1, len(rects_and_fields)):
+        for j in intersections.get(i, []):
             rj = rects_and_fields[j]
-            if ri.field["page_number"] == rj.field["page_number"] and rects_intersect(ri.rect, rj.rect):
-                has_error = True
-                if ri.field is rj.field:
-                    messages.append(f"FAILURE: `{ri.field['description']}`的标签和输入框边界框相交 ({ri.rect}, {rj.rect})")
-                else:
-                    messages.append(f"FAILURE: `{ri.field['description']}`的{ri.rect_type.replace('label', '标签').replace('entry', '输入框')}边界框 ({ri.rect}) 与 `{rj.field['description']}`的{rj.rect_type.replace('label', '标签').replace('entry', '输入框')}边界框 ({rj.rect}) 相交")
-                if len(messages) >= 20:
-                    messages.append("Aborting: 中止进一步检查；修复边界框并重试")
-                    return messages
+            has_error = True
+            if ri.field is rj.field:
+                messages.append(f"FAILURE: `{ri.field['description']}`的标签和输入框边界框相交 ({ri.rect}, {rj.rect})")
+            else:
+                messages.append(f"FAILURE: `{ri.field['description']}`的{ri.rect_type.replace('label', '标签').replace('entry', '输入框')}边界框 ({ri.rect}) 与 `{rj.field['description']}`的{rj.rect_type.replace('label', '标签').replace('entry', '输入框')}边界框 ({rj.rect}) 相交")
+            if len(messages) >= 20:
+                messages.append("Aborting: 中止进一步检查；修复边界框并重试")
+                return messages
         if ri.rect_type == "entry":
             if "entry_text" in ri.field:
                 font_size = ri.field["entry_text"].get("font_size", 14)
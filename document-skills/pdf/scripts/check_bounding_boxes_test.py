@@ -1,7 +1,12 @@
 import unittest
 import json
 import io
-from check_bounding_boxes import get_bounding_box_messages
+import random
+from check_bounding_boxes import (
+    find_intersecting_pairs,
+    get_bounding_box_messages,
+    rects_intersect,
+)
 
 
 # 目前此测试不会在CI中自动运行；它仅用于文档说明和手动检查。
@@ -221,6 +226,117 @@ class TestGetBoundingBoxMessages(unittest.TestCase):
         self.assertTrue(any("SUCCESS" in msg for msg in messages))
         self.assertFalse(any("FAILURE" in msg for msg in messages))
     
+    def test_boxes_on_different_pages(self):
+        """测试不同页上坐标相同的边界框不计为相交"""
+        data = {
+            "form_fields": [
+                {
+                    "description": "Name",
+                    "page_number": 1,
+                    "label_bounding_box": [10, 10, 50, 30],
+                    "entry_bounding_box": [60, 10, 150, 30]
+                },
+                {
+                    "description": "Email",
+                    "page_number": 2,
+                    "label_bounding_box": [10, 10, 50, 30],
+                    "entry_bounding_box": [60, 10, 150, 30]
+                }
+            ]
+        }
+
+        stream = self.create_json_stream(data)
+        messages = get_bounding_box_messages(stream)
+        self.assertTrue(any("SUCCESS" in msg for msg in messages))
+        self.assertFalse(any("FAILURE" in msg for msg in messages))
+
+    def test_random_fields_match_brute_force(self):
+        """测试多页随机字段的相交数量与逐对比较的结果一致"""
+        rng = random.Random(0)
+        for _ in range(200):
+            fields = []
+            for i in range(rng.randint(1, 4)):
+                page = rng.randint(1, 2)
+                label = random_rect(rng, 10)
+                entry = random_rect(rng, 10)
+                fields.append({
+                    "description": f"Field{i}",
+                    "page_number": page,
+                    "label_bounding_box": label,
+                    "entry_bounding_box": entry
+                })
+            boxes = [
+                (f["page_number"], f[key])
+                for f in fields
+                for key in ("label_bounding_box", "entry_bounding_box")
+            ]
+            expected = sum(
+                1
+                for i in range(len(boxes))
+                for j in range(i + 1, len(boxes))
+                if boxes[i][0] == boxes[j][0] and rects_intersect(boxes[i][1], boxes[j][1])
+            )
+
+            stream = self.create_json_stream({"form_fields": fields})
+            messages = get_bounding_box_messages(stream)
+            failure_count = sum(1 for msg in messages if "FAILURE" in msg)
+            self.assertEqual(failure_count, expected)
+
+
+def random_rect(rng, size):
+    """生成小整数坐标的随机矩形，使接触和相同边界经常出现"""
+    x0, y0 = rng.randint(0, size), rng.randint(0, size)
+    return [x0, y0, x0 + rng.randint(1, size // 2), y0 + rng.randint(1, size // 2)]
+
+
+def brute_force_pairs(rects):
+    return [
+        (i, j)
+        for i in range(len(rects))
+        for j in range(i + 1, len(rects))
+        if rects_intersect(rects[i], rects[j])
+    ]
+
+
+class TestFindIntersectingPairs(unittest.TestCase):
+
+    def test_touching_rects(self):
+        """测试只在边或角上接触的矩形不计为相交"""
+        rects = [[0, 0, 10, 10], [10, 0, 20, 10], [0, 10, 10, 20], [10, 10, 20, 20]]
+        self.assertEqual(find_intersecting_pairs(rects), [])
+
+    def test_equal_left_edges(self):
+        """测试左边界相同的矩形都会相互比较"""
+        rects = [[0, 0, 5, 30], [0, 10, 20, 20], [0, 40, 10, 50], [0, 25, 1, 45]]
+        self.assertEqual(find_intersecting_pairs(rects), [(0, 1), (0, 3), (2, 3)])
+
+    def test_contained_rect(self):
+        """测试包含在另一个矩形内的矩形，索引顺序与左边界顺序相反"""
+        rects = [[5, 5, 6, 6], [0, 0, 10, 10]]
+        self.assertEqual(find_intersecting_pairs(rects), [(0, 1)])
+
+    def test_empty_and_single(self):
+        """测试没有矩形或只有一个矩形"""
+        self.assertEqual(find_intersecting_pairs([]), [])
+        self.assertEqual(find_intersecting_pairs([[0, 0, 1, 1]]), [])
+
+    def test_matches_brute_force(self):
+        """测试随机矩形（包括接触和相同边界）的结果与逐对比较一致"""
+        rng = random.Random(0)
+        for _ in range(500):
+            rects = [random_rect(rng, 20) for _ in range(rng.randint(0, 30))]
+            self.assertEqual(find_intersecting_pairs(rects), brute_force_pairs(rects))
+
+    def test_float_coordinates_match_brute_force(self):
+        """测试浮点坐标的结果与逐对比较一致"""
+        rng = random.Random(1)
+        for _ in range(200):
+            rects = []
+            for _ in range(rng.randint(0, 30)):
+                x0, y0 = rng.uniform(0, 600), rng.uniform(0, 800)
+                rects.append([x0, y0, x0 + rng.uniform(1, 150), y0 + rng.uniform(1, 40)])
+            self.assertEqual(find_intersecting_pairs(rects), brute_force_pairs(rects))
+
 
 if __name__ == '__main__':
     unittest.main()
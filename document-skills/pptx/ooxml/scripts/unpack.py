@@ -1,29 +1,200 @@
 #!/usr/bin/env python3
-"""解压并格式化Office文件(.docx, .pptx, .xlsx)的XML内容"""
+"""解压并格式化Office文件(.docx, .pptx, .xlsx)的XML内容
 
+使用示例：
+    python unpack.py <office文件> <输出目录>
+
+重复解包到同一目录时，只重写与上次解包相比发生变化的部件。
+部件清单保存在输出目录旁边的 .<目录名>.unpack-manifest.json 中，
+不会混入解包后的文档内容。
+"""
+
+import json
+import os
 import random
+import shutil
 import sys
 import defusedxml.minidom
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-# 获取命令行参数
-assert len(sys.argv) == 3, "用法: python unpack.py <office文件> <输出目录>"
-input_file, output_dir = sys.argv[1], sys.argv[2]
-
-# 解压并格式化
-output_path = Path(output_dir)
-output_path.mkdir(parents=True, exist_ok=True)
-zipfile.ZipFile(input_file).extractall(output_path)
-
-# 美化打印所有XML文件
-xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-for xml_file in xml_files:
-    content = xml_file.read_text(encoding="utf-8")
-    dom = defusedxml.minidom.parseString(content)
-    xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
-
-# 对于.docx文件，为修订跟踪建议一个RSID
-if input_file.endswith(".docx"):
-    suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
-    print(f"建议的编辑会话RSID：{suggested_rsid}")
+# 清单格式版本，格式化方式变化时递增以强制重写
+MANIFEST_VERSION = 1
+
+# 清单文件名后缀（pack.py打包时跳过此类文件）
+MANIFEST_SUFFIX = ".unpack-manifest.json"
+
+# 需要美化打印的部件少于此数量时串行处理，避免进程池的启动开销
+PARALLEL_THRESHOLD = 8
+
+# 工作进程中打开的源文件(由_init_worker设置)
+_worker_zip = None
+
+
+def main():
+    # 获取命令行参数
+    assert len(sys.argv) == 3, "用法: python unpack.py <office文件> <输出目录>"
+    input_file, output_dir = sys.argv[1], sys.argv[2]
+
+    # 解压并格式化
+    unpack_document(input_file, output_dir)
+
+    # 对于.docx文件，为修订跟踪建议一个RSID
+    if input_file.endswith(".docx"):
+        suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
+        print(f"建议的编辑会话RSID：{suggested_rsid}")
+
+
+def unpack_document(input_file, output_dir, jobs=None):
+    """将Office文件解包到目录，并美化打印所有XML部件。
+
+    XML部件在进程池中并行格式化，二进制部件直接复制。
+    如果输出目录已由此函数解包过，则只重写源部件或磁盘文件发生变化的部件，
+    并删除新文件中已不存在的旧部件。
+
+    参数:
+        input_file: Office文件路径(.docx/.pptx/.xlsx)
+        output_dir: 输出目录路径
+        jobs: 并行格式化的进程数(默认: CPU核心数，1表示串行)
+
+    返回:
+        dict: 统计信息，包含written、skipped和removed部件数
+    """
+    input_file = Path(input_file)
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    root = output_path.resolve()
+
+    manifest_path = _manifest_path(output_path)
+    old_manifest = _load_manifest(manifest_path)
+    new_manifest = {}
+    stats = {"written": 0, "skipped": 0, "removed": 0}
+
+    to_format = []
+    sources = {}
+    with zipfile.ZipFile(input_file) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+
+            target = (output_path / info.filename).resolve()
+            if not target.is_relative_to(root):
+                raise ValueError(f"不安全的部件路径: {info.filename}")
+
+            source = [info.CRC, info.file_size]
+            entry = old_manifest.get(info.filename)
+            if entry and entry["source"] == source and _matches_disk(target, entry):
+                new_manifest[info.filename] = entry
+                stats["skipped"] += 1
+                continue
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if _is_xml_part(info.filename):
+                to_format.append((info.filename, str(target)))
+                sources[info.filename] = source
+            else:
+                # 二进制部件不需要格式化，直接流式复制
+                with zf.open(info) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                new_manifest[info.filename] = _manifest_entry(target, source)
+            stats["written"] += 1
+
+    # 美化打印所有变化的XML文件
+    for name, target in _format_parts(input_file, to_format, jobs):
+        new_manifest[name] = _manifest_entry(Path(target), sources[name])
+
+    # 删除上次解包留下、但新文件中已不存在的部件
+    for name in old_manifest.keys() - new_manifest.keys():
+        stale = output_path / name
+        if stale.is_file():
+            stale.unlink()
+            stats["removed"] += 1
+
+    manifest_path.write_text(
+        json.dumps({"version": MANIFEST_VERSION, "parts": new_manifest}, indent=1),
+        encoding="utf-8",
+    )
+    return stats
+
+
+def pretty_print_part(content):
+    """美化打印XML部件内容，返回ASCII编码的字节。"""
+    dom = defusedxml.minidom.parseString(content.decode("utf-8"))
+    return dom.toprettyxml(indent="  ", encoding="ascii")
+
+
+def _is_xml_part(name):
+    return name.endswith((".xml", ".rels"))
+
+
+def _format_parts(input_file, parts, jobs=None):
+    """格式化(部件名, 目标路径)列表，逐个返回完成的部件。"""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(parts) < PARALLEL_THRESHOLD:
+        _init_worker(input_file)
+        try:
+            for part in parts:
+                yield _format_part(part)
+        finally:
+            _close_worker()
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(str(input_file),)
+    ) as executor:
+        yield from executor.map(_format_part, parts, chunksize=4)
+
+
+def _init_worker(input_file):
+    """在每个工作进程中打开一次源文件。"""
+    global _worker_zip
+    _worker_zip = zipfile.ZipFile(input_file)
+
+
+def _close_worker():
+    global _worker_zip
+    if _worker_zip is not None:
+        _worker_zip.close()
+        _worker_zip = None
+
+
+def _format_part(part):
+    name, target = part
+    Path(target).write_bytes(pretty_print_part(_worker_zip.read(name)))
+    return name, target
+
+
+def _manifest_path(output_path):
+    """清单保存在输出目录旁边，避免被打包或验证为文档部件。"""
+    output_path = Path(output_path).resolve()
+    return output_path.parent / f".{output_path.name}{MANIFEST_SUFFIX}"
+
+
+def _load_manifest(manifest_path):
+    try:
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("parts", {})
+
+
+def _manifest_entry(target, source):
+    """记录源部件的CRC/大小以及写出文件的大小/修改时间。"""
+    stat = target.stat()
+    return {"source": source, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _matches_disk(target, entry):
+    """检查磁盘文件自上次解包后是否未被修改。"""
+    try:
+        stat = target.stat()
+    except OSError:
+        return False
+    return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,129 @@
 文档文件通用验证逻辑的基础验证器。
 """
 
+import copy
+import hashlib
+import io
+import os
+import posixpath
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import lxml.etree
 
+from .package import CONTENT_TYPES_PART, PackageModel, open_source
+
+# 进程内已编译的XSD模式：解析后的模式路径 → lxml.etree.XMLSchema
+_schema_cache = {}
+_schema_cache_lock = threading.Lock()
+
+# 未命中缓存的部件少于此数量时串行检查，避免进程池的启动开销
+PARALLEL_THRESHOLD = 8
+
+# 工作进程中的验证器实例(由_init_worker设置)
+_worker_validator = None
+
+
+def load_schema(schema_path):
+    """返回编译后的XSD模式，每个模式文件在一个进程中只编译一次。
+
+    编译wml.xsd/pml.xsd及其导入的模式需要数百毫秒，因此所有验证器
+    （以及对原始文件的比较验证）共享此缓存。
+
+    参数：
+        schema_path: XSD文件路径
+
+    返回：
+        lxml.etree.XMLSchema
+    """
+    key = str(Path(schema_path).resolve())
+    schema = _schema_cache.get(key)
+    if schema is not None:
+        return schema
+
+    with _schema_cache_lock:
+        schema = _schema_cache.get(key)
+        if schema is None:
+            with open(key, "rb") as xsd_file:
+                parser = lxml.etree.XMLParser()
+                xsd_doc = lxml.etree.parse(xsd_file, parser=parser, base_url=key)
+            schema = lxml.etree.XMLSchema(xsd_doc)
+            _schema_cache[key] = schema
+    return schema
+
+
+class OriginalPackage:
+    """原始文档的只读视图（部件通过package.open_source读取）。
+
+    Office文件在第一次读取时打开一次，之后按需将单个部件直接从zip读入内存，
+    不解压到磁盘；已解压的原始目录则直接读取文件。同一次运行中的多个验证器
+    可以共享同一个视图（见open_original）。
+    """
+
+    def __init__(self, package_path):
+        """
+        参数：
+            package_path: Office文件(.docx/.pptx/.xlsx)或已解压的文档目录
+        """
+        self.path = Path(package_path)
+        self._source = None
+
+    def read(self, part):
+        """返回部件内容的字节，部件不存在时返回None。
+
+        参数：
+            part: 相对于包根目录的部件路径（例如"word/document.xml"）
+        """
+        stream = self.open(part)
+        if stream is None:
+            return None
+        with stream:
+            return stream.read()
+
+    def open(self, part):
+        """以二进制流打开部件，部件不存在时返回None。
+
+        zip中的部件在读取时逐块解压，适合流式解析大部件。
+
+        参数：
+            part: 相对于包根目录的部件路径（例如"word/document.xml"）
+        """
+        if self._source is None:
+            self._source = open_source(self.path)
+        return self._source.open(Path(part).as_posix())
+
+    def close(self):
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_original(original):
+    """返回原始文档的只读视图；传入的已经是OriginalPackage时原样返回。"""
+    if isinstance(original, OriginalPackage):
+        return original
+    return OriginalPackage(original)
+
+
+def _init_worker(validator_class, unpacked_dir, original_file):
+    """在每个工作进程中创建一次验证器，之后的检查共享其解析结果和模式缓存。"""
+    global _worker_validator
+    _worker_validator = validator_class(unpacked_dir, original_file)
+
+
+def _run_worker_check(task):
+    """在工作进程中对单个部件运行逐部件检查，task为(方法名, 部件路径)。"""
+    method_name, xml_file = task
+    return getattr(_worker_validator, method_name)(Path(xml_file))
+
 
 class BaseSchemaValidator:
     """文档文件通用验证逻辑的基础验证器。"""
@@ -103,18 +221,62 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file, verbose=False):
-        self.unpacked_dir = Path(unpacked_dir).resolve()
-        self.original_file = Path(original_file)
+    def __init__(
+        self,
+        unpacked_dir,
+        original_file,
+        verbose=False,
+        dirty_parts=None,
+        cache=None,
+        jobs=1,
+    ):
+        """
+        参数：
+            unpacked_dir: 已解压的文档目录、Office文件(直接从zip中读取部件)或PackageSource
+            original_file: 原始Office文件、已解压的原始目录或OriginalPackage，用于比较
+            verbose: 启用详细输出
+            dirty_parts: 自上次使用同一缓存验证以来修改过的部件（相对路径）。
+                         不在其中的部件不再重新读取和计算哈希；为None时全部重新计算
+            cache: 逐部件检查结果的缓存字典，可在多次验证之间共享（需使用同一原始文件）
+            jobs: 并行执行逐部件检查的进程数（默认: 1，即串行；None表示CPU核心数）。大于1时应在
+                  验证后调用close()，或将验证器用作上下文管理器
+        """
+        # 部件来源：已解压目录中的文件，或直接从Office文件（zip）中流式读取
+        self.source = open_source(unpacked_dir)
+        self.unpacked_dir = self.source.path.resolve()
+        self.original = open_original(original_file)
+        self.original_file = self.original.path
         self.verbose = verbose
+        self.dirty_parts = (
+            None
+            if dirty_parts is None
+            else {Path(p).as_posix() for p in dirty_parts}
+        )
+        self.cache = cache
+        self.jobs = jobs or os.cpu_count() or 1
+        self._pool = None
+        # 本次验证中已解析的XML树（见_parse_part）
+        self._trees = {}
+        # 没有共享缓存时，原始部件的XSD错误只在本次运行内记忆
+        self._original_errors = {} if cache is None else cache
+
+        # 修改过的部件的内容哈希需要重新计算
+        if self.cache is not None and self.dirty_parts is not None:
+            for name in self.dirty_parts:
+                self.cache.pop(("digest", name), None)
 
         # 设置模式目录
         self.schemas_dir = Path(__file__).parent.parent.parent / "schemas"
 
+        # 包模型：部件列表、关系图和内容类型映射（目录只扫描一次）
+        self.package = PackageModel(self.source, parse=self._parse_part)
+
         # 获取所有XML和.rels文件
-        patterns = ["*.xml", "*.rels"]
         self.xml_files = [
-            f for pattern in patterns for f in self.unpacked_dir.rglob(pattern)
+            self.package.parts[name]
+            for suffix in (".xml", ".rels")
+            for name in self.package.parts
+            if name.endswith(suffix)
         ]
 
         if not self.xml_files:
@@ -124,24 +286,173 @@ class BaseSchemaValidator:
         """运行所有验证检查，如果全部通过则返回True。"""
         raise NotImplementedError("子类必须实现validate方法")
 
+    def _check_part(self, name, xml_file, check, depends_on=()):
+        """运行逐部件检查，结果按部件（及其依赖文件）的内容哈希缓存。
+
+        参数：
+            name: 检查名称（缓存键的一部分）
+            xml_file: 要检查的部件路径
+            check: 以xml_file为参数、返回检查结果的函数
+            depends_on: 结果还依赖的其他文件（例如对应的.rels文件）
+
+        返回：
+            check(xml_file)的结果（可能来自缓存）
+        """
+        if self.cache is None:
+            return check(xml_file)
+
+        files = [Path(xml_file), *map(Path, depends_on)]
+        key = (name, self._part_name(xml_file))
+        digest = "/".join(self._part_digest(f) for f in files)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+        result = check(xml_file)
+        self.cache[key] = (digest, result)
+        return result
+
+    def _map_parts(self, name, xml_files, check, depends_on=None):
+        """对多个部件运行逐部件检查，按xml_files的顺序返回结果列表。
+
+        缓存语义与_check_part相同。jobs > 1且有足够多的部件未命中缓存时，
+        这些部件分发到进程池中检查；结果按输入顺序合并，输出与串行运行一致。
+
+        参数：
+            name: 检查名称（缓存键的一部分）
+            xml_files: 要检查的部件路径
+            check: 验证器的逐部件检查方法（工作进程中按方法名调用）
+            depends_on: 返回部件依赖文件列表的函数（例如对应的.rels文件）
+        """
+        xml_files = list(xml_files)
+        results = [None] * len(xml_files)
+        pending = []  # (序号, 缓存键, 内容哈希)
+
+        for i, xml_file in enumerate(xml_files):
+            if self.cache is None:
+                pending.append((i, None, None))
+                continue
+
+            files = [Path(xml_file)]
+            if depends_on is not None:
+                files.extend(map(Path, depends_on(xml_file)))
+            key = (name, self._part_name(xml_file))
+            digest = "/".join(self._part_digest(f) for f in files)
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] == digest:
+                results[i] = cached[1]
+            else:
+                pending.append((i, key, digest))
+
+        if self.jobs > 1 and len(pending) >= PARALLEL_THRESHOLD:
+            tasks = [(check.__name__, str(xml_files[i])) for i, _, _ in pending]
+            values = self._worker_pool().map(
+                _run_worker_check,
+                tasks,
+                chunksize=max(1, len(tasks) // (self.jobs * 4)),
+            )
+        else:
+            values = (check(xml_files[i]) for i, _, _ in pending)
+
+        for (i, key, digest), result in zip(pending, values):
+            results[i] = result
+            if key is not None:
+                self.cache[key] = (digest, result)
+        return results
+
+    def _worker_pool(self):
+        """返回本验证器的进程池，第一次使用时创建。
+
+        每个工作进程创建自己的验证器实例（见_init_worker），因此各自解析部件、
+        读取原始文档并持有自己的已编译模式缓存。
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_init_worker,
+                initargs=(
+                    type(self),
+                    str(self.unpacked_dir),
+                    str(self.original.path),
+                ),
+            )
+        return self._pool
+
+    def close(self):
+        """关闭进程池（如果已创建）。"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _parse_part(self, path):
+        """解析XML文件并返回lxml树，同一次验证中每个文件只解析一次。
+
+        所有检查共享返回的树，因此不得修改它；需要修改时先复制。
+        解析失败时，每次调用都抛出同一个异常。
+        """
+        key = str(path)
+        tree = self._trees.get(key)
+        if tree is None:
+            try:
+                tree = self._read_tree(path)
+            except Exception as e:
+                tree = e
+            self._trees[key] = tree
+        if isinstance(tree, Exception):
+            raise tree
+        return tree
+
+    def _read_tree(self, path):
+        """从部件来源解析部件。子类可以覆盖以流式处理特别大的部件。"""
+        return self.source.parse(self._part_name(path))
+
+    def _part_name(self, path):
+        """返回部件相对于解压目录的POSIX路径。"""
+        path = Path(path)
+        try:
+            # xml_files和包模型中的路径已位于解压目录下，不必再解析符号链接
+            return path.relative_to(self.unpacked_dir).as_posix()
+        except ValueError:
+            return path.resolve().relative_to(self.unpacked_dir).as_posix()
+
+    def _part_digest(self, path):
+        """返回部件内容的哈希。
+
+        未列入dirty_parts的部件复用缓存中上次计算的哈希，不再读取文件。
+        """
+        name = self._part_name(path)
+        key = ("digest", name)
+        if self.dirty_parts is not None and name not in self.dirty_parts:
+            if key in self.cache:
+                return self.cache[key]
+
+        digest = "missing"
+        try:
+            stream = self.source.open(name)
+            if stream is not None:
+                # 分块计算哈希，大部件不必整个读入内存
+                with stream:
+                    content_hash = hashlib.sha256()
+                    for chunk in iter(lambda: stream.read(1 << 20), b""):
+                        content_hash.update(chunk)
+                digest = content_hash.hexdigest()
+        except OSError:
+            pass
+        self.cache[key] = digest
+        return digest
+
     def validate_xml(self):
         """验证所有XML文件是否格式良好。"""
         errors = []
 
-        for xml_file in self.xml_files:
-            try:
-                # 尝试解析XML文件
-                lxml.etree.parse(str(xml_file))
-            except lxml.etree.XMLSyntaxError as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"第{e.lineno}行: {e.msg}"
-                )
-            except Exception as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"意外错误: {str(e)}"
-                )
+        for file_errors in self._map_parts("xml", self.xml_files, self._xml_errors):
+            errors.extend(file_errors)
 
         if errors:
             print(f"失败 - 发现{len(errors)}个XML违规:")
@@ -153,26 +464,31 @@ class BaseSchemaValidator:
                 print("通过 - 所有XML文件格式良好")
             return True
 
+    def _xml_errors(self, xml_file):
+        """返回单个XML文件的格式错误。"""
+        try:
+            # 尝试解析XML文件（解析结果供后续检查复用）
+            self._parse_part(xml_file)
+        except lxml.etree.XMLSyntaxError as e:
+            return [
+                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                f"第{e.lineno}行: {e.msg}"
+            ]
+        except Exception as e:
+            return [
+                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                f"意外错误: {str(e)}"
+            ]
+        return []
+
     def validate_namespaces(self):
         """验证Ignorable属性中的命名空间前缀是否已声明。"""
         errors = []
 
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                declared = set(root.nsmap.keys()) - {None}  # 排除默认命名空间
-
-                for attr_val in [
-                    v for k, v in root.attrib.items() if k.endswith("Ignorable")
-                ]:
-                    undeclared = set(attr_val.split()) - declared
-                    errors.extend(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Ignorable中的命名空间 '{ns}' 未声明"
-                        for ns in undeclared
-                    )
-            except lxml.etree.XMLSyntaxError:
-                continue
+        for file_errors in self._map_parts(
+            "namespaces", self.xml_files, self._namespace_errors
+        ):
+            errors.extend(file_errors)
 
         if errors:
             print(f"失败 - {len(errors)}个命名空间问题:")
@@ -183,86 +499,55 @@ class BaseSchemaValidator:
             print("通过 - 所有命名空间前缀已正确声明")
         return True
 
+    def _namespace_errors(self, xml_file):
+        """返回单个XML文件中Ignorable属性引用的未声明命名空间前缀。"""
+        errors = []
+        try:
+            root = self._parse_part(xml_file).getroot()
+            declared = set(root.nsmap.keys()) - {None}  # 排除默认命名空间
+
+            for attr_val in [
+                v for k, v in root.attrib.items() if k.endswith("Ignorable")
+            ]:
+                undeclared = set(attr_val.split()) - declared
+                errors.extend(
+                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                    f"Ignorable中的命名空间 '{ns}' 未声明"
+                    for ns in undeclared
+                )
+        except lxml.etree.XMLSyntaxError:
+            pass
+        return errors
+
     def validate_unique_ids(self):
         """根据OOXML要求验证特定ID是否唯一。"""
         errors = []
         global_ids = {}  # 跟踪所有文件中全局唯一的ID
 
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  # 跟踪必须在此文件内唯一的ID
-
-                # 从树中移除所有mc:AlternateContent元素
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
+        # 文件级检查按部件缓存（可并行）；全局ID按文件顺序在所有文件之间比较
+        file_events = self._map_parts(
+            "unique_ids", self.xml_files, self._unique_id_events
+        )
+        for xml_file, events in zip(self.xml_files, file_events):
+            for event in events:
+                if event[0] == "error":
+                    errors.append(event[1])
+                    continue
 
-                # 现在在清理后的树中检查ID
-                for elem in root.iter():
-                    # 获取不带命名空间的元素名称
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
+                _, id_value, line, tag = event
+                if id_value in global_ids:
+                    prev_file, prev_line, prev_tag = global_ids[id_value]
+                    errors.append(
+                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                        f"第 {line} 行: <{tag}> 中的全局ID '{id_value}' "
+                        f"已在 {prev_file} 文件的第 {prev_line} 行 <{prev_tag}> 中使用"
+                    )
+                else:
+                    global_ids[id_value] = (
+                        xml_file.relative_to(self.unpacked_dir),
+                        line,
+                        tag,
                     )
-
-                    # 检查此元素类型是否有ID唯一性要求
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        # 查找指定的属性
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                # 检查全局唯一性
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"第 {elem.sourceline} 行: <{tag}> 中的全局ID '{id_value}' "
-                                        f"已在 {prev_file} 文件的第 {prev_line} 行 <{prev_tag}> 中使用"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                # 检查文件级唯一性
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"第 {elem.sourceline} 行: <{tag}> 中的 {attr_name}='{id_value}' 重复 "
-                                        f"(第一次出现在第 {prev_line} 行)"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
-                )
 
         if errors:
             print(f"失败 - 发现 {len(errors)} 个ID唯一性违规:")
@@ -274,6 +559,79 @@ class BaseSchemaValidator:
                 print("通过 - 所有必需的ID都是唯一的")
             return True
 
+    def _unique_id_events(self, xml_file):
+        """检查单个文件中的ID唯一性。
+
+        返回：
+            列表：按文档顺序的("error", 消息)和("global", ID, 行号, 标签)事件
+        """
+        events = []
+        try:
+            root = self._parse_part(xml_file).getroot()
+            file_ids = {}  # 跟踪必须在此文件内唯一的ID
+
+            # 从树中移除所有mc:AlternateContent元素（树是共享的，只在需要时修改副本）
+            if root.find(f".//{{{self.MC_NAMESPACE}}}AlternateContent") is not None:
+                root = copy.deepcopy(root)
+                mc_elements = root.xpath(
+                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
+                )
+                for elem in mc_elements:
+                    elem.getparent().remove(elem)
+
+            # 现在在清理后的树中检查ID
+            for elem in root.iter():
+                # 获取不带命名空间的元素名称
+                tag = (
+                    elem.tag.split("}")[-1].lower()
+                    if "}" in elem.tag
+                    else elem.tag.lower()
+                )
+
+                # 检查此元素类型是否有ID唯一性要求
+                if tag in self.UNIQUE_ID_REQUIREMENTS:
+                    attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
+
+                    # 查找指定的属性
+                    id_value = None
+                    for attr, value in elem.attrib.items():
+                        attr_local = (
+                            attr.split("}")[-1].lower()
+                            if "}" in attr
+                            else attr.lower()
+                        )
+                        if attr_local == attr_name:
+                            id_value = value
+                            break
+
+                    if id_value is not None:
+                        if scope == "global":
+                            # 全局唯一性在所有文件之间检查
+                            events.append(("global", id_value, elem.sourceline, tag))
+                        elif scope == "file":
+                            # 检查文件级唯一性
+                            key = (tag, attr_name)
+                            if key not in file_ids:
+                                file_ids[key] = {}
+
+                            if id_value in file_ids[key]:
+                                prev_line = file_ids[key][id_value]
+                                events.append((
+                                    "error",
+                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                    f"第 {elem.sourceline} 行: <{tag}> 中的 {attr_name}='{id_value}' 重复 "
+                                    f"(第一次出现在第 {prev_line} 行)",
+                                ))
+                            else:
+                                file_ids[key][id_value] = elem.sourceline
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            events.append((
+                "error",
+                f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}",
+            ))
+        return events
+
     def validate_file_references(self):
         """
         验证所有.rels文件是否正确引用文件以及所有文件是否都被引用。
@@ -281,7 +639,7 @@ class BaseSchemaValidator:
         errors = []
 
         # 查找所有.rels文件
-        rels_files = list(self.unpacked_dir.rglob("*.rels"))
+        rels_files = self.package.rels_parts
 
         if not rels_files:
             if self.verbose:
@@ -289,14 +647,12 @@ class BaseSchemaValidator:
             return True
 
         # 获取解压目录中的所有文件（排除引用文件）
-        all_files = []
-        for file_path in self.unpacked_dir.rglob("*"):
-            if (
-                file_path.is_file()
-                and file_path.name != "[Content_Types].xml"
-                and not file_path.name.endswith(".rels")
-            ):  # 此文件不被.rels引用
-                all_files.append(file_path.resolve())
+        all_files = {
+            name
+            for name in self.package.parts
+            if posixpath.basename(name) != CONTENT_TYPES_PART
+            and not name.endswith(".rels")  # 此文件不被.rels引用
+        }
 
         # 跟踪所有被任何.rels文件引用的文件
         all_referenced_files = set()
@@ -309,65 +665,27 @@ class BaseSchemaValidator:
         # 检查每个.rels文件
         for rels_file in rels_files:
             try:
-                # 解析关系文件
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
-                # 获取此.rels文件所在的目录
-                rels_dir = rels_file.parent
-
-                # 查找所有关系及其目标
-                referenced_files = set()
-                broken_refs = []
-
-                for rel in rels_root.findall(
-                    ".//ns:Relationship",
-                    namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
-                ):
-                    target = rel.get("Target")
-                    if target and not target.startswith(
-                        ("http", "mailto:")
-                    ):
-                        # 跳过外部URL
-                        # 相对于.rels文件位置解析目标路径
-                        if rels_file.name == ".rels":
-                            # 根.rels文件 - 目标相对于unpacked_dir
-                            target_path = self.unpacked_dir / target
-                        else:
-                            # 其他.rels文件 - 目标相对于其父目录的父目录
-                            # 例如，word/_rels/document.xml.rels -> 目标相对于word/
-                            base_dir = rels_dir.parent
-                            target_path = base_dir / target
-
-                        # 规范化路径并检查是否存在
-                        try:
-                            target_path = target_path.resolve()
-                            if target_path.exists() and target_path.is_file():
-                                referenced_files.add(target_path)
-                                all_referenced_files.add(target_path)
-                            else:
-                                broken_refs.append((target, rel.sourceline))
-                        except (OSError, ValueError):
-                            broken_refs.append((target, rel.sourceline))
-
-                # 报告损坏的引用
-                if broken_refs:
-                    rel_path = rels_file.relative_to(self.unpacked_dir)
-                    for broken_ref, line_num in broken_refs:
+                # 目标已在包模型中相对于.rels文件的源部件目录解析（跳过外部目标）
+                for rel in self.package.relationships(rels_file):
+                    if not rel.target or rel.external:
+                        continue
+                    if rel.part is not None:
+                        all_referenced_files.add(rel.part)
+                    else:
+                        # 报告损坏的引用
                         errors.append(
-                            f"  {rel_path}: 第 {line_num} 行: 对 {broken_ref} 的引用损坏"
+                            f"  {rels_file}: 第 {rel.line} 行: 对 {rel.target} 的引用损坏"
                         )
 
             except Exception as e:
-                rel_path = rels_file.relative_to(self.unpacked_dir)
-                errors.append(f"  解析 {rel_path} 时出错: {e}")
+                errors.append(f"  解析 {rels_file} 时出错: {e}")
 
         # 检查未引用的文件（存在但未被任何地方引用的文件）
-        unreferenced_files = set(all_files) - all_referenced_files
+        unreferenced_files = all_files - all_referenced_files
 
         if unreferenced_files:
             for unref_file in sorted(unreferenced_files):
-                unref_rel_path = unref_file.relative_to(self.unpacked_dir)
-                errors.append(f"  未引用的文件: {unref_rel_path}")
+                errors.append(f"  未引用的文件: {unref_file}")
 
         if errors:
             print(f"失败 - 发现 {len(errors)} 个关系验证错误:")
@@ -391,11 +709,10 @@ class BaseSchemaValidator:
         验证XML文件中的所有r:id属性是否引用其对应.rels文件中存在的ID，
         并可选地验证关系类型。
         """
-        import lxml.etree
-
         errors = []
 
         # 处理每个可能包含r:id引用的XML文件
+        rels_files = {}
         for xml_file in self.xml_files:
             # 跳过.rels文件本身
             if xml_file.suffix == ".rels":
@@ -403,75 +720,23 @@ class BaseSchemaValidator:
 
             # 确定对应的.rels文件
             # 对于dir/file.xml，对应的.rels文件是dir/_rels/file.xml.rels
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
+            rels_name = self.package.find(
+                self.package.rels_part_for(self._part_name(xml_file))
+            )
 
             # 如果没有对应的.rels文件则跳过（这是正常的）
-            if not rels_file.exists():
+            if rels_name is None:
                 continue
 
-            try:
-                # 解析.rels文件以获取有效的关系ID及其类型
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-                rid_to_type = {}
-
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
-                    if rid:
-                        # 检查重复的rId
-                        if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
-                            errors.append(
-                                f"  {rels_rel_path}: 第 {rel.sourceline} 行: "
-                                f"重复的关系ID '{rid}' (ID必须唯一)"
-                            )
-                        # 从完整URL中提取类型名称
-                        type_name = (
-                            rel_type.split("/")[-1] if "/" in rel_type else rel_type
-                        )
-                        rid_to_type[rid] = type_name
-
-                # 解析XML文件以查找所有r:id引用
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # 查找所有带有r:id属性的元素
-                for elem in xml_root.iter():
-                    # 检查r:id属性（关系ID）
-                    rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
-                    if rid_attr:
-                        xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                        elem_name = (
-                            elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-                        )
+            rels_files[xml_file] = self.package.parts[rels_name]
 
-                        # 检查ID是否存在
-                        if rid_attr not in rid_to_type:
-                            errors.append(
-                                f"  {xml_rel_path}: 第 {elem.sourceline} 行: "
-                                f"<{elem_name}> 引用了不存在的关系 '{rid_attr}' "
-                                f"(有效ID: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
-                            )
-                        # 检查是否对此元素有类型期望
-                        elif self.ELEMENT_RELATIONSHIP_TYPES:
-                            expected_type = self._get_expected_relationship_type(
-                                elem_name
-                            )
-                            if expected_type:
-                                actual_type = rid_to_type[rid_attr]
-                                # 检查实际类型是否匹配或包含预期类型
-                                if expected_type not in actual_type.lower():
-                                    errors.append(
-                                        f"  {xml_rel_path}: 第 {elem.sourceline} 行: "
-                                        f"<{elem_name}> 引用了 '{rid_attr}'，它指向 '{actual_type}' "
-                                        f"但应该指向 '{expected_type}' 类型的关系"
-                                    )
-
-            except Exception as e:
-                xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                errors.append(f"  处理 {xml_rel_path} 时出错: {e}")
+        for file_errors in self._map_parts(
+            "relationship_ids",
+            rels_files,
+            self._relationship_id_errors,
+            depends_on=lambda xml_file: [rels_files[xml_file]],
+        ):
+            errors.extend(file_errors)
 
         if errors:
             print(f"失败 - 发现 {len(errors)} 个关系ID引用错误:")
@@ -484,6 +749,72 @@ class BaseSchemaValidator:
                 print("通过 - 所有关系ID引用都有效")
             return True
 
+    def _relationship_id_errors(self, xml_file):
+        """返回单个XML文件中无效的r:id引用（对照其对应的.rels文件）。"""
+        errors = []
+        rels_name = self.package.find(
+            self.package.rels_part_for(self._part_name(xml_file))
+        )
+
+        try:
+            # 从包模型中获取有效的关系ID及其类型
+            rid_to_type = {}
+
+            for rel in self.package.relationships(rels_name):
+                rid = rel.id
+                if rid:
+                    # 检查重复的rId
+                    if rid in rid_to_type:
+                        errors.append(
+                            f"  {rels_name}: 第 {rel.line} 行: "
+                            f"重复的关系ID '{rid}' (ID必须唯一)"
+                        )
+                    # 从完整URL中提取类型名称
+                    type_name = (
+                        rel.type.split("/")[-1] if "/" in rel.type else rel.type
+                    )
+                    rid_to_type[rid] = type_name
+
+            # 解析XML文件以查找所有r:id引用
+            xml_root = self._parse_part(xml_file).getroot()
+
+            # 查找所有带有r:id属性的元素
+            for elem in xml_root.iter():
+                # 检查r:id属性（关系ID）
+                rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
+                if rid_attr:
+                    xml_rel_path = xml_file.relative_to(self.unpacked_dir)
+                    elem_name = (
+                        elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
+                    )
+
+                    # 检查ID是否存在
+                    if rid_attr not in rid_to_type:
+                        errors.append(
+                            f"  {xml_rel_path}: 第 {elem.sourceline} 行: "
+                            f"<{elem_name}> 引用了不存在的关系 '{rid_attr}' "
+                            f"(有效ID: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
+                        )
+                    # 检查是否对此元素有类型期望
+                    elif self.ELEMENT_RELATIONSHIP_TYPES:
+                        expected_type = self._get_expected_relationship_type(
+                            elem_name
+                        )
+                        if expected_type:
+                            actual_type = rid_to_type[rid_attr]
+                            # 检查实际类型是否匹配或包含预期类型
+                            if expected_type not in actual_type.lower():
+                                errors.append(
+                                    f"  {xml_rel_path}: 第 {elem.sourceline} 行: "
+                                    f"<{elem_name}> 引用了 '{rid_attr}'，它指向 '{actual_type}' "
+                                    f"但应该指向 '{expected_type}' 类型的关系"
+                                )
+
+        except Exception as e:
+            xml_rel_path = xml_file.relative_to(self.unpacked_dir)
+            errors.append(f"  处理 {xml_rel_path} 时出错: {e}")
+        return errors
+
     def _get_expected_relationship_type(self, element_name):
         """
         获取元素的预期关系类型。
@@ -525,32 +856,13 @@ class BaseSchemaValidator:
         errors = []
 
         # 查找[Content_Types].xml文件
-        content_types_file = self.unpacked_dir / "[Content_Types].xml"
-        if not content_types_file.exists():
+        if self.package.find(CONTENT_TYPES_PART) is None:
             print("失败 - 未找到[Content_Types].xml文件")
             return False
 
         try:
-            # 解析并获取所有声明的部分和扩展名
-            root = lxml.etree.parse(str(content_types_file)).getroot()
-            declared_parts = set()
-            declared_extensions = set()
-
-            # 获取Override声明（特定文件）
-            for override in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Override"
-            ):
-                part_name = override.get("PartName")
-                if part_name is not None:
-                    declared_parts.add(part_name.lstrip("/"))
-
-            # 获取Default声明（按扩展名）
-            for default in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Default"
-            ):
-                extension = default.get("Extension")
-                if extension is not None:
-                    declared_extensions.add(extension.lower())
+            # 获取所有声明的部分（Override，小写部件名）和扩展名（Default）
+            declared_parts, declared_extensions = self.package.content_types()
 
             # 需要声明内容类型的根元素
             declarable_roots = {
@@ -576,15 +888,10 @@ class BaseSchemaValidator:
                 "emf": "image/x-emf",
             }
 
-            # 获取解压目录中的所有文件
-            all_files = list(self.unpacked_dir.rglob("*"))
-            all_files = [f for f in all_files if f.is_file()]
-
             # 检查所有XML文件的Override声明
+            content_files = {}
             for xml_file in self.xml_files:
-                path_str = str(xml_file.relative_to(self.unpacked_dir)).replace(
-                    "\\", "/"
-                )
+                path_str = self._part_name(xml_file)
 
                 # 跳过非内容文件
                 if any(
@@ -593,35 +900,41 @@ class BaseSchemaValidator:
                 ):
                     continue
 
-                try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
-                    root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
-
-                    if root_name in declarable_roots and path_str not in declared_parts:
-                        errors.append(
-                            f"  {path_str}: 包含<{root_name}>根元素的文件未在[Content_Types].xml中声明"
-                        )
+                content_files[xml_file] = path_str
 
-                except Exception:
+            root_names = self._map_parts("root_name", content_files, self._root_name)
+            for path_str, root_name in zip(content_files.values(), root_names):
+                if root_name is None:
                     continue  # 跳过无法解析的文件
 
+                if (
+                    root_name in declarable_roots
+                    and path_str.lower() not in declared_parts
+                ):
+                    errors.append(
+                        f"  {path_str}: 包含<{root_name}>根元素的文件未在[Content_Types].xml中声明"
+                    )
+
             # 检查所有非XML文件的Default扩展名声明
-            for file_path in all_files:
+            for name in self.package.parts:
                 # 跳过XML文件和元数据文件（已在上面检查过）
-                if file_path.suffix.lower() in {".xml", ".rels"}:
+                directory, _, filename = name.rpartition("/")
+                extension = posixpath.splitext(filename)[1].lstrip(".").lower()
+                if extension in {"xml", "rels"}:
+                    continue
+                if filename == CONTENT_TYPES_PART:
                     continue
-                if file_path.name == "[Content_Types].xml":
+                if {"_rels", "docProps"} & set(directory.split("/")):
                     continue
-                if "_rels" in file_path.parts or "docProps" in file_path.parts:
+                # 单独声明了内容类型的部件不需要Default
+                if name.lower() in declared_parts:
                     continue
 
-                extension = file_path.suffix.lstrip(".").lower()
                 if extension and extension not in declared_extensions:
                     # 检查它是否是应声明的已知媒体扩展名
                     if extension in media_extensions:
-                        relative_path = file_path.relative_to(self.unpacked_dir)
                         errors.append(
-                            f'  {relative_path}: 扩展名 \'{extension}\' 的文件未在[Content_Types].xml中声明 - 应添加: <Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>'
+                            f'  {name}: 扩展名 \'{extension}\' 的文件未在[Content_Types].xml中声明 - 应添加: <Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>'
                         )
 
         except Exception as e:
@@ -639,6 +952,14 @@ class BaseSchemaValidator:
                 )
             return True
 
+    def _root_name(self, xml_file):
+        """返回XML文件根元素的本地名称，无法解析时返回None。"""
+        try:
+            root_tag = self._parse_part(xml_file).getroot().tag
+        except Exception:
+            return None
+        return root_tag.split("}")[-1] if "}" in root_tag else root_tag
+
     def validate_file_against_xsd(self, xml_file, verbose=False):
         """根据XSD模式验证单个XML文件，与原始文件比较。
 
@@ -693,11 +1014,9 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        results = self._map_parts("xsd", self.xml_files, self.validate_file_against_xsd)
+        for xml_file, (is_valid, new_file_errors) in zip(self.xml_files, results):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -766,10 +1085,10 @@ class BaseSchemaValidator:
     def _clean_ignorable_namespaces(self, xml_doc):
         """删除不在允许命名空间中的属性和元素。"""
         # 创建一个干净的副本
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
+        xml_copy = copy.deepcopy(xml_doc.getroot())
 
-        # 删除不在允许命名空间中的属性
+        # 一次遍历：删除不在允许命名空间中的属性，并收集要删除的元素
+        elements_to_remove = []
         for elem in xml_copy.iter():
             attrs_to_remove = []
 
@@ -784,34 +1103,18 @@ class BaseSchemaValidator:
             for attr in attrs_to_remove:
                 del elem.attrib[attr]
 
-        # 删除不在允许命名空间中的元素
-        self._remove_ignorable_elements(xml_copy)
-
-        return lxml.etree.ElementTree(xml_copy)
-
-    def _remove_ignorable_elements(self, root):
-        """递归删除所有不在允许命名空间中的元素。"""
-        elements_to_remove = []
-
-        # 查找要删除的元素
-        for elem in list(root):
-            # 跳过非元素节点（注释、处理指令等）
-            if not hasattr(elem, "tag") or callable(elem.tag):
+            # 跳过非元素节点（注释、处理指令等）和根元素
+            tag = elem.tag
+            if not isinstance(tag, str) or elem is xml_copy:
                 continue
+            if tag.startswith("{") and tag[1 : tag.index("}")] not in self.OOXML_NAMESPACES:
+                elements_to_remove.append(elem)
 
-            tag_str = str(elem.tag)
-            if tag_str.startswith("{"):
-                ns = tag_str.split("}")[0][1:]
-                if ns not in self.OOXML_NAMESPACES:
-                    elements_to_remove.append(elem)
-                    continue
-
-            # 递归清理子元素
-            self._remove_ignorable_elements(elem)
-
-        # 删除收集到的元素
+        # 删除收集到的元素（已随祖先删除的元素也可以安全地再删除一次）
         for elem in elements_to_remove:
-            root.remove(elem)
+            elem.getparent().remove(elem)
+
+        return lxml.etree.ElementTree(xml_copy)
 
     def _preprocess_for_mc_ignorable(self, xml_doc):
         """预处理XML以正确处理mc:Ignorable属性。"""
@@ -824,85 +1127,99 @@ class BaseSchemaValidator:
 
         return xml_doc
 
-    def _validate_single_file_xsd(self, xml_file, base_path):
-        """根据XSD模式验证单个XML文件。返回(is_valid, errors_set)。"""
+    def _validate_single_file_xsd(self, xml_file, base_path, content=None):
+        """根据XSD模式验证单个XML文件。返回(is_valid, errors_set)。
+
+        参数：
+            xml_file: 文件路径（用于确定模式；提供content时文件可以不存在）
+            base_path: 文档根目录
+            content: 文件内容的字节，为None时从xml_file读取
+        """
         schema_path = self._get_schema_path(xml_file)
         if not schema_path:
             return None, None  # 跳过文件
 
         try:
-            # 加载模式
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            # 加载模式（编译结果在进程内缓存）
+            schema = load_schema(schema_path)
 
             # 加载并预处理XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
-
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
-
-            # 必要时清理可忽略的命名空间
-            relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
-
-            # 验证
-            if schema.validate(xml_doc):
-                return True, set()
+            if content is None:
+                # 共享的树；下面的预处理在副本上进行
+                xml_doc = self._parse_part(xml_file)
             else:
-                errors = set()
-                for error in schema.error_log:
-                    # 存储标准化的错误消息（无行号以便比较）
-                    errors.add(error.message)
-                return False, errors
+                xml_doc = lxml.etree.parse(io.BytesIO(content))
+
+            xml_doc = self._prepare_for_xsd(xml_doc, xml_file.relative_to(base_path))
+            return self._schema_errors(schema, xml_doc)
 
         except Exception as e:
             return False, {str(e)}
 
+    def _prepare_for_xsd(self, xml_doc, relative_path):
+        """返回用于XSD验证的文档副本：移除模板标签、mc:Ignorable和可忽略的命名空间。
+
+        参数：
+            xml_doc: lxml树（不会被修改）
+            relative_path: 部件相对于文档根目录的路径
+        """
+        xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
+        xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+
+        # 如果需要，清理可忽略的命名空间
+        if (
+            relative_path.parts
+            and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
+        ):
+            xml_doc = self._clean_ignorable_namespaces(xml_doc)
+        return xml_doc
+
+    def _schema_errors(self, schema, xml_doc):
+        """用模式验证文档。返回(is_valid, errors_set)，错误消息中不含行号。"""
+        if schema.validate(xml_doc):
+            return True, set()
+        errors = set()
+        for error in schema.error_log:
+            # 移除错误消息中的行号信息，仅保留错误描述
+            normalized_msg = re.sub(r" line \d+:", ":", error.message)
+            errors.add(normalized_msg)
+        return False, errors
+
     def _get_original_file_errors(self, xml_file):
         """从原始文档中的单个文件获取XSD验证错误。
 
+        原始部件直接从原始文档读入内存，错误集合按部件名和内容哈希记忆。
+
         参数:
             xml_file: unpacked_dir中要检查的XML文件路径
 
         返回:
             set: 原始文件的错误消息集合
         """
-        import tempfile
-        import zipfile
-
         # 解析两个路径以处理符号链接（例如，macOS上的/var与/private/var）
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # 提取原始文件
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
-
-            # 在原始文件中查找对应的文件
-            original_xml_file = temp_path / relative_path
-
-            if not original_xml_file.exists():
-                # 文件在原始文档中不存在，因此没有原始错误
-                return set()
-
-            # 验证原始文件中的特定文件
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+        content = self.original.read(relative_path)
+        if content is None:
+            # 文件在原始文档中不存在，因此没有原始错误
+            return set()
+
+        key = ("original_xsd", relative_path.as_posix())
+        digest = hashlib.sha256(content).hexdigest()
+        cached = self._original_errors.get(key)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+        # 验证原始文件中的特定文件（路径只用于确定模式）
+        original_dir = self.original.path
+        is_valid, errors = self._validate_single_file_xsd(
+            original_dir / relative_path, original_dir, content=content
+        )
+        errors = errors if errors else set()
+        self._original_errors[key] = (digest, errors)
+        return errors
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         """从XML文本节点中删除模板标签并收集警告。
@@ -917,8 +1234,7 @@ class BaseSchemaValidator:
         template_pattern = re.compile(r"\{\{[^}]*\}\}")
 
         # 创建文档的副本以避免修改原始文档
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
+        xml_copy = copy.deepcopy(xml_doc.getroot())
 
         def process_text_content(text, content_type):
             if not text:
@@ -932,17 +1248,20 @@ class BaseSchemaValidator:
                 return template_pattern.sub("", text)
             return text
 
-        # 处理文档中的所有文本节点
-        for elem in xml_copy.iter():
-            # 如果这是w:t元素，则跳过处理
-            if not hasattr(elem, "tag") or callable(elem.tag):
+        # 处理文档中可能包含模板标签的文本节点
+        for text in xml_copy.xpath("descendant-or-self::node()/text()[contains(., '{{')]"):
+            elem = text.getparent()
+            # 跳过注释、处理指令和w:t元素（包括它们的尾部文本）
+            if callable(elem.tag):
                 continue
             tag_str = str(elem.tag)
             if tag_str.endswith("}t") or tag_str == "t":
                 continue
 
-            elem.text = process_text_content(elem.text, "文本内容")
-            elem.tail = process_text_content(elem.tail, "尾部内容")
+            if text.is_text:
+                elem.text = process_text_content(elem.text, "文本内容")
+            else:
+                elem.tail = process_text_content(elem.tail, "尾部内容")
 
         return lxml.etree.ElementTree(xml_copy), warnings
 
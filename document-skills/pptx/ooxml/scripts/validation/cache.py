@@ -0,0 +1,125 @@
+"""
+验证结果的持久缓存。
+
+反复验证同一个解压目录时（解包 → 编辑 → 验证 → 编辑 → 验证……），逐部件检查的结果
+保存在解压目录旁边的 .<目录名>.ooxml-validate-cache 中，内容未变化的部件不再重新检查。
+每个条目按部件的内容哈希失效；原始文件、验证器代码或XSD模式变化时整个缓存失效。
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .base import open_original
+
+# 缓存格式版本，条目格式变化时递增以丢弃旧缓存
+CACHE_VERSION = 1
+
+# 验证结果依赖的代码和模式：验证器源码目录和XSD模式目录
+VALIDATOR_DIR = Path(__file__).parent
+SCHEMAS_DIR = Path(__file__).parent.parent.parent / "schemas"
+
+
+class ValidationCache(dict):
+    """可在多次运行之间保存的验证结果缓存，作为验证器的cache参数传入。
+
+    使用方法：
+        cache = ValidationCache(unpacked_dir, original_file)
+        DOCXSchemaValidator(unpacked_dir, original_file, cache=cache).validate()
+        cache.save()
+    """
+
+    def __init__(self, unpacked_dir, original_file):
+        """
+        参数：
+            unpacked_dir: 已解压的文档目录
+            original_file: 原始Office文件、已解压的原始目录或OriginalPackage
+        """
+        super().__init__()
+        self.path = cache_path(unpacked_dir)
+        self.fingerprint = _fingerprint(open_original(original_file).path)
+        self.update(self._load())
+
+    def save(self):
+        """将缓存写入磁盘。部件内容哈希每次运行都重新计算，不保存。"""
+        entries = [
+            [name, part, value[0], _encode(value[1])]
+            for (name, part), value in self.items()
+            if name != "digest"
+        ]
+        data = {
+            "version": CACHE_VERSION,
+            "fingerprint": self.fingerprint,
+            "entries": entries,
+        }
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            temp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(temp_path, self.path)
+        except OSError:
+            # 缓存只用于加速，目录不可写时跳过
+            pass
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if (
+            data.get("version") != CACHE_VERSION
+            or data.get("fingerprint") != self.fingerprint
+        ):
+            return {}
+        return {
+            (name, part): (digest, _decode(value))
+            for name, part, digest, value in data.get("entries", [])
+        }
+
+
+def cache_path(unpacked_dir):
+    """缓存保存在解压目录旁边，避免被打包或验证为文档部件。"""
+    unpacked_dir = Path(unpacked_dir).resolve()
+    return unpacked_dir.parent / f".{unpacked_dir.name}.ooxml-validate-cache"
+
+
+def _fingerprint(original_path):
+    """返回原始文件、验证器源码和XSD模式的组合哈希。"""
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    _hash_path(digest, original_path)
+    for path in sorted(VALIDATOR_DIR.glob("*.py")):
+        _hash_path(digest, path)
+    for path in sorted(SCHEMAS_DIR.rglob("*.xsd")):
+        digest.update(path.relative_to(SCHEMAS_DIR).as_posix().encode())
+        _hash_path(digest, path)
+    return digest.hexdigest()
+
+
+def _hash_path(digest, path):
+    """将文件内容（目录则为其中所有文件的路径和内容）加入哈希。"""
+    path = Path(path)
+    if path.is_dir():
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(child.relative_to(path).as_posix().encode())
+            _hash_path(digest, child)
+        return
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+
+def _encode(value):
+    """将检查结果转换为JSON可表示的形式（集合排序后标记，元组转为列表）。"""
+    if isinstance(value, (set, frozenset)):
+        return {"set": sorted(_encode(v) for v in value)}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        return {_decode(v) for v in value["set"]}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
@@ -3,8 +3,6 @@
 """
 
 import re
-import tempfile
-import zipfile
 
 import lxml.etree
 
@@ -80,36 +78,9 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # 查找所有w:t元素
-                for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
-                    if elem.text:
-                        text = elem.text
-                        # 检查文本是否以空白开头或结尾
-                        if re.match(r"^\s.*", text) or re.match(r".*\s$", text):
-                            # 检查是否存在xml:space="preserve"属性
-                            xml_space_attr = f"{{{self.XML_NAMESPACE}}}space"
-                            if (
-                                xml_space_attr not in elem.attrib
-                                or elem.attrib[xml_space_attr] != "preserve"
-                            ):
-                                # 显示文本预览
-                                text_preview = (
-                                    repr(text)[:50] + "..."
-                                    if len(repr(text)) > 50
-                                    else repr(text)
-                                )
-                                errors.append(
-                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                    f"第 {elem.sourceline} 行: 带有空白的w:t元素缺少xml:space='preserve': {text_preview}"
-                                )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
-                )
+            errors.extend(
+                self._check_part("whitespace", xml_file, self._whitespace_errors)
+            )
 
         if errors:
             print(f"失败 - 发现 {len(errors)} 处空白保留违规:")
@@ -121,6 +92,41 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 print("通过 - 所有空白都已正确保留")
             return True
 
+    def _whitespace_errors(self, xml_file):
+        """返回单个document.xml中缺少xml:space='preserve'的w:t元素。"""
+        errors = []
+        try:
+            root = self._parse_part(xml_file).getroot()
+
+            # 查找所有w:t元素
+            for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
+                if elem.text:
+                    text = elem.text
+                    # 检查文本是否以空白开头或结尾
+                    if re.match(r"^\s.*", text) or re.match(r".*\s$", text):
+                        # 检查是否存在xml:space="preserve"属性
+                        xml_space_attr = f"{{{self.XML_NAMESPACE}}}space"
+                        if (
+                            xml_space_attr not in elem.attrib
+                            or elem.attrib[xml_space_attr] != "preserve"
+                        ):
+                            # 显示文本预览
+                            text_preview = (
+                                repr(text)[:50] + "..."
+                                if len(repr(text)) > 50
+                                else repr(text)
+                            )
+                            errors.append(
+                                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                f"第 {elem.sourceline} 行: 带有空白的w:t元素缺少xml:space='preserve': {text_preview}"
+                            )
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            errors.append(
+                f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
+            )
+        return errors
+
     def validate_deletions(self):
         """
         验证w:t元素不位于w:del元素内部。
@@ -133,32 +139,9 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # 查找所有作为w:del元素后代的w:t元素
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-                xpath_expression = ".//w:del//w:t"
-                problematic_t_elements = root.xpath(
-                    xpath_expression, namespaces=namespaces
-                )
-                for t_elem in problematic_t_elements:
-                    if t_elem.text:
-                        # 显示文本预览
-                        text_preview = (
-                            repr(t_elem.text)[:50] + "..."
-                            if len(repr(t_elem.text)) > 50
-                            else repr(t_elem.text)
-                        )
-                        errors.append(
-                            f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                            f"第 {t_elem.sourceline} 行: <w:t> 元素位于 <w:del> 元素内部: {text_preview}"
-                        )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
-                )
+            errors.extend(
+                self._check_part("deletions", xml_file, self._deletion_errors)
+            )
 
         if errors:
             print(f"失败 - 发现 {len(errors)} 处删除验证违规:")
@@ -170,6 +153,37 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 print("通过 - 未发现w:t元素位于w:del元素内部")
             return True
 
+    def _deletion_errors(self, xml_file):
+        """返回单个document.xml中位于w:del内的w:t元素。"""
+        errors = []
+        try:
+            root = self._parse_part(xml_file).getroot()
+
+            # 查找所有作为w:del元素后代的w:t元素
+            namespaces = {"w": self.WORD_2006_NAMESPACE}
+            xpath_expression = ".//w:del//w:t"
+            problematic_t_elements = root.xpath(
+                xpath_expression, namespaces=namespaces
+            )
+            for t_elem in problematic_t_elements:
+                if t_elem.text:
+                    # 显示文本预览
+                    text_preview = (
+                        repr(t_elem.text)[:50] + "..."
+                        if len(repr(t_elem.text)) > 50
+                        else repr(t_elem.text)
+                    )
+                    errors.append(
+                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                        f"第 {t_elem.sourceline} 行: <w:t> 元素位于 <w:del> 元素内部: {text_preview}"
+                    )
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            errors.append(
+                f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
+            )
+        return errors
+
     def count_paragraphs_in_unpacked(self):
         """计算解压文档中的段落数量。"""
         count = 0
@@ -179,38 +193,49 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                # 计算所有w:p元素
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
-            except Exception as e:
-                print(f"计算解压文档中的段落数时出错: {e}")
+            file_count = self._check_part(
+                "paragraphs", xml_file, self._count_paragraphs
+            )
+            if file_count is not None:
+                count = file_count
 
         return count
 
+    def _count_paragraphs(self, xml_file):
+        """计算单个document.xml中的段落数量，出错时返回None。"""
+        try:
+            root = self._parse_part(xml_file).getroot()
+            # 计算所有w:p元素
+            paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
+            return len(paragraphs)
+        except Exception as e:
+            print(f"计算解压文档中的段落数时出错: {e}")
+            return None
+
     def count_paragraphs_in_original(self):
         """计算原始docx文件中的段落数量。"""
+        # 原始文件在共享缓存的多次验证之间不变
+        if self.cache is not None and ("original_paragraphs", "") in self.cache:
+            return self.cache[("original_paragraphs", "")][1]
+
         count = 0
 
         try:
-            # 创建临时目录来解压原始文件
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 解压原始docx文件
-                with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                # 解析document.xml
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
+            # 直接从原始文档读取document.xml
+            content = self.original.read("word/document.xml")
+            if content is None:
+                raise FileNotFoundError("word/document.xml")
+            root = lxml.etree.fromstring(content)
 
-                # 计算所有w:p元素
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+            # 计算所有w:p元素
+            paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
+            count = len(paragraphs)
 
         except Exception as e:
             print(f"计算原始文档中的段落数时出错: {e}")
 
+        if self.cache is not None:
+            self.cache[("original_paragraphs", "")] = (None, count)
         return count
 
     def validate_insertions(self):
@@ -224,31 +249,9 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             if xml_file.name != "document.xml":
                 continue
 
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-                # 查找位于w:ins元素内部但不在w:del元素内部的w:delText元素
-                invalid_elements = root.xpath(
-                    ".//w:ins//w:delText[not(ancestor::w:del)]",
-                    namespaces=namespaces
-                )
-
-                for elem in invalid_elements:
-                    text_preview = (
-                        repr(elem.text or "")[:50] + "..."
-                        if len(repr(elem.text or "")) > 50
-                        else repr(elem.text or "")
-                    )
-                    errors.append(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"第 {elem.sourceline} 行: <w:delText> 位于 <w:ins> 内部: {text_preview}"
-                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
-                )
+            errors.extend(
+                self._check_part("insertions", xml_file, self._insertion_errors)
+            )
 
         if errors:
             print(f"失败 - 发现 {len(errors)} 处插入验证违规:")
@@ -260,6 +263,36 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 print("通过 - 未发现w:delText元素位于w:ins元素内部")
             return True
 
+    def _insertion_errors(self, xml_file):
+        """返回单个document.xml中位于w:ins内（且不在w:del内）的w:delText元素。"""
+        errors = []
+        try:
+            root = self._parse_part(xml_file).getroot()
+            namespaces = {"w": self.WORD_2006_NAMESPACE}
+
+            # 查找位于w:ins元素内部但不在w:del元素内部的w:delText元素
+            invalid_elements = root.xpath(
+                ".//w:ins//w:delText[not(ancestor::w:del)]",
+                namespaces=namespaces
+            )
+
+            for elem in invalid_elements:
+                text_preview = (
+                    repr(elem.text or "")[:50] + "..."
+                    if len(repr(elem.text or "")) > 50
+                    else repr(elem.text or "")
+                )
+                errors.append(
+                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                    f"第 {elem.sourceline} 行: <w:delText> 位于 <w:ins> 内部: {text_preview}"
+                )
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            errors.append(
+                f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
+            )
+        return errors
+
     def compare_paragraph_counts(self):
         """比较原始文档和新文档之间的段落数。"""
         original_count = self.count_paragraphs_in_original()
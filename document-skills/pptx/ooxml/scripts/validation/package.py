@@ -0,0 +1,265 @@
+"""
+文档包的部件来源和包模型。
+
+部件来源（PackageSource）按部件名读取已解压目录中的文件或Office文件（zip）中的成员，
+后者直接从zip流式读取，不解压到磁盘。包模型（PackageModel）在其上只列举一次部件，
+并在第一次使用时解析各.rels文件和[Content_Types].xml；文件引用、关系ID和内容类型
+检查都在此模型上做集合查找，不再逐个访问文件系统。
+"""
+
+import os
+import posixpath
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+
+import lxml.etree
+
+RELATIONSHIPS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/content-types"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+# .rels文件中的一条关系
+#   part: 目标解析后的部件名（不在包中时为None）；外部目标为None
+#   line: Relationship元素所在的行号
+Relationship = namedtuple(
+    "Relationship", ["id", "type", "target", "external", "part", "line"]
+)
+
+
+class PackageSource:
+    """按部件名读取文档包内容的只读来源。
+
+    部件名是相对于包根目录的POSIX路径（例如"word/document.xml"）。
+    子类实现names和open；可用作上下文管理器，退出时关闭底层文件。
+    """
+
+    def __init__(self, path):
+        """
+        参数：
+            path: 已解压的文档目录或Office文件(.docx/.pptx/.xlsx)
+        """
+        self.path = Path(path)
+
+    def names(self):
+        """返回包中所有部件的名称。"""
+        raise NotImplementedError("子类必须实现names方法")
+
+    def open(self, name):
+        """以二进制流打开部件，部件不存在时返回None。"""
+        raise NotImplementedError("子类必须实现open方法")
+
+    def read(self, name):
+        """返回部件内容的字节，部件不存在时返回None。"""
+        stream = self.open(name)
+        if stream is None:
+            return None
+        with stream:
+            return stream.read()
+
+    def parse(self, name):
+        """解析XML部件并返回lxml树，部件不存在时抛出FileNotFoundError。"""
+        stream = self.open(name)
+        if stream is None:
+            raise FileNotFoundError(f"{self.path / name}")
+        with stream:
+            return lxml.etree.parse(stream, base_url=str(self.path / name))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DirectorySource(PackageSource):
+    """已解压文档目录中的部件。"""
+
+    def names(self):
+        # 一次目录扫描得到所有部件
+        return [
+            (Path(dirpath) / filename).relative_to(self.path).as_posix()
+            for dirpath, _, filenames in os.walk(self.path)
+            for filename in filenames
+        ]
+
+    def open(self, name):
+        try:
+            return open(self.path / name, "rb")
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+
+    def parse(self, name):
+        # 按文件名解析，由libxml2直接读取文件
+        return lxml.etree.parse(str(self.path / name))
+
+
+class ZipSource(PackageSource):
+    """Office文件（zip）中的部件，按需从zip中流式解压，不写入磁盘。
+
+    zip在第一次读取时打开，部件名来自zip的中央目录。
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._zip = None
+        self._names = None
+
+    def _open_zip(self):
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.path, "r")
+            self._names = {
+                info.filename for info in self._zip.infolist() if not info.is_dir()
+            }
+        return self._zip
+
+    def names(self):
+        self._open_zip()
+        return list(self._names)
+
+    def open(self, name):
+        archive = self._open_zip()
+        if name not in self._names:
+            return None
+        return archive.open(name)
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+            self._names = None
+
+
+def open_source(package):
+    """返回文档包的部件来源：目录使用DirectorySource，文件使用ZipSource。
+
+    传入的已经是PackageSource时原样返回。
+    """
+    if isinstance(package, PackageSource):
+        return package
+    package = Path(package)
+    if package.is_dir():
+        return DirectorySource(package)
+    return ZipSource(package)
+
+
+class PackageModel:
+    """文档包的部件、关系和内容类型。
+
+    部件名是相对于包根目录的POSIX路径（例如"word/document.xml"）。按照OPC规范，
+    部件名查找不区分大小写。
+    """
+
+    def __init__(self, source, parse=None):
+        """
+        参数：
+            source: PackageSource，或已解压的文档目录/Office文件路径
+            parse: 解析部件路径并返回lxml树的函数（验证器传入_parse_part以共享解析结果）；
+                   默认通过source解析
+        """
+        self.source = open_source(source)
+        self.root = self.source.path.resolve()
+        self._parse = parse or (
+            lambda path: self.source.parse(path.relative_to(self.root).as_posix())
+        )
+
+        # 只列举一次部件：部件名 → 路径（zip中的部件为包文件下的虚拟路径）
+        self.parts = {name: self.root / name for name in sorted(self.source.names())}
+        self._names = {name.lower(): name for name in self.parts}
+
+        self._relationships = {}
+        self._content_types = None
+
+    def find(self, name):
+        """返回包中与name匹配（不区分大小写）的部件名，不存在时返回None。"""
+        return self._names.get(name.lower())
+
+    @property
+    def rels_parts(self):
+        """所有.rels部件的名称。"""
+        return [name for name in self.parts if name.endswith(".rels")]
+
+    @staticmethod
+    def rels_part_for(name):
+        """返回部件对应的.rels部件名：dir/file.xml → dir/_rels/file.xml.rels。"""
+        directory, filename = posixpath.split(name)
+        return posixpath.join(directory, "_rels", f"{filename}.rels")
+
+    @staticmethod
+    def source_directory(rels_name):
+        """返回.rels中相对目标的基准目录（包根目录为""）。
+
+        例如 word/_rels/document.xml.rels 的目标相对于 word/，_rels/.rels 的目标相对于包根目录。
+        """
+        return posixpath.dirname(posixpath.dirname(rels_name))
+
+    def relationships(self, rels_name):
+        """返回.rels部件中的关系列表（按文档顺序），解析失败时抛出解析异常。"""
+        relationships = self._relationships.get(rels_name)
+        if relationships is not None:
+            return relationships
+
+        root = self._parse(self.parts[rels_name]).getroot()
+        base = self.source_directory(rels_name)
+        relationships = []
+        for rel in root.iter(f"{{{RELATIONSHIPS_NAMESPACE}}}Relationship"):
+            target = rel.get("Target") or ""
+            external = rel.get("TargetMode") == "External" or target.startswith(
+                ("http", "mailto:")
+            )
+            part = None
+            if target and not external:
+                part = self.find(self._resolve(base, target))
+            relationships.append(
+                Relationship(
+                    rel.get("Id"),
+                    rel.get("Type", ""),
+                    target,
+                    external,
+                    part,
+                    rel.sourceline,
+                )
+            )
+        self._relationships[rels_name] = relationships
+        return relationships
+
+    @staticmethod
+    def _resolve(base, target):
+        """将关系目标解析为部件名；以"/"开头的目标相对于包根目录。"""
+        if target.startswith("/"):
+            path = target.lstrip("/")
+        else:
+            path = posixpath.join(base, target)
+        path = posixpath.normpath(path)
+        return "" if path == "." else path
+
+    def content_types(self):
+        """返回(overrides, defaults)：小写部件名 → 内容类型，小写扩展名 → 内容类型。
+
+        [Content_Types].xml不存在时抛出FileNotFoundError，解析失败时抛出解析异常。
+        """
+        if self._content_types is not None:
+            return self._content_types
+
+        name = self.find(CONTENT_TYPES_PART)
+        if name is None:
+            raise FileNotFoundError(CONTENT_TYPES_PART)
+        root = self._parse(self.parts[name]).getroot()
+
+        overrides = {}
+        for override in root.iter(f"{{{CONTENT_TYPES_NAMESPACE}}}Override"):
+            part_name = override.get("PartName")
+            if part_name is not None:
+                overrides[part_name.lstrip("/").lower()] = override.get("ContentType")
+
+        defaults = {}
+        for default in root.iter(f"{{{CONTENT_TYPES_NAMESPACE}}}Default"):
+            extension = default.get("Extension")
+            if extension is not None:
+                defaults[extension.lower()] = default.get("ContentType")
+
+        self._content_types = (overrides, defaults)
+        return self._content_types
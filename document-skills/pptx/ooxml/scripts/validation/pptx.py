@@ -2,6 +2,7 @@
 针对XSD模式的PowerPoint演示文稿XML文件验证器。
 """
 
+import posixpath
 import re
 
 from .base import BaseSchemaValidator
@@ -76,37 +77,11 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
     def validate_uuid_ids(self):
         """验证看起来像UUID的ID属性只包含十六进制值。"""
-        import lxml.etree
-
         errors = []
-        # UUID模式: 8-4-4-4-12的十六进制数字，可选的大括号/连字符
-        uuid_pattern = re.compile(
-            r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
-        )
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # 检查所有元素的ID属性
-                for elem in root.iter():
-                    for attr, value in elem.attrib.items():
-                        # 检查是否为ID属性
-                        attr_name = attr.split("}")[-1].lower()
-                        if attr_name == "id" or attr_name.endswith("id"):
-                            # 检查值是否看起来像UUID（具有正确的长度和模式结构）
-                            if self._looks_like_uuid(value):
-                                # 验证它在正确的位置只包含十六进制字符
-                                if not uuid_pattern.match(value):
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"第 {elem.sourceline} 行: ID '{value}' 看起来像UUID，但包含无效的十六进制字符"
-                                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
-                )
+        for file_errors in self._map_parts(
+            "uuid_ids", self.xml_files, self._uuid_id_errors
+        ):
+            errors.extend(file_errors)
 
         if errors:
             print(f"失败 - 发现 {len(errors)} 处UUID ID验证错误:")
@@ -118,6 +93,40 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                 print("通过 - 所有类似UUID的ID都包含有效的十六进制值")
             return True
 
+    def _uuid_id_errors(self, xml_file):
+        """返回单个文件中看起来像UUID但包含无效十六进制字符的ID。"""
+        import lxml.etree
+
+        errors = []
+        # UUID模式: 8-4-4-4-12的十六进制数字，可选的大括号/连字符
+        uuid_pattern = re.compile(
+            r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
+        )
+
+        try:
+            root = self._parse_part(xml_file).getroot()
+
+            # 检查所有元素的ID属性
+            for elem in root.iter():
+                for attr, value in elem.attrib.items():
+                    # 检查是否为ID属性
+                    attr_name = attr.split("}")[-1].lower()
+                    if attr_name == "id" or attr_name.endswith("id"):
+                        # 检查值是否看起来像UUID（具有正确的长度和模式结构）
+                        if self._looks_like_uuid(value):
+                            # 验证它在正确的位置只包含十六进制字符
+                            if not uuid_pattern.match(value):
+                                errors.append(
+                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                    f"第 {elem.sourceline} 行: ID '{value}' 看起来像UUID，但包含无效的十六进制字符"
+                                )
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            errors.append(
+                f"  {xml_file.relative_to(self.unpacked_dir)}: 错误: {e}"
+            )
+        return errors
+
     def _looks_like_uuid(self, value):
         """检查值是否具有UUID的一般结构。"""
         # 移除常见的UUID分隔符
@@ -125,6 +134,15 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         # 检查是否为32个类似十六进制的字符（可能包含无效的十六进制字符）
         return len(clean_value) == 32 and all(c.isalnum() for c in clean_value)
 
+    def _slide_rels_parts(self):
+        """返回所有幻灯片的.rels部件名（ppt/slides/_rels/*.xml.rels）。"""
+        return [
+            name
+            for name in self.package.rels_parts
+            if posixpath.dirname(name) == "ppt/slides/_rels"
+            and name.endswith(".xml.rels")
+        ]
+
     def validate_slide_layout_ids(self):
         """验证幻灯片母版中的sldLayoutId元素引用有效的幻灯片布局。"""
         import lxml.etree
@@ -132,7 +150,11 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         errors = []
 
         # 查找所有幻灯片母版文件
-        slide_masters = list(self.unpacked_dir.glob("ppt/slideMasters/*.xml"))
+        slide_masters = [
+            name
+            for name in self.package.parts
+            if posixpath.dirname(name) == "ppt/slideMasters" and name.endswith(".xml")
+        ]
 
         if not slide_masters:
             if self.verbose:
@@ -142,29 +164,24 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         for slide_master in slide_masters:
             try:
                 # 解析幻灯片母版文件
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                root = self._parse_part(self.package.parts[slide_master]).getroot()
 
                 # 查找此幻灯片母版对应的_rels文件
-                rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
+                rels_file = self.package.rels_part_for(slide_master)
 
-                if not rels_file.exists():
+                if self.package.find(rels_file) is None:
                     errors.append(
-                        f"  {slide_master.relative_to(self.unpacked_dir)}: "
-                        f"缺少关系文件: {rels_file.relative_to(self.unpacked_dir)}"
+                        f"  {slide_master}: "
+                        f"缺少关系文件: {rels_file}"
                     )
                     continue
 
-                # 解析关系文件
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
                 # 构建指向幻灯片布局的有效关系ID集合
-                valid_layout_rids = set()
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "slideLayout" in rel_type:
-                        valid_layout_rids.add(rel.get("Id"))
+                valid_layout_rids = {
+                    rel.id
+                    for rel in self.package.relationships(self.package.find(rels_file))
+                    if "slideLayout" in rel.type
+                }
 
                 # 查找幻灯片母版中的所有sldLayoutId元素
                 for sld_layout_id in root.findall(
@@ -177,14 +194,14 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
                     if r_id and r_id not in valid_layout_rids:
                         errors.append(
-                            f"  {slide_master.relative_to(self.unpacked_dir)}: "
+                            f"  {slide_master}: "
                             f"第 {sld_layout_id.sourceline} 行: sldLayoutId with id='{layout_id}' "
                             f"引用了未在幻灯片布局关系中找到的r:id='{r_id}'"
                         )
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
                 errors.append(
-                    f"  {slide_master.relative_to(self.unpacked_dir)}: 错误: {e}"
+                    f"  {slide_master}: 错误: {e}"
                 )
 
         if errors:
@@ -202,32 +219,24 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
     def validate_no_duplicate_slide_layouts(self):
         """验证每个幻灯片恰好有一个slideLayout引用。"""
-        import lxml.etree
-
         errors = []
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
-
-        for rels_file in slide_rels_files:
+        for rels_file in self._slide_rels_parts():
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
                 # 查找所有slideLayout关系
                 layout_rels = [
                     rel
-                    for rel in root.findall(
-                        f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                    )
-                    if "slideLayout" in rel.get("Type", "")
+                    for rel in self.package.relationships(rels_file)
+                    if "slideLayout" in rel.type
                 ]
 
                 if len(layout_rels) > 1:
                     errors.append(
-                        f"  {rels_file.relative_to(self.unpacked_dir)}: 有 {len(layout_rels)} 个slideLayout引用"
+                        f"  {rels_file}: 有 {len(layout_rels)} 个slideLayout引用"
                     )
 
             except Exception as e:
                 errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: 错误: {e}"
+                    f"  {rels_file}: 错误: {e}"
                 )
 
         if errors:
@@ -248,7 +257,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         notes_slide_references = {}  # 跟踪每个notesSlide被哪些幻灯片引用
 
         # 查找所有幻灯片关系文件
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
+        slide_rels_files = self._slide_rels_parts()
 
         if not slide_rels_files:
             if self.verbose:
@@ -257,34 +266,26 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for rels_file in slide_rels_files:
             try:
-                # 解析关系文件
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
                 # 查找所有notesSlide关系
-                for rel in root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "notesSlide" in rel_type:
-                        target = rel.get("Target", "")
-                        if target:
-                            # 规范化目标路径以处理相对路径
-                            normalized_target = target.replace("../", "")
-
-                            # 跟踪哪个幻灯片引用了此notesSlide
-                            slide_name = rels_file.stem.replace(
-                                ".xml", ""
-                            )  # 例如，"slide1"
-
-                            if normalized_target not in notes_slide_references:
-                                notes_slide_references[normalized_target] = []
-                            notes_slide_references[normalized_target].append(
-                                (slide_name, rels_file)
-                            )
+                for rel in self.package.relationships(rels_file):
+                    if "notesSlide" in rel.type and rel.target:
+                        # 使用解析后的部件名，使不同写法的相对路径指向同一个notesSlide
+                        normalized_target = rel.part or rel.target
+
+                        # 跟踪哪个幻灯片引用了此notesSlide
+                        slide_name = posixpath.basename(rels_file).replace(
+                            ".xml.rels", ""
+                        )  # 例如，"slide1"
+
+                        if normalized_target not in notes_slide_references:
+                            notes_slide_references[normalized_target] = []
+                        notes_slide_references[normalized_target].append(
+                            (slide_name, rels_file)
+                        )
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
                 errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: 错误: {e}"
+                    f"  {rels_file}: 错误: {e}"
                 )
 
         # 检查重复引用
@@ -295,7 +296,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                     f"  备注幻灯片 '{target}' 被多个幻灯片引用: {', '.join(slide_names)}"
                 )
                 for slide_name, rels_file in references:
-                    errors.append(f"    - {rels_file.relative_to(self.unpacked_dir)}")
+                    errors.append(f"    - {rels_file}")
 
         if errors:
             print(
@@ -2,119 +2,240 @@
 Word文档中修订跟踪的验证器。
 """
 
-import subprocess
-import tempfile
-import zipfile
-from pathlib import Path
+import difflib
+import hashlib
+import itertools
+import os
+import re
+
+import lxml.etree
+
+from .base import open_original
+from .package import open_source
 
 
 class RedliningValidator:
     """Word文档中修订跟踪的验证器。"""
 
-    def __init__(self, unpacked_dir, original_docx, verbose=False):
-        self.unpacked_dir = Path(unpacked_dir)
-        self.original_docx = Path(original_docx)
+    # 修订记录验证只依赖这个部件
+    DOCUMENT_PART = "word/document.xml"
+
+    # 按单词比较后，不超过此字符数的替换再逐字符细分
+    CHAR_DIFF_LIMIT = 200
+    # 超过此字符数的变化块不再细分，整块显示为删除和插入
+    WORD_DIFF_LIMIT = 100000
+    # 比较单位：单词、中日韩文字的单个字符和其他单个字符
+    WORD_CHARACTER = re.compile(r"[^\W\u2e80-\u9fff\uac00-\ud7af]")
+    WORD_PATTERN = re.compile(r"[^\W\u2e80-\u9fff\uac00-\ud7af]+|.", re.DOTALL)
+
+    # 文本不匹配时，从第一个不匹配的段落开始最多比较这么多个段落
+    MAX_DIFF_PARAGRAPHS = 200
+
+    def __init__(
+        self, unpacked_dir, original_docx, verbose=False, cache=None, author="Claude"
+    ):
+        """
+        参数：
+            unpacked_dir: 已解压的文档目录、docx文件(直接从zip中读取)或PackageSource
+            original_docx: 原始docx文件、已解压的原始目录或OriginalPackage
+            verbose: 启用详细输出
+            cache: 验证结果缓存字典，可与BaseSchemaValidator共享（需使用同一原始文件）
+            author: 要验证其修订记录的作者（默认: "Claude"）
+        """
+        self.source = open_source(unpacked_dir)
+        self.unpacked_dir = self.source.path
+        self.original = open_original(original_docx)
+        self.original_docx = self.original.path
         self.verbose = verbose
+        self.cache = cache
+        self.author = author
+        # 本次验证通过时输出的消息（与结果一起缓存）
+        self._passed_message = None
         self.namespaces = {
             "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
         }
 
     def validate(self):
-        """主要验证方法，如果有效返回True，否则返回False。"""
+        """主要验证方法，如果有效返回True，否则返回False。
+
+        使用缓存时，document.xml的内容与上次通过验证时相同则直接返回True，
+        并输出缓存的通过消息，使输出与是否命中缓存无关。
+        失败的结果不缓存，以便再次输出详细信息。
+        """
+        if self.cache is None:
+            return self._validate_document()
+        content = self.source.read(self.DOCUMENT_PART)
+        if content is None:
+            return self._validate_document()
+
+        key = (f"redlining:{self.author}", self.DOCUMENT_PART)
+        digest = hashlib.sha256(content).hexdigest()
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == digest:
+            if self.verbose:
+                # 未输出消息的验证（verbose=False）不会记录消息，此时重新判断
+                message = cached[1] or self._pass_message()
+                self.cache[key] = (digest, message)
+                print(message)
+            return True
+
+        self._passed_message = None
+        if not self._validate_document():
+            self.cache.pop(key, None)
+            return False
+        self.cache[key] = (digest, self._passed_message)
+        return True
+
+    def _validate_document(self):
         # 验证解压目录存在且结构正确
-        modified_file = self.unpacked_dir / "word" / "document.xml"
-        if not modified_file.exists():
+        modified_stream = self.source.open(self.DOCUMENT_PART)
+        if modified_stream is None:
+            modified_file = self.unpacked_dir / "word" / "document.xml"
             print(f"失败 - 修改后的document.xml未在{modified_file}找到")
             return False
 
-        # 首先，检查是否有Claude的修订需要验证
+        # 直接从原始文档流式读取document.xml（已解压的目录直接读取文件）
         try:
-            import xml.etree.ElementTree as ET
-
-            tree = ET.parse(modified_file)
-            root = tree.getroot()
-
-            # 检查由Claude创作的w:del或w:ins标签
-            del_elements = root.findall(".//w:del", self.namespaces)
-            ins_elements = root.findall(".//w:ins", self.namespaces)
-
-            # 过滤只包含Claude的修改
-            claude_del_elements = [
-                elem
-                for elem in del_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == "Claude"
-            ]
-            claude_ins_elements = [
-                elem
-                for elem in ins_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == "Claude"
-            ]
-
-            # 只有当使用了Claude的修订时，才需要进行修订验证。
-            if not claude_del_elements and not claude_ins_elements:
-                if self.verbose:
-                    print("通过 - 未找到Claude的修订。")
-                return True
-
-        except Exception:
-            # 如果无法解析XML，继续进行完整验证
-            pass
-
-        # 创建临时目录用于解压原始docx
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # 解压原始docx
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"失败 - 解压原始docx时出错: {e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
-                print(
-                    f"失败 - 原始document.xml未在{self.original_docx}中找到"
+            original_stream = self.original.open(self.DOCUMENT_PART)
+        except Exception as e:
+            modified_stream.close()
+            print(f"失败 - 读取原始docx时出错: {e}")
+            return False
+
+        if original_stream is None:
+            modified_stream.close()
+            print(
+                f"失败 - 原始document.xml未在{self.original_docx}中找到"
+            )
+            return False
+
+        # 逐段比较移除该作者的修订记录后的文本，遇到第一个不匹配的段落即停止
+        try:
+            with original_stream, modified_stream:
+                original_paragraphs = self._iter_paragraph_texts(original_stream)
+                modified_paragraphs = self._iter_paragraph_texts(modified_stream)
+                for original_text, modified_text in itertools.zip_longest(
+                    original_paragraphs, modified_paragraphs
+                ):
+                    if original_text != modified_text:
+                        break
+                else:
+                    if self.verbose:
+                        self._passed_message = self._pass_message()
+                        print(self._passed_message)
+                    return True
+
+                # 从第一个不匹配的段落开始，收集有限数量的段落用于差异报告
+                original_window = self._diff_window(
+                    original_text, original_paragraphs
+                )
+                modified_window = self._diff_window(
+                    modified_text, modified_paragraphs
                 )
-                return False
-
-            # 使用xml.etree.ElementTree解析两个XML文件以进行修订验证
-            try:
-                import xml.etree.ElementTree as ET
-
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
-            except ET.ParseError as e:
-                print(f"失败 - 解析XML文件时出错: {e}")
-                return False
-
-            # 从两个文档中移除Claude的修订
-            self._remove_claude_tracked_changes(original_root)
-            self._remove_claude_tracked_changes(modified_root)
-
-            # 提取并比较文本内容
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
-
-            if modified_text != original_text:
-                # 显示每个段落的详细字符级差异
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
+                truncated = (
+                    next(original_paragraphs, None) is not None
+                    or next(modified_paragraphs, None) is not None
                 )
-                print(error_message)
-                return False
+        except lxml.etree.XMLSyntaxError as e:
+            print(f"失败 - 解析XML文件时出错: {e}")
+            return False
 
+        # 只有当使用了该作者的修订时，才需要进行修订验证。
+        if not self._has_author_changes():
+            self._passed_message = f"通过 - 未找到{self.author}的修订。"
             if self.verbose:
-                print("通过 - Claude的所有修改都已正确跟踪")
+                print(self._passed_message)
             return True
 
+        # 显示每个段落的详细字符级差异
+        error_message = self._generate_detailed_diff(
+            "\n".join(original_window), "\n".join(modified_window)
+        )
+        print(error_message)
+        if truncated:
+            print(
+                f"（仅比较了从第一个不匹配段落开始的 {self.MAX_DIFF_PARAGRAPHS} 个段落）"
+            )
+        return False
+
+    def _pass_message(self):
+        if self._has_author_changes():
+            return f"通过 - {self.author}的所有修改都已正确跟踪"
+        return f"通过 - 未找到{self.author}的修订。"
+
+    def _diff_window(self, first, paragraphs):
+        """返回从first开始、最多MAX_DIFF_PARAGRAPHS个段落的列表。"""
+        window = [] if first is None else [first]
+        window.extend(
+            itertools.islice(paragraphs, self.MAX_DIFF_PARAGRAPHS - len(window))
+        )
+        return window
+
+    def _has_author_changes(self):
+        """在修改后的document.xml中流式查找该作者创作的w:ins或w:del，找到第一个即返回True。
+
+        无法解析的文件视为包含修订记录，以便进行完整验证。
+        """
+        w = self.namespaces["w"]
+        p_tag = f"{{{w}}}p"
+        author_attr = f"{{{w}}}author"
+        try:
+            with self.source.open(self.DOCUMENT_PART) as stream:
+                tags = [p_tag, f"{{{w}}}ins", f"{{{w}}}del"]
+                for _, elem in self._iterparse(stream, tags):
+                    if elem.tag == p_tag:
+                        self._release(elem)
+                    elif elem.get(author_attr) == self.author:
+                        return True
+        except lxml.etree.XMLSyntaxError:
+            return True
+        return False
+
+    def _iter_paragraph_texts(self, stream):
+        """逐个返回文档中非空段落的文本，忽略该作者插入的内容、恢复该作者删除的内容。
+
+        结果与移除作者的修订记录后，按文档顺序提取每个w:p（包括嵌套段落，
+        外层段落的文本包含嵌套段落的文本）中所有w:t的文本相同。
+        基于iterparse读取，顶层段落处理完即释放，内存占用与文档大小无关。
+        """
+        w = self.namespaces["w"]
+        p_tag = f"{{{w}}}p"
+        # 不在该作者的w:ins中的w:t，以及该作者删除（且不在其插入中）的w:delText
+        paragraph_text = lxml.etree.XPath(
+            ".//w:t[not(ancestor::w:ins[@w:author=$author])]/text()"
+            " | .//w:delText[ancestor::w:del[@w:author=$author]]"
+            "[not(ancestor::w:ins[@w:author=$author])]/text()",
+            namespaces=self.namespaces,
+        )
+
+        for _, elem in self._iterparse(stream, [p_tag]):
+            # 嵌套段落随外层段落一起处理
+            if next(elem.iterancestors(p_tag), None) is not None:
+                continue
+            for paragraph in (elem, *elem.iterdescendants(p_tag)):
+                text = "".join(paragraph_text(paragraph, author=self.author))
+                # 跳过空段落 - 它们不影响内容验证
+                if text:
+                    yield text
+            self._release(elem)
+
+    def _iterparse(self, stream, tags):
+        return lxml.etree.iterparse(
+            stream, events=("end",), tag=tags, resolve_entities=False, no_network=True
+        )
+
+    def _release(self, elem):
+        """清空已处理的元素并删除其之前的兄弟节点，使内存占用保持恒定。"""
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
     def _generate_detailed_diff(self, original_text, modified_text):
-        """使用git word diff生成详细的单词级差异。"""
+        """生成详细的字符级差异。"""
         error_parts = [
-            "失败 - 移除Claude的修订后文档文本不匹配",
+            f"失败 - 移除{self.author}的修订后文档文本不匹配",
             "",
             "可能的原因：",
             "  1. 在其他作者的<w:ins>或<w:del>标签内修改了文本",
@@ -127,151 +248,126 @@ class RedliningValidator:
             "",
         ]
 
-        # 显示git单词差异
-        git_diff = self._get_git_word_diff(original_text, modified_text)
-        if git_diff:
-            error_parts.extend(["差异：", "============", git_diff])
-        else:
-            error_parts.append("无法生成单词差异（git不可用）")
+        # 显示单词差异
+        word_diff = self._get_word_diff(original_text, modified_text)
+        if word_diff:
+            error_parts.extend(["差异：", "============", word_diff])
 
         return "\n".join(error_parts)
 
-    def _get_git_word_diff(self, original_text, modified_text):
-        """使用git生成具有字符级精度的单词差异。"""
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-
-                # 创建两个文件
-                original_file = temp_path / "original.txt"
-                modified_file = temp_path / "modified.txt"
-
-                original_file.write_text(original_text, encoding="utf-8")
-                modified_file.write_text(modified_text, encoding="utf-8")
-
-                # 首先尝试字符级差异以获取精确差异
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "--word-diff-regex=.",  # 字符-by-字符差异
-                        "-U0",  # 零行上下文 - 只显示更改的行
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    # 清理输出 - 移除git diff头行
-                    lines = result.stdout.split("\n")
-                    # 跳过头行（diff --git, index, +++, ---, @@）
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-
-                    if content_lines:
-                        return "\n".join(content_lines)
-
-                # 如果字符级差异太冗长，回退到单词级差异
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "-U0",  # 零行上下文
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
+    def _get_word_diff(self, original_text, modified_text):
+        """生成具有字符级精度的差异，格式与git diff --word-diff=plain -U0相同。
 
-                if result.stdout.strip():
-                    lines = result.stdout.split("\n")
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-                    return "\n".join(content_lines)
-
-        except (subprocess.CalledProcessError, FileNotFoundError, Exception):
-            # Git不可用或其他错误，返回None使用回退方案
-            pass
-
-        return None
-
-    def _remove_claude_tracked_changes(self, root):
-        """从XML根中移除由Claude创作的修订。"""
-        ins_tag = f"{{{self.namespaces['w']}}}ins"
-        del_tag = f"{{{self.namespaces['w']}}}del"
-        author_attr = f"{{{self.namespaces['w']}}}author"
-
-        # 移除w:ins元素
-        for parent in root.iter():
-            to_remove = []
-            for child in parent:
-                if child.tag == ins_tag and child.get(author_attr) == "Claude":
-                    to_remove.append(child)
-            for elem in to_remove:
-                parent.remove(elem)
-
-        # 解包作者为"Claude"的w:del元素中的内容
-        deltext_tag = f"{{{self.namespaces['w']}}}delText"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
-        for parent in root.iter():
-            to_process = []
-            for child in parent:
-                if child.tag == del_tag and child.get(author_attr) == "Claude":
-                    to_process.append((child, list(parent).index(child)))
-
-            # 按相反顺序处理以保持索引
-            for del_elem, del_index in reversed(to_process):
-                # 在移动前将w:delText转换为w:t
-                for elem in del_elem.iter():
-                    if elem.tag == deltext_tag:
-                        elem.tag = t_tag
-
-                # 在移除w:del之前，将w:del的所有子元素移到其父元素
-                for child in reversed(list(del_elem)):
-                    parent.insert(del_index, child)
-                parent.remove(del_elem)
-
-    def _extract_text_content(self, root):
-        """从Word XML中提取文本内容，保留段落结构。
-
-        跳过空段落以避免在跟踪插入仅添加结构元素而没有文本内容时产生误报。
+        先按段落比较，只在发生变化的段落块内逐字符比较，耗时与变化量成正比，
+        不依赖git，也不需要临时文件。
         """
-        p_tag = f"{{{self.namespaces['w']}}}p"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
-        paragraphs = []
-        for p_elem in root.findall(f".//{p_tag}"):
-            # 获取此段落中的所有文本元素
-            text_parts = []
-            for t_elem in p_elem.findall(f".//{t_tag}"):
-                if t_elem.text:
-                    text_parts.append(t_elem.text)
-            paragraph_text = "".join(text_parts)
-            # 跳过空段落 - 它们不影响内容验证
-            if paragraph_text:
-                paragraphs.append(paragraph_text)
-
-        return "\n".join(paragraphs)
+        original_paragraphs = original_text.split("\n")
+        modified_paragraphs = modified_text.split("\n")
+        matcher = difflib.SequenceMatcher(
+            None, original_paragraphs, modified_paragraphs, autojunk=False
+        )
+
+        lines = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            old = "\n".join(original_paragraphs[i1:i2])
+            new = "\n".join(modified_paragraphs[j1:j2])
+            if tag == "delete":
+                segments = [("-", old)]
+            elif tag == "insert":
+                segments = [("+", new)]
+            elif i2 - i1 == j2 - j1:
+                # 逐段修改：每个段落只与对应的段落比较
+                for old, new in zip(
+                    original_paragraphs[i1:i2], modified_paragraphs[j1:j2]
+                ):
+                    lines.extend(
+                        self._render_word_diff(self._diff_segments(old, new))
+                    )
+                continue
+            else:
+                segments = self._diff_segments(old, new)
+            lines.extend(self._render_word_diff(segments))
+
+        return "\n".join(line for line in lines if line.strip())
+
+    def _diff_segments(self, old, new):
+        """比较两段文本，返回(操作, 文本)列表，操作为" "、"-"或"+"。
+
+        先按单词比较（difflib的autojunk不以高频单词作为匹配起点，耗时不随长度平方增长），
+        再将不超过CHAR_DIFF_LIMIT个字符的替换逐字符细分，结果与字符级差异一致。
+        超过WORD_DIFF_LIMIT个字符的变化块不再细分。
+        """
+        # 公共前缀和后缀不参与比较（边界退回到单词边界，避免从单词中间断开）
+        prefix = len(os.path.commonprefix([old, new]))
+        while self._inside_word(old, prefix) or self._inside_word(new, prefix):
+            prefix -= 1
+        old_rest, new_rest = old[prefix:], new[prefix:]
+        suffix = len(os.path.commonprefix([old_rest[::-1], new_rest[::-1]]))
+        while self._inside_word(
+            old_rest, len(old_rest) - suffix
+        ) or self._inside_word(new_rest, len(new_rest) - suffix):
+            suffix -= 1
+        old_middle = old_rest[: len(old_rest) - suffix]
+        new_middle = new_rest[: len(new_rest) - suffix]
+
+        segments = [(" ", old[:prefix])]
+        if max(len(old_middle), len(new_middle)) > self.WORD_DIFF_LIMIT:
+            segments.extend([("-", old_middle), ("+", new_middle)])
+        else:
+            a = self.WORD_PATTERN.findall(old_middle)
+            b = self.WORD_PATTERN.findall(new_middle)
+            matcher = difflib.SequenceMatcher(None, a, b)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                old_part = "".join(a[i1:i2])
+                new_part = "".join(b[j1:j2])
+                if tag == "equal":
+                    segments.append((" ", old_part))
+                elif (
+                    tag == "replace"
+                    and max(len(old_part), len(new_part)) <= self.CHAR_DIFF_LIMIT
+                ):
+                    segments.extend(self._char_segments(old_part, new_part))
+                else:
+                    segments.extend([("-", old_part), ("+", new_part)])
+        segments.append((" ", old_rest[len(old_rest) - suffix :]))
+        return segments
+
+    def _inside_word(self, text, index):
+        """index是否位于一个单词内部（两侧都是同一单词的字符）。"""
+        return (
+            0 < index < len(text)
+            and self.WORD_CHARACTER.match(text[index - 1]) is not None
+            and self.WORD_CHARACTER.match(text[index]) is not None
+        )
+
+    def _char_segments(self, old, new):
+        """逐字符比较两段短文本，返回(操作, 文本)列表。"""
+        segments = []
+        matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                segments.append((" ", old[i1:i2]))
+            else:
+                segments.extend([("-", old[i1:i2]), ("+", new[j1:j2])])
+        return segments
+
+    def _render_word_diff(self, segments):
+        """将差异片段渲染为行：删除的文本为[-...-]，插入的文本为{+...+}。"""
+        lines = [""]
+        for op, text in segments:
+            for index, piece in enumerate(text.split("\n")):
+                if index:
+                    lines.append("")
+                if not piece:
+                    continue
+                if op == "-":
+                    piece = f"[-{piece}-]"
+                elif op == "+":
+                    piece = f"{{+{piece}+}}"
+                lines[-1] += piece
+        return lines
 
 
 if __name__ == "__main__":
@@ -0,0 +1,456 @@
+"""
+用于验证Excel工作簿XML文件是否符合XSD模式的验证器。
+"""
+
+import io
+from collections import namedtuple
+from pathlib import PurePosixPath
+
+import lxml.etree
+
+from .base import BaseSchemaValidator, load_schema
+
+# 工作簿级别的信息，单元格检查依赖这些信息
+#   shared_strings: 共享字符串数量
+#   cell_styles: cellXfs中的单元格格式数量（没有样式部件时为None）
+#   calc_chain: 工作表部件名 → calcChain中该工作表的单元格引用集合
+#   calc_chain_errors: calcChain中引用不存在的工作表的条目
+#   parts: 读取了的部件（工作簿、其关系、共享字符串、样式和calcChain）
+WorkbookInfo = namedtuple(
+    "WorkbookInfo",
+    ["shared_strings", "cell_styles", "calc_chain", "calc_chain_errors", "parts"],
+)
+
+
+class XLSXSchemaValidator(BaseSchemaValidator):
+    """用于验证Excel工作簿XML文件是否符合XSD模式的验证器。
+
+    工作表、共享字符串和calcChain可能有数百MB，因此从不整体解析：
+    其他检查使用移除了其中重复元素（行、si、c）的部件，XSD验证和单元格检查
+    流式读取这些元素，内存占用与部件大小无关。
+    """
+
+    # Excel特定的命名空间
+    SPREADSHEETML_NAMESPACE = (
+        "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    )
+
+    # Excel特定的元素到关系类型的映射
+    ELEMENT_RELATIONSHIP_TYPES = {
+        "sheet": "sheet",  # worksheet、chartsheet或dialogsheet
+        "pivotcache": "pivotcachedefinition",
+        "externalreference": "externallink",
+        "drawing": "drawing",
+        "legacydrawing": "vmldrawing",
+        "tablepart": "table",
+        "hyperlink": "hyperlink",
+    }
+
+    # xl/下这些子目录中的部件也由sml.xsd描述
+    SPREADSHEETML_FOLDERS = {
+        "worksheets",
+        "chartsheets",
+        "dialogsheets",
+        "tables",
+        "pivotTables",
+        "pivotCache",
+        "externalLinks",
+        "queryTables",
+    }
+
+    # 工作表的内容类型
+    WORKSHEET_CONTENT_TYPE = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+    )
+
+    # 需要流式处理的大部件：内容类型 → 重复元素
+    STREAMED_PARTS = {
+        WORKSHEET_CONTENT_TYPE: "row",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml": "si",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml": "c",
+    }
+
+    # 流式XSD验证时每批验证的元素数
+    XSD_BATCH_ELEMENTS = 20000
+
+    # 每个工作表每类单元格错误最多列出的数量
+    MAX_CELL_ERRORS = 20
+
+    # 工作簿部件之间的关系类型
+    OFFICE_DOCUMENT_TYPE = (
+        "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 单元格检查所需的工作簿信息，第一次使用时读取（见_workbook_info）
+        self._workbook = None
+
+    def validate(self):
+        """运行所有验证检查，如果全部通过则返回True。"""
+        # 测试0：XML格式良好性
+        if not self.validate_xml():
+            return False
+
+        # 测试1：命名空间声明
+        all_valid = True
+        if not self.validate_namespaces():
+            all_valid = False
+
+        # 测试2：唯一ID
+        if not self.validate_unique_ids():
+            all_valid = False
+
+        # 测试3：关系和文件引用验证
+        if not self.validate_file_references():
+            all_valid = False
+
+        # 测试4：内容类型声明
+        if not self.validate_content_types():
+            all_valid = False
+
+        # 测试5：XSD模式验证
+        if not self.validate_against_xsd():
+            all_valid = False
+
+        # 测试6：共享字符串、样式索引和calcChain
+        if not self.validate_cells():
+            all_valid = False
+
+        # 测试7：关系ID引用验证
+        if not self.validate_all_relationship_ids():
+            all_valid = False
+
+        return all_valid
+
+    def _tag(self, name):
+        return f"{{{self.SPREADSHEETML_NAMESPACE}}}{name}"
+
+    def _content_type(self, relative_path):
+        """返回部件（相对于文档根目录的路径）在[Content_Types].xml中的内容类型。"""
+        name = PurePosixPath(relative_path).as_posix()
+        try:
+            overrides, defaults = self.package.content_types()
+        except Exception:
+            # [Content_Types].xml缺失或损坏时由其他检查报告
+            return None
+        extension = PurePosixPath(name).suffix.lstrip(".").lower()
+        return overrides.get(name.lower()) or defaults.get(extension)
+
+    def _is_worksheet(self, relative_path):
+        """判断部件（相对于文档根目录的路径）是否为工作表。"""
+        return self._content_type(relative_path) == self.WORKSHEET_CONTENT_TYPE
+
+    def _streamed_tag(self, relative_path):
+        """返回需要流式处理的部件中重复元素的标签，其他部件返回None。"""
+        name = self.STREAMED_PARTS.get(self._content_type(relative_path))
+        return None if name is None else self._tag(name)
+
+    def _get_schema_path(self, xml_file):
+        schema_path = super()._get_schema_path(xml_file)
+        if (
+            schema_path is None
+            and xml_file.parent.name in self.SPREADSHEETML_FOLDERS
+            and xml_file.parent.parent.name == "xl"
+        ):
+            return self.schemas_dir / self.SCHEMA_MAPPINGS["xl"]
+        return schema_path
+
+    def _read_tree(self, path):
+        """流式解析大部件，丢弃其中的重复元素（行、共享字符串、calcChain条目），
+        只保留部件的其余部分。
+
+        其他检查（命名空间、ID、r:id引用等）不需要这些元素；
+        XSD验证和单元格检查另外流式读取它们。
+        """
+        name = self._part_name(path)
+        tag = self._streamed_tag(name)
+        if tag is None:
+            return super()._read_tree(path)
+
+        stream = self.source.open(name)
+        if stream is None:
+            raise FileNotFoundError(str(path))
+        with stream:
+            context = lxml.etree.iterparse(stream, events=("end",), tag=tag)
+            for _, item in context:
+                item.getparent().remove(item)
+            return context.root.getroottree()
+
+    def _validate_single_file_xsd(self, xml_file, base_path, content=None):
+        """大部件按批验证：每批重复元素放入只含其祖先元素的最小文档中验证，
+        最后一批放回部件的其余部分一起验证。
+
+        sml.xsd对这些元素之间没有约束，因此与整体验证报告相同的错误，
+        但任何时候内存中只有一批元素。
+        """
+        relative_path = xml_file.relative_to(base_path)
+        tag = self._streamed_tag(relative_path)
+        if tag is None:
+            return super()._validate_single_file_xsd(xml_file, base_path, content)
+
+        try:
+            schema = load_schema(self._get_schema_path(xml_file))
+            if content is None:
+                stream = self.source.open(self._part_name(xml_file))
+                if stream is None:
+                    raise FileNotFoundError(str(xml_file))
+            else:
+                stream = io.BytesIO(content)
+
+            errors = set()
+            container = None
+            position = 0
+            batch = []
+            batch_size = 0
+            with stream:
+                context = lxml.etree.iterparse(stream, events=("end",), tag=tag)
+                for _, item in context:
+                    if container is None:
+                        # 重复元素是连续的，最后一批放回第一个元素的位置
+                        container = item.getparent()
+                        position = container.index(item)
+                    container.remove(item)
+                    if batch_size >= self.XSD_BATCH_ELEMENTS:
+                        errors |= self._batch_errors(
+                            schema, container, batch, relative_path
+                        )
+                        batch = []
+                        batch_size = 0
+                    batch.append(item)
+                    batch_size += len(item) + 1
+                document = context.root.getroottree()
+
+            # 部件的其余部分和最后一批
+            if container is not None:
+                container[position:position] = batch
+            xml_doc = self._prepare_for_xsd(document, relative_path)
+            errors |= self._schema_errors(schema, xml_doc)[1]
+            return not errors, errors
+
+        except Exception as e:
+            return False, {str(e)}
+
+    def _batch_errors(self, schema, container, items, relative_path):
+        """验证一批重复元素，返回错误集合。"""
+        # 复制从根元素到容器元素的路径（不含其他子元素）
+        ancestors = [container, *container.iterancestors()]
+        parent = None
+        for ancestor in reversed(ancestors):
+            if parent is None:
+                element = lxml.etree.Element(
+                    ancestor.tag, ancestor.attrib, nsmap=ancestor.nsmap
+                )
+                root = element
+            else:
+                element = lxml.etree.SubElement(parent, ancestor.tag, ancestor.attrib)
+            parent = element
+        parent.extend(items)
+        xml_doc = self._prepare_for_xsd(lxml.etree.ElementTree(root), relative_path)
+        return self._schema_errors(schema, xml_doc)[1]
+
+    def validate_cells(self):
+        """验证单元格引用的共享字符串和样式索引在范围内，且calcChain只引用包含公式的单元格。"""
+        errors = []
+
+        try:
+            workbook = self._workbook_info()
+        except Exception as e:
+            print(f"失败 - 读取工作簿信息时出错: {e}")
+            return False
+        errors.extend(workbook.calc_chain_errors)
+
+        worksheets = [
+            xml_file
+            for xml_file in self.xml_files
+            if self._is_worksheet(self._part_name(xml_file))
+        ]
+        # 检查结果还依赖共享字符串、样式、calcChain以及工作簿和它的关系
+        dependencies = [self.package.parts[name] for name in workbook.parts]
+        for file_errors in self._map_parts(
+            "cells",
+            worksheets,
+            self._cell_errors,
+            depends_on=lambda xml_file: dependencies,
+        ):
+            errors.extend(file_errors)
+
+        if errors:
+            print(f"失败 - 发现{len(errors)}个单元格引用错误：")
+            for error in errors:
+                print(error)
+            return False
+        else:
+            if self.verbose:
+                print("通过 - 所有共享字符串、样式和calcChain引用都有效")
+            return True
+
+    def _cell_errors(self, xml_file):
+        """流式检查单个工作表中的单元格，返回错误列表。"""
+        workbook = self._workbook_info()
+        part_name = self._part_name(xml_file)
+        relative_path = xml_file.relative_to(self.unpacked_dir)
+        # calcChain中属于此工作表、尚未找到公式的单元格
+        pending_formulas = set(workbook.calc_chain.get(part_name, ()))
+
+        shared_string_errors = []
+        style_errors = []
+        cell_tag, row_tag, col_tag = self._tag("c"), self._tag("row"), self._tag("col")
+        value_tag, formula_tag = self._tag("v"), self._tag("f")
+
+        def check_style(elem, attribute, label):
+            style = elem.get(attribute)
+            if style is None or workbook.cell_styles is None:
+                return
+            if not style.isdigit() or int(style) >= workbook.cell_styles:
+                style_errors.append(
+                    f"  {relative_path}: 第 {elem.sourceline} 行: {label} 的样式索引 "
+                    f"{style} 超出范围（cellXfs中有{workbook.cell_styles}个格式）"
+                )
+
+        try:
+            stream = self.source.open(part_name)
+            if stream is None:
+                raise FileNotFoundError(str(xml_file))
+            with stream:
+                for _, elem in lxml.etree.iterparse(
+                    stream, events=("end",), tag=(cell_tag, row_tag, col_tag)
+                ):
+                    if elem.tag == row_tag:
+                        check_style(elem, "s", f"行 {elem.get('r')}")
+                        # 行处理完后连同其中的单元格一起释放
+                        elem.getparent().remove(elem)
+                        continue
+                    if elem.tag == col_tag:
+                        check_style(
+                            elem, "style", f"列 {elem.get('min')}-{elem.get('max')}"
+                        )
+                        continue
+
+                    ref = elem.get("r")
+                    check_style(elem, "s", f"单元格 {ref}")
+
+                    if elem.get("t") == "s":
+                        value = (elem.findtext(value_tag) or "").strip()
+                        if (
+                            not value.isdigit()
+                            or int(value) >= workbook.shared_strings
+                        ):
+                            shared_string_errors.append(
+                                f"  {relative_path}: 第 {elem.sourceline} 行: 单元格 {ref} "
+                                f"引用共享字符串 '{value}'，超出范围（共有{workbook.shared_strings}个）"
+                            )
+
+                    if ref in pending_formulas and elem.find(formula_tag) is not None:
+                        pending_formulas.discard(ref)
+        except Exception as e:
+            return [f"  {relative_path}: 错误: {e}"]
+
+        calc_chain_errors = [
+            f"  {relative_path}: calcChain引用的单元格 {ref} 不存在或不包含公式"
+            for ref in sorted(pending_formulas)
+        ]
+        return (
+            self._limit_errors(shared_string_errors)
+            + self._limit_errors(style_errors)
+            + self._limit_errors(calc_chain_errors)
+        )
+
+    def _limit_errors(self, errors):
+        """最多保留MAX_CELL_ERRORS个错误，其余的汇总为一行。"""
+        if len(errors) <= self.MAX_CELL_ERRORS:
+            return errors
+        return errors[: self.MAX_CELL_ERRORS] + [
+            f"    ...（另有{len(errors) - self.MAX_CELL_ERRORS}个同类错误）"
+        ]
+
+    def _workbook_info(self):
+        """返回单元格检查所需的工作簿信息，每个验证器实例（每个工作进程）只读取一次。"""
+        if self._workbook is not None:
+            return self._workbook
+
+        # 主部件来自包的根关系（通常为xl/workbook.xml）
+        workbook_part = None
+        root_rels = self.package.find("_rels/.rels")
+        if root_rels is not None:
+            for rel in self.package.relationships(root_rels):
+                if rel.type == self.OFFICE_DOCUMENT_TYPE and rel.part is not None:
+                    workbook_part = rel.part
+                    break
+
+        # 工作簿的关系：关系类型名称 → 部件，关系ID → 部件
+        related = {}
+        rid_to_part = {}
+        sheets = {}  # sheetId → 工作表部件名
+        parts = []
+        if workbook_part is not None:
+            parts.append(workbook_part)
+            rels_part = self.package.find(self.package.rels_part_for(workbook_part))
+            if rels_part is not None:
+                parts.append(rels_part)
+                for rel in self.package.relationships(rels_part):
+                    if rel.part is not None:
+                        related.setdefault(rel.type.split("/")[-1], rel.part)
+                        rid_to_part[rel.id] = rel.part
+
+            root = self._parse_part(self.package.parts[workbook_part]).getroot()
+            for sheet in root.iter(self._tag("sheet")):
+                part = rid_to_part.get(
+                    sheet.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
+                )
+                if part is not None:
+                    sheets[sheet.get("sheetId")] = part
+
+        # 共享字符串可能很多，流式计数
+        shared_strings = 0
+        if "sharedStrings" in related:
+            with self.source.open(related["sharedStrings"]) as stream:
+                for _, si in lxml.etree.iterparse(
+                    stream, events=("end",), tag=self._tag("si")
+                ):
+                    shared_strings += 1
+                    si.getparent().remove(si)
+
+        cell_styles = None
+        if "styles" in related:
+            root = self._parse_part(self.package.parts[related["styles"]]).getroot()
+            cell_xfs = root.find(self._tag("cellXfs"))
+            cell_styles = 0 if cell_xfs is None else len(cell_xfs.findall(self._tag("xf")))
+
+        # calcChain中省略i的条目沿用上一个条目的工作表
+        calc_chain = {}
+        calc_chain_errors = []
+        if "calcChain" in related:
+            sheet_id = None
+            with self.source.open(related["calcChain"]) as stream:
+                for _, cell in lxml.etree.iterparse(
+                    stream, events=("end",), tag=self._tag("c")
+                ):
+                    sheet_id = cell.get("i", sheet_id)
+                    part = sheets.get(sheet_id)
+                    if part is None:
+                        calc_chain_errors.append(
+                            f"  {related['calcChain']}: 第 {cell.sourceline} 行: "
+                            f"单元格 {cell.get('r')} 引用不存在的工作表 i='{sheet_id}'"
+                        )
+                    else:
+                        calc_chain.setdefault(part, set()).add(cell.get("r"))
+                    cell.getparent().remove(cell)
+
+        parts.extend(
+            related[name]
+            for name in ("sharedStrings", "styles", "calcChain")
+            if name in related
+        )
+        self._workbook = WorkbookInfo(
+            shared_strings,
+            cell_styles,
+            calc_chain,
+            self._limit_errors(calc_chain_errors),
+            parts,
+        )
+        return self._workbook
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
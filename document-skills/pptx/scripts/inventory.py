@@ -16,6 +16,7 @@
 
 主要函数：
     extract_text_inventory: 从演示文稿中提取所有文本
+    get_inventory_as_dict: 提取可JSON序列化的目录，可并行处理幻灯片
     save_inventory: 将提取的数据保存到JSON
 
 用法：
@@ -24,8 +25,11 @@
 
 import argparse
 import json
+import math
+import os
 import platform
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -60,6 +64,9 @@ def main():
   python inventory.py presentation.pptx inventory.json --issues-only
     仅提取有文本溢出或重叠问题的文本形状
 
+  python inventory.py presentation.pptx inventory.json --jobs 4
+    用4个进程并行提取幻灯片（输出与串行提取相同）
+
 输出的JSON包含：
   - 按幻灯片和形状组织的所有文本内容
   - 组内形状的正确绝对位置
@@ -76,6 +83,17 @@ def main():
         action="store_true",
         help="只包含有文本溢出或重叠问题的文本形状",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="并行提取幻灯片的进程数(默认: 1，0表示CPU核心数)",
+    )
+    parser.add_argument(
+        "--font-cache",
+        help="字体索引缓存文件（JSON），字体目录未变化时不再重新扫描",
+    )
 
     args = parser.parse_args()
 
@@ -88,17 +106,22 @@ def main():
         print("错误: 输入文件必须是PowerPoint文件 (.pptx)")
         sys.exit(1)
 
+    if args.font_cache:
+        get_font_index(Path(args.font_cache))
+
     try:
         print(f"正在从 {args.input} 提取文本目录")
         if args.issues_only:
             print(
                 "仅包含有问题的文本形状（溢出/重叠）"
             )
-        inventory = extract_text_inventory(input_path, issues_only=args.issues_only)
+        inventory = get_inventory_as_dict(
+            input_path, issues_only=args.issues_only, jobs=args.jobs or None
+        )
 
         output_path = Path(args.output)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        save_inventory(inventory, output_path)
+        save_inventory_dict(inventory, output_path)
 
         print(f"输出已保存到: {args.output}")
 
@@ -263,30 +286,138 @@ class ParagraphData:
         return result
 
 
-class ShapeData:
-    """从PowerPoint形状中提取的形状属性数据结构。"""
+class FontIndex:
+    """系统字体目录中字体文件的索引。
 
-    @staticmethod
-    def emu_to_inches(emu: int) -> float:
-        """将EMU（英制公制单位）转换为英寸。"""
-        return emu / 914400.0
+    字体目录在第一次查找时各列出一次，之后的查找都是字典查找；查找结果按字体名称缓存，
+    FreeTypeFont对象按(路径, 大小)缓存。可选地保存到缓存文件，字体目录的修改时间
+    变化时只重新扫描该目录。
+    """
 
-    @staticmethod
-    def inches_to_pixels(inches: float, dpi: int = 96) -> int:
-        """在给定DPI下将英寸转换为像素。"""
-        return int(inches * dpi)
+    # 缓存文件格式版本，格式变化时递增以丢弃旧缓存
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        """
+        参数:
+            cache_path: 可选的索引缓存文件路径（JSON）
+        """
+        # Define font directories and extensions by platform
+        if platform.system() == "Darwin":  # macOS
+            font_dirs = [
+                "/System/Library/Fonts/",
+                "/Library/Fonts/",
+                "~/Library/Fonts/",
+            ]
+            self.extensions = [".ttf", ".otf", ".ttc", ".dfont"]
+        else:  # Linux
+            font_dirs = [
+                "/usr/share/fonts/truetype/",
+                "/usr/local/share/fonts/",
+                "~/.fonts/",
+            ]
+            self.extensions = [".ttf", ".otf"]
+        self.font_dirs = [Path(font_dir).expanduser() for font_dir in font_dirs]
+        self.cache_path = Path(cache_path) if cache_path else None
+
+        self._paths: Dict[str, Optional[str]] = {}  # 字体名称 -> 查找结果
+        self._fonts: Dict[Tuple[str, int], Any] = {}  # (路径, 大小) -> FreeTypeFont
+        self._default_font: Any = None
+        self._directories = self._scan()
 
     @staticmethod
-    def get_font_path(font_name: str) -> Optional[str]:
+    def normalize(name: str) -> str:
+        """规范化字体名称：小写并去掉空格、连字符和下划线。"""
+        return name.lower().replace(" ", "").replace("-", "").replace("_", "")
+
+    def _scan(self) -> List[Tuple[Path, Dict[str, str], Dict[str, str]]]:
+        """列出各字体目录中的字体文件（不含子目录），优先使用缓存中未过期的列表。
+
+        返回按目录顺序排列的(目录, 文件名 -> 路径, 规范化名称 -> 路径)列表。
+        """
+        cached = self._load_cache()
+        listings = {}
+        changed = False
+        for font_dir in self.font_dirs:
+            try:
+                mtime = font_dir.stat().st_mtime_ns
+            except OSError:
+                continue
+            entry = cached.get(str(font_dir))
+            if entry is not None and entry[0] == mtime:
+                listings[font_dir] = (mtime, entry[1])
+                continue
+            try:
+                names = sorted(
+                    item.name
+                    for item in os.scandir(font_dir)
+                    if item.is_file()
+                    and item.name.lower().endswith(tuple(self.extensions))
+                )
+            except OSError:
+                continue
+            listings[font_dir] = (mtime, names)
+            changed = True
+
+        if changed or len(listings) != len(cached):
+            self._save_cache(listings)
+
+        directories = []
+        for font_dir, (_, names) in listings.items():
+            files = {name: str(font_dir / name) for name in names}
+            families: Dict[str, str] = {}
+            for name in names:
+                families.setdefault(self.normalize(Path(name).stem), files[name])
+            directories.append((font_dir, files, families))
+        return directories
+
+    def _load_cache(self) -> Dict[str, Tuple[int, List[str]]]:
+        """读取缓存文件，返回目录 -> (修改时间, 文件名列表)；缓存不可用时返回空字典。"""
+        if self.cache_path is None:
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            if data.get("version") != self.CACHE_VERSION:
+                return {}
+            return {
+                font_dir: (mtime, names)
+                for font_dir, mtime, names in data["directories"]
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _save_cache(self, listings: Dict[Path, Tuple[int, List[str]]]) -> None:
+        """写入缓存文件。写入失败不影响查找。"""
+        if self.cache_path is None:
+            return
+        data = {
+            "version": self.CACHE_VERSION,
+            "directories": [
+                [str(font_dir), mtime, names]
+                for font_dir, (mtime, names) in listings.items()
+            ],
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_path.write_text(json.dumps(data), encoding="utf-8")
+        except OSError:
+            pass
+
+    def find(self, font_name: str) -> Optional[str]:
         """获取给定字体名称的字体文件路径。
 
+        按目录顺序依次尝试：文件名与名称变体完全匹配、规范化名称匹配
+        （例如'DejaVu Sans Bold'匹配DejaVuSans-Bold.ttf）、文件名包含字体名称
+        （多个文件包含时取文件名最短的）。
+
         参数:
             font_name: 字体名称（例如：'Arial'、'Calibri'）
 
         返回:
             字体文件的路径，如果找不到则返回None
         """
-        system = platform.system()
+        if font_name in self._paths:
+            return self._paths[font_name]
 
         # Common font file variations to try
         font_variations = [
@@ -295,52 +426,197 @@ class ShapeData:
             font_name.replace(" ", ""),
             font_name.replace(" ", "-"),
         ]
+        normalized = self.normalize(font_name)
+        font_name_lower = font_name.lower().replace(" ", "")
 
-        # Define font directories and extensions by platform
-        if system == "Darwin":  # macOS
-            font_dirs = [
-                "/System/Library/Fonts/",
-                "/Library/Fonts/",
-                "~/Library/Fonts/",
-            ]
-            extensions = [".ttf", ".otf", ".ttc", ".dfont"]
-        else:  # Linux
-            font_dirs = [
-                "/usr/share/fonts/truetype/",
-                "/usr/local/share/fonts/",
-                "~/.fonts/",
-            ]
-            extensions = [".ttf", ".otf"]
+        font_path = None
+        for _, files, families in self._directories:
+            # First try exact matches
+            for variant in font_variations:
+                for ext in self.extensions:
+                    font_path = files.get(f"{variant}{ext}")
+                    if font_path:
+                        break
+                if font_path:
+                    break
 
-        # Try to find the font file
-        from pathlib import Path
+            # Then normalized family names and style variants
+            if not font_path:
+                font_path = families.get(normalized)
 
-        for font_dir in font_dirs:
-            font_dir_path = Path(font_dir).expanduser()
-            if not font_dir_path.exists():
-                continue
+            # Then try fuzzy matching - find files containing the font name,
+            # preferring the shortest file name (usually the regular style)
+            if not font_path:
+                matches = [name for name in files if font_name_lower in name.lower()]
+                if matches:
+                    font_path = files[min(matches, key=lambda name: (len(name), name))]
 
-            # First try exact matches
-            for variant in font_variations:
-                for ext in extensions:
-                    font_path = font_dir_path / f"{variant}{ext}"
-                    if font_path.exists():
-                        return str(font_path)
+            if font_path:
+                break
 
-            # Then try fuzzy matching - find files containing the font name
-            try:
-                for file_path in font_dir_path.iterdir():
-                    if file_path.is_file():
-                        file_name_lower = file_path.name.lower()
-                        font_name_lower = font_name.lower().replace(" ", "")
-                        if font_name_lower in file_name_lower and any(
-                            file_name_lower.endswith(ext) for ext in extensions
-                        ):
-                            return str(file_path)
-            except (OSError, PermissionError):
-                continue
+        self._paths[font_name] = font_path
+        return font_path
 
-        return None
+    def load_font(self, font_name: str, size: int) -> Any:
+        """返回给定字体名称和大小的PIL字体，找不到或无法加载时返回默认字体。"""
+        font_path = self.find(font_name)
+        if font_path:
+            key = (font_path, size)
+            font = self._fonts.get(key)
+            if font is None:
+                try:
+                    font = ImageFont.truetype(font_path, size=size)
+                except Exception:
+                    font = self._load_default()
+                self._fonts[key] = font
+            return font
+        return self._load_default()
+
+    def _load_default(self) -> Any:
+        if self._default_font is None:
+            self._default_font = ImageFont.load_default()
+        return self._default_font
+
+
+# 进程内的字体索引（由get_font_index创建）
+_font_index: Optional[FontIndex] = None
+
+
+def get_font_index(cache_path: Optional[Path] = None) -> FontIndex:
+    """返回进程内共享的字体索引，第一次调用时创建。
+
+    参数:
+        cache_path: 可选的索引缓存文件路径，只在创建索引时使用
+    """
+    global _font_index
+    if _font_index is None:
+        _font_index = FontIndex(cache_path)
+    return _font_index
+
+
+class TextWidths:
+    """一种字体（路径和大小）下的文本宽度表和贪心换行。
+
+    每个单词只测量一次，行宽由单词宽度和预先测量的空格宽度累加得到。
+    只有累加宽度接近可用宽度（可能的换行点）时才测量整行，
+    因此单词边界处的字距调整不会改变换行结果。
+    """
+
+    # 每个单词边界处字距调整可能造成的最大误差（字体大小的比例）
+    KERNING_TOLERANCE = 0.1
+
+    def __init__(self, font: Any, draw: Any):
+        """
+        参数:
+            font: PIL字体
+            draw: 用于测量的ImageDraw对象
+        """
+        self.font = font
+        self.draw = draw
+        self._widths: Dict[str, float] = {}  # 文本 -> 宽度（像素）
+        self.space_width = self.measure(" ")
+        # 1/64像素是FreeType的测量精度
+        self.boundary_tolerance = (
+            getattr(font, "size", 10) * self.KERNING_TOLERANCE + 1 / 64
+        )
+
+    def measure(self, text: str) -> float:
+        """返回文本的宽度（像素），同一文本只测量一次。"""
+        width = self._widths.get(text)
+        if width is None:
+            width = self.draw.textlength(text, font=self.font)
+            self._widths[text] = width
+        return width
+
+    def wrap(self, line: str, max_width_px: int) -> List[str]:
+        """将单行文本按单词贪心换行到max_width_px以内。"""
+        if not line:
+            return [""]
+
+        # 整行宽度也由单词宽度累加，接近边界时才测量整行
+        words = line.split(" ")
+        line_width = sum(self.measure(word) for word in words) + self.space_width * (
+            len(words) - 1
+        )
+        if abs(line_width - max_width_px) <= len(words) * self.boundary_tolerance:
+            line_width = self.measure(line)
+        if line_width <= max_width_px:
+            return [line]
+
+        # Need to wrap
+        wrapped = []
+        current_line = ""
+        current_width = 0.0
+        boundaries = 0  # 上次整行测量以来累加的单词边界数
+
+        for word in words:
+            if not current_line:
+                test_width = self.measure(word)
+                boundaries = 0
+            else:
+                test_width = current_width + self.space_width + self.measure(word)
+                boundaries += 1
+                # 累加宽度接近边界时测量整行
+                if (
+                    abs(test_width - max_width_px)
+                    <= boundaries * self.boundary_tolerance
+                ):
+                    test_width = self.measure(f"{current_line} {word}")
+                    boundaries = 0
+
+            if test_width <= max_width_px:
+                current_line = f"{current_line} {word}" if current_line else word
+                current_width = test_width
+            else:
+                if current_line:
+                    wrapped.append(current_line)
+                current_line = word
+                current_width = self.measure(word)
+                boundaries = 0
+
+        if current_line:
+            wrapped.append(current_line)
+
+        return wrapped
+
+
+# 进程内各字体的文本宽度表（字体由FontIndex缓存，因此以字体对象为键）
+_text_widths: Dict[Any, TextWidths] = {}
+
+
+def get_text_widths(font: Any, draw: Any) -> TextWidths:
+    """返回字体的文本宽度表，第一次使用该字体时创建。"""
+    widths = _text_widths.get(font)
+    if widths is None:
+        widths = TextWidths(font, draw)
+        _text_widths[font] = widths
+    return widths
+
+
+class ShapeData:
+    """从PowerPoint形状中提取的形状属性数据结构。"""
+
+    @staticmethod
+    def emu_to_inches(emu: int) -> float:
+        """将EMU（英制公制单位）转换为英寸。"""
+        return emu / 914400.0
+
+    @staticmethod
+    def inches_to_pixels(inches: float, dpi: int = 96) -> int:
+        """在给定DPI下将英寸转换为像素。"""
+        return int(inches * dpi)
+
+    @staticmethod
+    def get_font_path(font_name: str) -> Optional[str]:
+        """获取给定字体名称的字体文件路径。
+
+        参数:
+            font_name: 字体名称（例如：'Arial'、'Calibri'）
+
+        返回:
+            字体文件的路径，如果找不到则返回None
+        """
+        return get_font_index().find(font_name)
 
     @staticmethod
     def get_slide_dimensions(slide: Any) -> tuple[Optional[int], Optional[int]]:
@@ -533,31 +809,7 @@ class ShapeData:
 
     def _wrap_text_line(self, line: str, max_width_px: int, draw, font) -> List[str]:
         """Wrap a single line of text to fit within max_width_px."""
-        if not line:
-            return [""]
-
-        # Use textlength for efficient width calculation
-        if draw.textlength(line, font=font) <= max_width_px:
-            return [line]
-
-        # Need to wrap - split into words
-        wrapped = []
-        words = line.split(" ")
-        current_line = ""
-
-        for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            if draw.textlength(test_line, font=font) <= max_width_px:
-                current_line = test_line
-            else:
-                if current_line:
-                    wrapped.append(current_line)
-                current_line = word
-
-        if current_line:
-            wrapped.append(current_line)
-
-        return wrapped
+        return get_text_widths(font, draw).wrap(line, max_width_px)
 
     def _estimate_frame_overflow(self) -> None:
         """使用PIL文本测量估算文本是否溢出形状边界。"""
@@ -593,15 +845,7 @@ class ShapeData:
             font_name = para_data.font_name or "Arial"
             font_size = int(para_data.font_size or default_font_size)
 
-            font = None
-            font_path = self.get_font_path(font_name)
-            if font_path:
-                try:
-                    font = ImageFont.truetype(font_path, size=font_size)
-                except Exception:
-                    font = ImageFont.load_default()
-            else:
-                font = ImageFont.load_default()
+            font = get_font_index().load_font(font_name, font_size)
 
             # Wrap all lines in this paragraph
             all_wrapped_lines = []
@@ -878,6 +1122,37 @@ def calculate_overlap(
     return False, 0
 
 
+def find_overlaps(
+    rects: List[Tuple[float, float, float, float]], tolerance: float = 0.05
+) -> List[Tuple[int, int, float]]:
+    """找出所有重叠超过公差的矩形对。
+
+    按左边界扫描：每个矩形只与水平方向上仍可能与它重叠的矩形（活动集合）比较，
+    而不是与所有矩形比较。结果与对所有矩形对调用calculate_overlap相同。
+
+    参数:
+        rects: 矩形列表，每个为（左，上，宽，高），以英寸为单位
+        tolerance: 被视为重叠的最小重叠量（默认：0.05英寸）
+
+    返回:
+        (i, j, overlap_area)元组列表，其中i < j是rects中的索引，按(i, j)排序
+    """
+    pairs = []
+    active: List[int] = []
+    for k in sorted(range(len(rects)), key=lambda index: rects[index][0]):
+        left = rects[k][0]
+        # 右边界与当前左边界之差不超过公差的矩形不会再与后面的矩形重叠
+        active = [a for a in active if rects[a][0] + rects[a][2] - left > tolerance]
+        for a in active:
+            overlaps, overlap_area = calculate_overlap(rects[a], rects[k], tolerance)
+            if overlaps:
+                pairs.append((min(a, k), max(a, k), overlap_area))
+        active.append(k)
+
+    pairs.sort()
+    return pairs
+
+
 def detect_overlaps(shapes: List[ShapeData]) -> None:
     """检测重叠的形状并更新它们的overlapping_shapes字典。
 
@@ -887,27 +1162,63 @@ def detect_overlaps(shapes: List[ShapeData]) -> None:
     参数:
         shapes: 带有shape_id属性的ShapeData对象列表
     """
-    n = len(shapes)
+    # Ensure shape IDs are set
+    for i, shape in enumerate(shapes):
+        assert shape.shape_id, f"Shape at index {i} has no shape_id"
 
-    # Compare each pair of shapes
-    for i in range(n):
-        for j in range(i + 1, n):
-            shape1 = shapes[i]
-            shape2 = shapes[j]
+    rects = [(shape.left, shape.top, shape.width, shape.height) for shape in shapes]
+    for i, j, overlap_area in find_overlaps(rects):
+        # Add shape IDs with overlap area in square inches
+        shapes[i].overlapping_shapes[shapes[j].shape_id] = overlap_area
+        shapes[j].overlapping_shapes[shapes[i].shape_id] = overlap_area
 
-            # Ensure shape IDs are set
-            assert shape1.shape_id, f"Shape at index {i} has no shape_id"
-            assert shape2.shape_id, f"Shape at index {j} has no shape_id"
 
-            rect1 = (shape1.left, shape1.top, shape1.width, shape1.height)
-            rect2 = (shape2.left, shape2.top, shape2.width, shape2.height)
+def extract_slide_inventory(
+    slide: Any, issues_only: bool = False
+) -> Dict[str, ShapeData]:
+    """提取单张幻灯片的文本形状。
 
-            overlaps, overlap_area = calculate_overlap(rect1, rect2)
+    参数:
+        slide: 幻灯片对象
+        issues_only: 如果为True，仅包含有溢出或重叠问题的形状
 
-            if overlaps:
-                # Add shape IDs with overlap area in square inches
-                shape1.overlapping_shapes[shape2.shape_id] = overlap_area
-                shape2.overlapping_shapes[shape1.shape_id] = overlap_area
+    返回:
+        {shape-N: ShapeData}字典，形状按视觉位置排序；没有文本形状时为空字典
+    """
+    # Collect all valid shapes from this slide with absolute positions
+    shapes_with_positions = []
+    for shape in slide.shapes:  # type: ignore
+        shapes_with_positions.extend(collect_shapes_with_absolute_positions(shape))
+
+    if not shapes_with_positions:
+        return {}
+
+    # Convert to ShapeData with absolute positions and slide reference
+    shape_data_list = [
+        ShapeData(
+            swp.shape,
+            swp.absolute_left,
+            swp.absolute_top,
+            slide,
+        )
+        for swp in shapes_with_positions
+    ]
+
+    # Sort by visual position and assign stable IDs in one step
+    sorted_shapes = sort_shapes_by_position(shape_data_list)
+    for idx, shape_data in enumerate(sorted_shapes):
+        shape_data.shape_id = f"shape-{idx}"
+
+    # Detect overlaps using the stable shape IDs
+    if len(sorted_shapes) > 1:
+        detect_overlaps(sorted_shapes)
+
+    # Filter for issues only if requested (after overlap detection)
+    if issues_only:
+        sorted_shapes = [sd for sd in sorted_shapes if sd.has_any_issues]
+
+    # Create slide inventory using the stable shape IDs
+    return {shape_data.shape_id: shape_data for shape_data in sorted_shapes}
 
 
 def extract_text_inventory(
@@ -929,50 +1240,49 @@ def extract_text_inventory(
     inventory: InventoryData = {}
 
     for slide_idx, slide in enumerate(prs.slides):
-        # Collect all valid shapes from this slide with absolute positions
-        shapes_with_positions = []
-        for shape in slide.shapes:  # type: ignore
-            shapes_with_positions.extend(collect_shapes_with_absolute_positions(shape))
-
-        if not shapes_with_positions:
-            continue
-
-        # Convert to ShapeData with absolute positions and slide reference
-        shape_data_list = [
-            ShapeData(
-                swp.shape,
-                swp.absolute_left,
-                swp.absolute_top,
-                slide,
-            )
-            for swp in shapes_with_positions
-        ]
+        shapes = extract_slide_inventory(slide, issues_only)
+        if shapes:
+            inventory[f"slide-{slide_idx}"] = shapes
+
+    return inventory
 
-        # Sort by visual position and assign stable IDs in one step
-        sorted_shapes = sort_shapes_by_position(shape_data_list)
-        for idx, shape_data in enumerate(sorted_shapes):
-            shape_data.shape_id = f"shape-{idx}"
 
-        # Detect overlaps using the stable shape IDs
-        if len(sorted_shapes) > 1:
-            detect_overlaps(sorted_shapes)
+# 工作进程中打开的演示文稿(由_init_worker设置)
+_worker_presentation: Any = None
 
-        # Filter for issues only if requested (after overlap detection)
-        if issues_only:
-            sorted_shapes = [sd for sd in sorted_shapes if sd.has_any_issues]
 
-        if not sorted_shapes:
-            continue
+def _init_worker(pptx_path: str, font_cache: Optional[str]) -> None:
+    """在每个工作进程中打开一次演示文稿，之后的幻灯片范围共享它和字体索引。"""
+    global _worker_presentation
+    _worker_presentation = Presentation(pptx_path)
+    get_font_index(Path(font_cache) if font_cache else None)
 
-        # Create slide inventory using the stable shape IDs
-        inventory[f"slide-{slide_idx}"] = {
-            shape_data.shape_id: shape_data for shape_data in sorted_shapes
-        }
 
-    return inventory
+def _extract_slide_range(
+    task: Tuple[int, int, bool],
+) -> List[Tuple[str, Dict[str, ShapeDict]]]:
+    """在工作进程中提取一段幻灯片，task为(起始索引, 结束索引, issues_only)。"""
+    start, stop, issues_only = task
+    slides = _worker_presentation.slides
+    result = []
+    for slide_idx in range(start, stop):
+        shapes = extract_slide_inventory(slides[slide_idx], issues_only)
+        if shapes:
+            result.append(
+                (
+                    f"slide-{slide_idx}",
+                    {
+                        shape_key: shape_data.to_dict()
+                        for shape_key, shape_data in shapes.items()
+                    },
+                )
+            )
+    return result
 
 
-def get_inventory_as_dict(pptx_path: Path, issues_only: bool = False) -> InventoryDict:
+def get_inventory_as_dict(
+    pptx_path: Path, issues_only: bool = False, jobs: Optional[int] = 1
+) -> InventoryDict:
     """提取文本目录并以可JSON序列化的字典形式返回。
 
     这是extract_text_inventory的便捷包装函数，返回字典而不是ShapeData对象，便于测试和直接JSON序列化。
@@ -980,19 +1290,51 @@ def get_inventory_as_dict(pptx_path: Path, issues_only: bool = False) -> Invento
     参数:
         pptx_path: PowerPoint文件的路径
         issues_only: 如果为True，仅包含有溢出或重叠问题的形状
+        jobs: 并行提取幻灯片的进程数（默认1，None表示CPU核心数）。
+              每个工作进程打开一次演示文稿并处理连续的幻灯片范围，结果按幻灯片顺序合并
 
     返回:
         所有数据都已序列化为JSON的嵌套字典
     """
-    inventory = extract_text_inventory(pptx_path, issues_only=issues_only)
+    prs = Presentation(str(pptx_path))
+    slide_count = len(prs.slides)
+    workers = min(jobs or os.cpu_count() or 1, slide_count)
+    if workers <= 1:
+        return _inventory_to_dict(
+            extract_text_inventory(pptx_path, prs, issues_only=issues_only)
+        )
+
+    # 每个工作进程分到几段幻灯片，各幻灯片形状数量不均时也能保持负载均衡
+    chunk = max(1, math.ceil(slide_count / (workers * 4)))
+    tasks = [
+        (start, min(start + chunk, slide_count), issues_only)
+        for start in range(0, slide_count, chunk)
+    ]
+
+    # 工作进程使用同一个字体索引缓存文件
+    font_cache = None
+    if _font_index is not None and _font_index.cache_path is not None:
+        font_cache = str(_font_index.cache_path)
 
-    # Convert ShapeData objects to dictionaries
+    dict_inventory: InventoryDict = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(pptx_path), font_cache),
+    ) as executor:
+        for slides in executor.map(_extract_slide_range, tasks):
+            dict_inventory.update(slides)
+
+    return dict_inventory
+
+
+def _inventory_to_dict(inventory: InventoryData) -> InventoryDict:
+    """将ShapeData对象转换为字典以进行JSON序列化。"""
     dict_inventory: InventoryDict = {}
     for slide_key, shapes in inventory.items():
         dict_inventory[slide_key] = {
             shape_key: shape_data.to_dict() for shape_key, shape_data in shapes.items()
         }
-
     return dict_inventory
 
 
@@ -1001,15 +1343,13 @@ def save_inventory(inventory: InventoryData, output_path: Path) -> None:
 
     将ShapeData对象转换为字典以进行JSON序列化。
     """
-    # Convert ShapeData objects to dictionaries
-    json_inventory: InventoryDict = {}
-    for slide_key, shapes in inventory.items():
-        json_inventory[slide_key] = {
-            shape_key: shape_data.to_dict() for shape_key, shape_data in shapes.items()
-        }
+    save_inventory_dict(_inventory_to_dict(inventory), output_path)
+
 
+def save_inventory_dict(inventory: InventoryDict, output_path: Path) -> None:
+    """将get_inventory_as_dict返回的目录保存到格式正确的JSON文件中。"""
     with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(json_inventory, f, indent=2, ensure_ascii=False)
+        json.dump(inventory, f, indent=2, ensure_ascii=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import random
+import unittest
+
+from inventory import calculate_overlap, find_overlaps
+
+
+def brute_force_overlaps(rects, tolerance=0.05):
+    """对所有矩形对调用calculate_overlap的参考实现"""
+    pairs = []
+    for i in range(len(rects)):
+        for j in range(i + 1, len(rects)):
+            overlaps, overlap_area = calculate_overlap(rects[i], rects[j], tolerance)
+            if overlaps:
+                pairs.append((i, j, overlap_area))
+    return pairs
+
+
+# 目前此测试不会在CI中自动运行；它仅用于文档说明和手动检查。
+class TestFindOverlaps(unittest.TestCase):
+
+    def test_no_rects(self):
+        """测试没有矩形或只有一个矩形"""
+        self.assertEqual(find_overlaps([]), [])
+        self.assertEqual(find_overlaps([(0, 0, 1, 1)]), [])
+
+    def test_overlap_exactly_at_tolerance(self):
+        """测试重叠宽度或高度恰好等于公差时不计为重叠"""
+        # 0.25的倍数可以精确表示，避免浮点误差
+        rects = [(0, 0, 1, 1), (0.75, 0, 1, 1), (0, 0.75, 1, 1)]
+        self.assertEqual(find_overlaps(rects, tolerance=0.25), [])
+        self.assertEqual(brute_force_overlaps(rects, tolerance=0.25), [])
+
+    def test_overlap_just_above_tolerance(self):
+        """测试重叠略大于公差时计为重叠"""
+        rects = [(0, 0, 1, 1), (0.5, 0.5, 1, 1)]
+        self.assertEqual(find_overlaps(rects, tolerance=0.25), [(0, 1, 0.25)])
+
+    def test_touching_rects(self):
+        """测试只在边上接触的矩形不计为重叠"""
+        rects = [(0, 0, 1, 1), (1, 0, 1, 1), (0, 1, 1, 1)]
+        self.assertEqual(find_overlaps(rects), [])
+
+    def test_equal_left_edges(self):
+        """测试左边界相同的矩形都会相互比较"""
+        rects = [(1, 0, 2, 3), (1, 1, 0.5, 1), (1, 2.5, 4, 1)]
+        self.assertEqual(find_overlaps(rects), brute_force_overlaps(rects))
+        self.assertEqual([pair[:2] for pair in find_overlaps(rects)], [(0, 1), (0, 2)])
+
+    def test_contained_rect(self):
+        """测试包含在另一个矩形内的矩形，索引顺序与左边界顺序相反"""
+        rects = [(2, 2, 1, 1), (0, 0, 10, 10)]
+        self.assertEqual(find_overlaps(rects), [(0, 1, 1.0)])
+
+    def test_matches_brute_force_on_grid(self):
+        """测试网格坐标（经常出现接触、相同边界和恰好等于公差的重叠）与逐对比较一致"""
+        rng = random.Random(0)
+        for _ in range(500):
+            rects = [
+                (
+                    rng.randint(0, 40) * 0.25,
+                    rng.randint(0, 30) * 0.25,
+                    rng.randint(1, 12) * 0.25,
+                    rng.randint(1, 8) * 0.25,
+                )
+                for _ in range(rng.randint(0, 30))
+            ]
+            for tolerance in (0, 0.25, 0.5):
+                self.assertEqual(
+                    find_overlaps(rects, tolerance),
+                    brute_force_overlaps(rects, tolerance),
+                )
+
+    def test_matches_brute_force_on_random_layouts(self):
+        """测试随机幻灯片布局（英寸）与逐对比较一致"""
+        rng = random.Random(1)
+        for _ in range(300):
+            rects = [
+                (
+                    rng.uniform(0, 10),
+                    rng.uniform(0, 7.5),
+                    rng.uniform(0.05, 4),
+                    rng.uniform(0.05, 2),
+                )
+                for _ in range(rng.randint(0, 40))
+            ]
+            self.assertEqual(find_overlaps(rects), brute_force_overlaps(rects))
+
+
+if __name__ == "__main__":
+    unittest.main()
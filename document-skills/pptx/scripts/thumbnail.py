@@ -49,6 +49,9 @@ from inventory import extract_text_inventory
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ooxml" / "scripts"))
+from soffice_pool import SofficeError, get_pool  # noqa: E402
+
 # 常量
 THUMBNAIL_WIDTH = 300  # 固定的缩略图宽度（像素）
 CONVERSION_DPI = 100  # PDF转图片的DPI
@@ -213,22 +216,31 @@ def convert_to_images(pptx_path, temp_dir, dpi):
 
     pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
 
-    # 转换为PDF
+    # 转换为PDF（如果有常驻的soffice池则使用预热实例）
     print("正在转换为PDF...")
-    result = subprocess.run(
-        [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(temp_dir),
-            str(pptx_path),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0 or not pdf_path.exists():
+    pool = get_pool()
+    if pool is not None:
+        try:
+            pool.convert(pptx_path, temp_dir, "pdf")
+        except SofficeError as e:
+            raise RuntimeError(f"PDF转换失败：{e}")
+    else:
+        result = subprocess.run(
+            [
+                "soffice",
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                str(temp_dir),
+                str(pptx_path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError("PDF转换失败")
+    if not pdf_path.exists():
         raise RuntimeError("PDF转换失败")
 
     # 将PDF转换为图片
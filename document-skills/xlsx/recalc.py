@@ -12,6 +12,8 @@ import platform
 from pathlib import Path
 from openpyxl import load_workbook
 
+from soffice_pool import SofficeError, SofficeTimeout, get_pool
+
 
 def setup_libreoffice_macro():
     """如果尚未配置，则设置用于重新计算的LibreOffice宏"""
@@ -66,6 +68,17 @@ def recalc(filename, timeout=30):
     
     abs_path = str(Path(filename).absolute())
     
+    # 如果有常驻的soffice池(python soffice_pool.py start)，直接在预热实例中重新计算
+    pool = get_pool()
+    if pool is not None:
+        try:
+            pool.recalc(abs_path, timeout=timeout)
+        except SofficeTimeout:
+            return {'error': f'重新计算超时（{timeout}秒）'}
+        except SofficeError as e:
+            return {'error': str(e)}
+        return scan_errors(filename)
+    
     if not setup_libreoffice_macro():
         return {'error': '设置LibreOffice宏失败'}
     
@@ -98,6 +111,11 @@ def recalc(filename, timeout=30):
         else:
             return {'error': error_msg}
     
+    return scan_errors(filename)
+
+
+def scan_errors(filename):
+    """扫描已重新计算的Excel文件中的错误和公式数量"""
     # 检查重新计算文件中的Excel错误 - 扫描所有单元格
     try:
         wb = load_workbook(filename, data_only=True)
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+常驻LibreOffice(soffice)工作进程池，用于文档转换和公式重新计算。
+
+每次调用 `soffice --headless` 都要付出数秒的冷启动代价。本模块维护N个
+在UNO套接字上监听的预热soffice实例，并把转换/重新计算任务分派给空闲实例：
+任务在实例间排队，每个任务有独立超时，实例崩溃或超时会被自动重启。
+
+池可以在进程内使用，也可以作为后台常驻进程启动，供之后的脚本调用共享：
+
+    python soffice_pool.py start --size 2   # 启动常驻实例
+    python soffice_pool.py status
+    python soffice_pool.py stop
+
+在代码中：
+
+    pool = get_pool()  # 如果没有运行中的池或缺少uno模块，返回None
+    if pool is not None:
+        pool.convert("deck.pptx", "out_dir", "pdf", timeout=120)
+    else:
+        ...  # 回退到一次性的soffice命令
+
+    with SofficePool(size=2) as pool:  # 进程内的临时池
+        pool.recalc("book.xlsx")
+
+需要LibreOffice自带的Python UNO绑定(`import uno`)；不可用时get_pool()返回None。
+"""
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import uno
+except ImportError:
+    uno = None
+
+# 每个soffice实例的启动超时（秒）
+STARTUP_TIMEOUT = 60
+
+# 结束实例后等待其进程组退出的最长时间（秒）
+KILL_TIMEOUT = 10
+
+# 等待空闲实例的最长时间（秒）
+QUEUE_TIMEOUT = 600
+
+# 常驻池的默认状态目录
+DEFAULT_STATE_DIR = Path(tempfile.gettempdir()) / (
+    f"soffice-pool-{os.getuid()}" if hasattr(os, "getuid") else "soffice-pool"
+)
+
+# --convert-to 未指定过滤器时按文档类型选择的导出过滤器
+DEFAULT_FILTERS = {
+    "pdf": {
+        ".docx": "writer_pdf_Export",
+        ".pptx": "impress_pdf_Export",
+        ".xlsx": "calc_pdf_Export",
+    },
+}
+
+
+class SofficeError(RuntimeError):
+    """soffice任务失败。"""
+
+
+class SofficeTimeout(SofficeError, TimeoutError):
+    """soffice任务超时，对应的实例已被重启。"""
+
+
+class _Worker:
+    """一个在UNO套接字上监听的soffice实例。"""
+
+    def __init__(self, index, state_dir, port=None, pid=None):
+        self.index = index
+        self.state_dir = Path(state_dir)
+        self.port = port
+        self.pid = pid
+        self.profile_dir = self.state_dir / f"profile-{index}"
+        self.lock_path = self.state_dir / f"worker-{index}.lock"
+
+    def to_dict(self):
+        return {"index": self.index, "port": self.port, "pid": self.pid}
+
+    def start(self):
+        """启动soffice并等待UNO端口就绪。
+
+        soffice启动器会派生实际工作的soffice.bin子进程，因此实例总是在独立的会话中
+        启动，kill()据此结束整个进程组（进程组ID即启动器的pid）。
+        """
+        soffice = shutil.which("soffice")
+        if soffice is None:
+            raise SofficeError("未找到soffice")
+        if self.port is None or not _port_is_free(self.port):
+            self.port = _free_port()
+
+        cmd = [
+            soffice,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--norestore",
+            "--nolockcheck",
+            f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}",
+            f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+        ]
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self.pid = process.pid
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SofficeError(f"soffice实例 {self.index} 启动后立即退出")
+            if _port_is_open(self.port):
+                return
+            time.sleep(0.1)
+        self.kill()
+        raise SofficeError(f"soffice实例 {self.index} 启动超时")
+
+    def is_alive(self):
+        if self.pid is None:
+            return False
+        try:
+            os.kill(self.pid, 0)
+        except OSError:
+            return False
+        return _port_is_open(self.port)
+
+    def kill(self):
+        """结束实例的整个进程组，并等待其退出后再释放端口和配置文件目录。"""
+        if self.pid is None:
+            return
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            os.waitpid(self.pid, 0)
+        except (OSError, ChildProcessError):
+            pass
+        # soffice.bin不是本进程的子进程，无法直接回收，等待进程组中不再有进程
+        deadline = time.monotonic() + KILL_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                os.killpg(self.pid, 0)
+            except OSError:
+                break
+            time.sleep(0.05)
+        self.pid = None
+
+    def desktop(self):
+        """连接到此实例并返回com.sun.star.frame.Desktop。"""
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        ctx = resolver.resolve(
+            f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+        )
+        return ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", ctx
+        )
+
+
+class SofficePool:
+    """预热的soffice实例池。
+
+    参数:
+        size: 实例数量
+        state_dir: 保存实例配置文件、锁和状态的目录
+    """
+
+    def __init__(self, size=2, state_dir=None):
+        self.size = size
+        self.state_dir = Path(state_dir or tempfile.mkdtemp(prefix="soffice-pool-"))
+        self.workers = [_Worker(i, self.state_dir) for i in range(size)]
+        self._owned = state_dir is None
+
+    # ==================== 生命周期 ====================
+
+    @classmethod
+    def attach(cls, state_dir=None):
+        """连接到由 `soffice_pool.py start` 启动的常驻池，不可用时返回None。"""
+        if uno is None or fcntl is None:
+            return None
+        state_dir = Path(state_dir or DEFAULT_STATE_DIR)
+        try:
+            state = json.loads((state_dir / "pool.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        pool = cls.__new__(cls)
+        pool.size = len(state["workers"])
+        pool.state_dir = state_dir
+        pool.workers = [
+            _Worker(w["index"], state_dir, port=w["port"], pid=w["pid"])
+            for w in state["workers"]
+        ]
+        pool._owned = False
+        if not any(w.is_alive() for w in pool.workers):
+            return None
+        return pool
+
+    def start(self, detach=False):
+        """启动所有实例。detach=True时实例在当前进程退出后继续运行。"""
+        if uno is None:
+            raise SofficeError("缺少LibreOffice的Python UNO绑定(uno模块)")
+        if not detach:
+            # 实例位于独立的会话中，不会随终端信号退出，进程退出时显式停止
+            atexit.register(self.stop)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        for worker in self.workers:
+            worker.start()
+        self._save_state()
+        return self
+
+    def stop(self):
+        """停止所有实例并清理状态。"""
+        atexit.unregister(self.stop)
+        for worker in self.workers:
+            worker.kill()
+        state_file = self.state_dir / "pool.json"
+        if state_file.exists():
+            state_file.unlink()
+        if self._owned:
+            shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _save_state(self, worker=None):
+        """写入状态文件；指定worker时只更新该实例的条目。"""
+        workers = [w.to_dict() for w in self.workers]
+        if worker is not None:
+            try:
+                state_file = self.state_dir / "pool.json"
+                workers = json.loads(state_file.read_text(encoding="utf-8"))["workers"]
+                workers[worker.index] = worker.to_dict()
+            except (OSError, ValueError, KeyError, IndexError):
+                pass
+        state = {"workers": workers}
+        tmp = self.state_dir / "pool.json.tmp"
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        tmp.replace(self.state_dir / "pool.json")
+
+    # ==================== 任务 ====================
+
+    def convert(self, input_path, output_dir, convert_to, timeout=120):
+        """转换文档，等同于 `soffice --convert-to <convert_to> --outdir <output_dir>`。
+
+        参数:
+            input_path: 输入文档路径
+            output_dir: 输出目录
+            convert_to: 目标格式，如"pdf"或"html:HTML"(扩展名:过滤器名)
+            timeout: 任务超时（秒）
+
+        返回:
+            Path: 输出文件路径
+        """
+        input_path = Path(input_path).resolve()
+        extension, _, filter_name = convert_to.partition(":")
+        if not filter_name:
+            filter_name = DEFAULT_FILTERS.get(extension, {}).get(
+                input_path.suffix.lower(), ""
+            )
+        output_path = Path(output_dir).resolve() / f"{input_path.stem}.{extension}"
+
+        def job(desktop):
+            doc = _load(desktop, input_path)
+            try:
+                props = (_prop("FilterName", filter_name),) if filter_name else ()
+                doc.storeToURL(uno.systemPathToFileUrl(str(output_path)), props)
+            finally:
+                doc.close(True)
+
+        self._run(job, timeout)
+        return output_path
+
+    def recalc(self, path, timeout=30):
+        """重新计算电子表格中的所有公式并原地保存。"""
+        path = Path(path).resolve()
+
+        def job(desktop):
+            doc = _load(desktop, path)
+            try:
+                doc.calculateAll()
+                doc.store()
+            finally:
+                doc.close(True)
+
+        self._run(job, timeout)
+
+    def _run(self, job, timeout):
+        """在空闲实例上运行任务；超时或连接失败时重启该实例。"""
+        worker, lock = self._acquire()
+        try:
+            # 其他进程可能已重启过此实例，先同步最新的端口和PID
+            self._refresh(worker)
+            if not worker.is_alive():
+                self._restart(worker)
+
+            outcome = {}
+
+            def target():
+                try:
+                    job(worker.desktop())
+                except Exception as e:
+                    outcome["error"] = e
+
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            thread.join(timeout)
+
+            if thread.is_alive():
+                self._restart(worker)
+                raise SofficeTimeout(f"soffice任务超过 {timeout} 秒")
+            if "error" in outcome:
+                if not worker.is_alive():
+                    self._restart(worker)
+                raise SofficeError(str(outcome["error"])) from outcome["error"]
+        finally:
+            _unlock(lock)
+
+    def _refresh(self, worker):
+        try:
+            state = json.loads((self.state_dir / "pool.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for entry in state["workers"]:
+            if entry["index"] == worker.index:
+                worker.port, worker.pid = entry["port"], entry["pid"]
+
+    def _restart(self, worker):
+        worker.kill()
+        worker.start()
+        self._save_state(worker)
+
+    def _acquire(self):
+        """锁定一个空闲实例；所有实例都忙时排队等待。"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        deadline = time.monotonic() + QUEUE_TIMEOUT
+        while True:
+            for worker in self.workers:
+                lock = _try_lock(worker.lock_path)
+                if lock is not None:
+                    return worker, lock
+            if time.monotonic() > deadline:
+                raise SofficeTimeout("等待空闲soffice实例超时")
+            time.sleep(0.05)
+
+
+_shared_pool = None
+
+
+def get_pool(state_dir=None):
+    """返回正在运行的常驻池；不可用时返回None，调用方应回退到一次性模式。"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = SofficePool.attach(state_dir)
+    return _shared_pool
+
+
+def _load(desktop, path):
+    doc = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(str(path)),
+        "_blank",
+        0,
+        (_prop("Hidden", True), _prop("ReadOnly", False)),
+    )
+    if doc is None:
+        raise SofficeError(f"无法打开文档: {path}")
+    return doc
+
+
+def _prop(name, value):
+    prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+def _try_lock(lock_path):
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    if fcntl is None:
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _port_is_free(port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("127.0.0.1", port))
+        except OSError:
+            return False
+        return True
+
+
+def _port_is_open(port):
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="管理常驻soffice工作进程池")
+    parser.add_argument("command", choices=["start", "stop", "status"])
+    parser.add_argument("--size", type=int, default=2, help="实例数量（默认: 2）")
+    parser.add_argument("--state-dir", default=str(DEFAULT_STATE_DIR), help="状态目录")
+    args = parser.parse_args()
+
+    state_dir = Path(args.state_dir)
+    pool = SofficePool.attach(state_dir)
+
+    if args.command == "start":
+        if pool is not None:
+            print(f"池已在运行: {pool.size} 个实例")
+            return
+        try:
+            SofficePool(size=args.size, state_dir=state_dir).start(detach=True)
+        except SofficeError as e:
+            sys.exit(f"错误: {e}")
+        print(f"已启动 {args.size} 个soffice实例，状态目录: {state_dir}")
+    elif args.command == "stop":
+        if pool is None:
+            print("没有正在运行的池")
+            return
+        pool.stop()
+        print("已停止所有soffice实例")
+    else:
+        if pool is None:
+            print("没有正在运行的池")
+            return
+        for worker in pool.workers:
+            status = "运行中" if worker.is_alive() else "已停止"
+            print(f"  实例 {worker.index}: 端口 {worker.port}, PID {worker.pid}, {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+帧存储 - GIFBuilder使用的可插拔帧存储后端。
+
+长消息GIF（200+帧、480px）如果以原始RGB数组常驻内存会占用数百MB。
+本模块提供三种后端，它们都按需逐帧返回numpy数组：
+
+- MemoryFrameStore: 原始数组直接保存在内存中（默认，速度最快）
+- CompressedFrameStore: 使用zlib（或可选的LZ4）压缩保存，访问时解压
+- MemmapFrameStore: 写入临时文件，访问时通过内存映射读取
+"""
+
+import tempfile
+import zlib
+from typing import Iterable, Iterator
+
+import numpy as np
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+class FrameStore:
+    """帧存储后端的基类。子类实现_append/_load/_select/_clear。"""
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def append(self, frame: np.ndarray):
+        """追加一帧。"""
+        self._append(np.ascontiguousarray(frame))
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("帧索引超出范围")
+        return self._load(index)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """逐帧迭代，每次只解码一帧。"""
+        for i in range(len(self)):
+            yield self._load(i)
+
+    def select(self, indices: Iterable[int]):
+        """
+        仅保留给定索引的帧（按给定顺序）。
+
+        参数：
+            indices: 要保留的帧索引
+        """
+        self._select(list(indices))
+
+    def clear(self):
+        """删除所有帧并释放资源。"""
+        self._clear()
+
+    def empty_like(self) -> "FrameStore":
+        """创建一个相同类型和配置的空存储。"""
+        raise NotImplementedError
+
+    def _append(self, frame: np.ndarray):
+        raise NotImplementedError
+
+    def _load(self, index: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def _select(self, indices: list[int]):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+
+class MemoryFrameStore(FrameStore):
+    """将原始帧数组保存在内存中。"""
+
+    def __init__(self):
+        self._frames: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def empty_like(self) -> "MemoryFrameStore":
+        return MemoryFrameStore()
+
+    def _append(self, frame: np.ndarray):
+        self._frames.append(frame)
+
+    def _load(self, index: int) -> np.ndarray:
+        return self._frames[index]
+
+    def _select(self, indices: list[int]):
+        self._frames = [self._frames[i] for i in indices]
+
+    def _clear(self):
+        self._frames = []
+
+
+class CompressedFrameStore(FrameStore):
+    """压缩保存帧，访问时惰性解压。"""
+
+    def __init__(self, codec: str = 'zlib', level: int = 1):
+        """
+        初始化压缩帧存储。
+
+        参数：
+            codec: 'zlib' 或 'lz4'（需要安装lz4包）
+            level: 压缩级别（zlib为1-9，越低越快）
+        """
+        if codec not in ('zlib', 'lz4'):
+            raise ValueError(f"未知的压缩编解码器：{codec}")
+        if codec == 'lz4' and lz4_frame is None:
+            raise ImportError("使用codec='lz4'需要安装lz4包：pip install lz4")
+        self.codec = codec
+        self.level = level
+        # 每帧：(压缩数据, 形状, 数据类型)
+        self._frames: list[tuple[bytes, tuple[int, ...], np.dtype]] = []
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def empty_like(self) -> "CompressedFrameStore":
+        return CompressedFrameStore(codec=self.codec, level=self.level)
+
+    def _append(self, frame: np.ndarray):
+        raw = frame.tobytes()
+        if self.codec == 'lz4':
+            data = lz4_frame.compress(raw)
+        else:
+            data = zlib.compress(raw, self.level)
+        self._frames.append((data, frame.shape, frame.dtype))
+
+    def _load(self, index: int) -> np.ndarray:
+        data, shape, dtype = self._frames[index]
+        if self.codec == 'lz4':
+            raw = lz4_frame.decompress(data)
+        else:
+            raw = zlib.decompress(data)
+        return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+    def _select(self, indices: list[int]):
+        self._frames = [self._frames[i] for i in indices]
+
+    def _clear(self):
+        self._frames = []
+
+
+class MemmapFrameStore(FrameStore):
+    """将帧写入临时文件，访问时通过内存映射读取。"""
+
+    def __init__(self, dir: str | None = None):
+        """
+        初始化内存映射帧存储。
+
+        参数：
+            dir: 临时文件所在目录（默认使用系统临时目录）
+        """
+        self.dir = dir
+        self._file = None
+        self._end = 0
+        # 每帧：(文件偏移, 形状, 数据类型)
+        self._slots: list[tuple[int, tuple[int, ...], np.dtype]] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __del__(self):
+        self._clear()
+
+    def empty_like(self) -> "MemmapFrameStore":
+        return MemmapFrameStore(dir=self.dir)
+
+    def _append(self, frame: np.ndarray):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(dir=self.dir)
+        self._file.seek(self._end)
+        self._file.write(frame.tobytes())
+        self._file.flush()
+        self._slots.append((self._end, frame.shape, frame.dtype))
+        self._end += frame.nbytes
+
+    def _load(self, index: int) -> np.ndarray:
+        offset, shape, dtype = self._slots[index]
+        return np.memmap(self._file, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def _select(self, indices: list[int]):
+        # 只调整槽位表；文件中未引用的区域在clear()时一并释放
+        self._slots = [self._slots[i] for i in indices]
+
+    def _clear(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._end = 0
+        self._slots = []
+
+
+FRAME_STORES = {
+    'memory': MemoryFrameStore,
+    'compressed': CompressedFrameStore,
+    'memmap': MemmapFrameStore,
+}
+
+
+def create_frame_store(store: str | FrameStore = 'memory') -> FrameStore:
+    """
+    按名称创建帧存储，或原样返回已有的存储实例。
+
+    参数：
+        store: 'memory'、'compressed'、'memmap' 或 FrameStore 实例
+
+    返回：
+        FrameStore实例
+    """
+    if isinstance(store, FrameStore):
+        return store
+    if store not in FRAME_STORES:
+        raise ValueError(f"未知的帧存储：{store}（可选：{', '.join(FRAME_STORES)}）")
+    return FRAME_STORES[store]()
@@ -6,16 +6,18 @@ GIF构建器 - 用于将帧组装成针对Slack优化的GIF的核心模块。
 """
 
 from pathlib import Path
-from typing import Optional
-import imageio.v3 as imageio
+from typing import Iterator, Optional
 from PIL import Image
 import numpy as np
 
+from core.frame_store import FrameStore, create_frame_store
+
 
 class GIFBuilder:
     """用于从帧创建优化GIF的构建器。"""
 
-    def __init__(self, width: int = 480, height: int = 480, fps: int = 15):
+    def __init__(self, width: int = 480, height: int = 480, fps: int = 15,
+                 frame_store: str | FrameStore = 'memory'):
         """
         初始化GIF构建器。
 
@@ -23,11 +25,14 @@ class GIFBuilder:
             width: 帧宽度（像素）
             height: 帧高度（像素）
             fps: 每秒帧数
+            frame_store: 帧存储后端：'memory'（原始数组）、'compressed'（压缩）、
+                'memmap'（临时文件内存映射）或FrameStore实例。
+                长GIF使用'compressed'或'memmap'可大幅降低内存占用。
         """
         self.width = width
         self.height = height
         self.fps = fps
-        self.frames: list[np.ndarray] = []
+        self.frames: FrameStore = create_frame_store(frame_store)
 
     def add_frame(self, frame: np.ndarray | Image.Image):
         """
@@ -63,51 +68,65 @@ class GIFBuilder:
         返回：
             颜色优化后的帧列表
         """
-        optimized = []
+        return [np.array(quantized.convert('RGB'))
+                for quantized in self.iter_quantized_frames(num_colors, use_global_palette)]
+
+    def iter_quantized_frames(self, num_colors: int = 128,
+                              use_global_palette: bool = True) -> Iterator[Image.Image]:
+        """
+        逐帧量化，生成调色板（'P'模式）图像。
 
+        每次只从帧存储中读取一帧，不会保留所有帧的RGB副本。
+
+        参数：
+            num_colors: 目标颜色数（8-256）
+            use_global_palette: 对所有帧使用单一调色板（更好的压缩）
+
+        返回：
+            量化后的PIL图像迭代器
+        """
         if use_global_palette and len(self.frames) > 1:
-            # 从所有帧创建全局调色板
-            # 采样帧以构建调色板
-            sample_size = min(5, len(self.frames))
-            sample_indices = [int(i * len(self.frames) / sample_size) for i in range(sample_size)]
-            sample_frames = [self.frames[i] for i in sample_indices]
-
-            # 将采样帧组合成单个图像以生成调色板
-            # 展平每个帧以获取所有像素，然后堆叠它们
-            all_pixels = np.vstack([f.reshape(-1, 3) for f in sample_frames])  # (total_pixels, 3)
-
-            # 从像素数据创建正确形状的RGB图像
-            # 我们将从所有像素创建一个大致为正方形的图像
-            total_pixels = len(all_pixels)
-            width = min(512, int(np.sqrt(total_pixels)))  # 合理的宽度，最大512
-            height = (total_pixels + width - 1) // width  # 向上取整
-
-            # 如有必要，填充以填充矩形
-            pixels_needed = width * height
-            if pixels_needed > total_pixels:
-                padding = np.zeros((pixels_needed - total_pixels, 3), dtype=np.uint8)
-                all_pixels = np.vstack([all_pixels, padding])
-
-            # 重塑为正确的RGB图像格式（H, W, 3）
-            img_array = all_pixels[:pixels_needed].reshape(height, width, 3).astype(np.uint8)
-            combined_img = Image.fromarray(img_array, mode='RGB')
-
-            # 生成全局调色板
-            global_palette = combined_img.quantize(colors=num_colors, method=2)
+            global_palette = self._build_global_palette(num_colors)
 
             # 将全局调色板应用于所有帧
             for frame in self.frames:
                 pil_frame = Image.fromarray(frame)
-                quantized = pil_frame.quantize(palette=global_palette, dither=1)
-                optimized.append(np.array(quantized.convert('RGB')))
+                yield pil_frame.quantize(palette=global_palette, dither=1)
         else:
             # 使用逐帧量化
             for frame in self.frames:
                 pil_frame = Image.fromarray(frame)
-                quantized = pil_frame.quantize(colors=num_colors, method=2, dither=1)
-                optimized.append(np.array(quantized.convert('RGB')))
-
-        return optimized
+                yield pil_frame.quantize(colors=num_colors, method=2, dither=1)
+
+    def _build_global_palette(self, num_colors: int) -> Image.Image:
+        """从采样帧创建全局调色板。"""
+        # 采样帧以构建调色板
+        sample_size = min(5, len(self.frames))
+        sample_indices = [int(i * len(self.frames) / sample_size) for i in range(sample_size)]
+        sample_frames = [self.frames[i] for i in sample_indices]
+
+        # 将采样帧组合成单个图像以生成调色板
+        # 展平每个帧以获取所有像素，然后堆叠它们
+        all_pixels = np.vstack([f.reshape(-1, 3) for f in sample_frames])  # (total_pixels, 3)
+
+        # 从像素数据创建正确形状的RGB图像
+        # 我们将从所有像素创建一个大致为正方形的图像
+        total_pixels = len(all_pixels)
+        width = min(512, int(np.sqrt(total_pixels)))  # 合理的宽度，最大512
+        height = (total_pixels + width - 1) // width  # 向上取整
+
+        # 如有必要，填充以填充矩形
+        pixels_needed = width * height
+        if pixels_needed > total_pixels:
+            padding = np.zeros((pixels_needed - total_pixels, 3), dtype=np.uint8)
+            all_pixels = np.vstack([all_pixels, padding])
+
+        # 重塑为正确的RGB图像格式（H, W, 3）
+        img_array = all_pixels[:pixels_needed].reshape(height, width, 3).astype(np.uint8)
+        combined_img = Image.fromarray(img_array, mode='RGB')
+
+        # 生成全局调色板
+        return combined_img.quantize(colors=num_colors, method=2)
 
     def deduplicate_frames(self, threshold: float = 0.995) -> int:
         """
@@ -122,12 +141,13 @@ class GIFBuilder:
         if len(self.frames) < 2:
             return 0
 
-        deduplicated = [self.frames[0]]
+        # 逐帧读取，只保留上一个保留帧的浮点副本
+        kept_indices = [0]
+        prev_frame = np.array(self.frames[0], dtype=np.float32)
         removed_count = 0
 
         for i in range(1, len(self.frames)):
             # 与前一帧比较
-            prev_frame = np.array(deduplicated[-1], dtype=np.float32)
             curr_frame = np.array(self.frames[i], dtype=np.float32)
 
             # 计算相似度（归一化）
@@ -137,11 +157,13 @@ class GIFBuilder:
             # 如果足够不同则保留帧
             # 高阈值（0.995）意味着只删除真正相同的帧
             if similarity < threshold:
-                deduplicated.append(self.frames[i])
+                kept_indices.append(i)
+                prev_frame = curr_frame
             else:
                 removed_count += 1
 
-        self.frames = deduplicated
+        if removed_count:
+            self.frames.select(kept_indices)
         return removed_count
 
     def save(self, output_path: str | Path, num_colors: int = 128,
@@ -176,12 +198,13 @@ class GIFBuilder:
                 print(f"  将尺寸从{self.width}x{self.height}调整为128x128以用于表情符号")
                 self.width = 128
                 self.height = 128
-                # 调整所有帧的大小
-                resized_frames = []
+                # 调整所有帧的大小（写入同类型的新存储）
+                resized_frames = self.frames.empty_like()
                 for frame in self.frames:
                     pil_frame = Image.fromarray(frame)
                     pil_frame = pil_frame.resize((128, 128), Image.Resampling.LANCZOS)
                     resized_frames.append(np.array(pil_frame))
+                self.frames.clear()
                 self.frames = resized_frames
             num_colors = min(num_colors, 48)  # 对表情符号使用更激进的颜色限制
 
@@ -190,18 +213,22 @@ class GIFBuilder:
                 print(f"  将帧数从{len(self.frames)}减少到约12以用于表情符号大小")
                 # 保留每第n帧以接近12帧
                 keep_every = max(1, len(self.frames) // 12)
-                self.frames = [self.frames[i] for i in range(0, len(self.frames), keep_every)]
+                self.frames.select(range(0, len(self.frames), keep_every))
 
-        # 使用全局调色板优化颜色
-        optimized_frames = self.optimize_colors(num_colors, use_global_palette=True)
+        # 使用全局调色板优化颜色（逐帧惰性量化）
+        frame_count = len(self.frames)
+        quantized_frames = self.iter_quantized_frames(num_colors, use_global_palette=True)
+        first_frame = next(quantized_frames)
 
         # 计算帧持续时间（毫秒）
         frame_duration = 1000 / self.fps
 
         # 保存GIF
-        imageio.imwrite(
+        first_frame.save(
             output_path,
-            optimized_frames,
+            format='GIF',
+            save_all=True,
+            append_images=quantized_frames,
             duration=frame_duration,
             loop=0  # 无限循环
         )
@@ -215,9 +242,9 @@ class GIFBuilder:
             'size_kb': file_size_kb,
             'size_mb': file_size_mb,
             'dimensions': f'{self.width}x{self.height}',
-            'frame_count': len(optimized_frames),
+            'frame_count': frame_count,
             'fps': self.fps,
-            'duration_seconds': len(optimized_frames) / self.fps,
+            'duration_seconds': frame_count / self.fps,
             'colors': num_colors
         }
 
@@ -226,7 +253,7 @@ class GIFBuilder:
         print(f"  路径：{output_path}")
         print(f"  大小：{file_size_kb:.1f} KB ({file_size_mb:.2f} MB)")
         print(f"  尺寸：{self.width}x{self.height}")
-        print(f"  帧数：{len(optimized_frames)} @ {self.fps} fps")
+        print(f"  帧数：{frame_count} @ {self.fps} fps")
         print(f"  持续时间：{info['duration_seconds']:.1f}s")
         print(f"  颜色数：{num_colors}")
 
@@ -242,4 +269,4 @@ class GIFBuilder:
 
     def clear(self):
         """清除所有帧（对于创建多个GIF很有用）。"""
-        self.frames = []
+        self.frames.clear()